@@ -15,10 +15,28 @@ PROJECT_ROOT = Path(__file__).parent.parent
 # Base de données
 DATABASE_PATH = PROJECT_ROOT / "database" / "jobs.db"
 
+# Snapshot Parquet de la vue analytique (exporté par database/etl_pipeline.py)
+SNAPSHOT_PATH = PROJECT_ROOT / "database" / "offers_snapshot.parquet"
+NLP_CORPUS_PATH = PROJECT_ROOT / "database" / "nlp_corpus.parquet"
+
+# Profil PRAGMA appliqué à chaque connexion SQLite (utils/sqlite_pool.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',          # lecteurs non bloqués par l'écrivain
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,           # 64 Mo par connexion
+    'mmap_size': 268435456,         # lectures mappées en mémoire (256 Mo)
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,           # ms
+}
+
 # Modèles NLP
 MODELS_DIR = PROJECT_ROOT / "nlp_analysis"
-TOPIC_MODEL_PATH = MODELS_DIR / "skill_topic_model.pkl"
+TOPIC_MODEL_DIR = MODELS_DIR / "skill_topic_model"        # manifeste JSON + .npy (utils/model_artifacts.py)
+CLUSTERING_MODEL_DIR = MODELS_DIR / "clustering_model"
+TOPIC_MODEL_PATH = MODELS_DIR / "skill_topic_model.pkl"     # ancien format (pickle)
 CLUSTERING_MODEL_PATH = MODELS_DIR / "clustering_model.pkl"
+EMBEDDINGS_DIR = MODELS_DIR / "embeddings"  # Word2Vec/Doc2Vec (nlp_analysis/embeddings.py)
+CLUSTER_LAYOUTS_PATH = MODELS_DIR / "cluster_layouts.parquet"  # nlp_analysis/precompute_layouts.py
 
 # Assets
 ASSETS_DIR = PROJECT_ROOT / "app" / "assets"
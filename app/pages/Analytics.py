@@ -6,12 +6,11 @@ import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 from datetime import datetime
-from collections import Counter
 
 # Import
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from utils.components import inject_premium_css, premium_navbar
-from utils.db import load_offers_with_skills
+from utils.db import load_offers_with_skills, load_skill_matrix
 
 
 
@@ -221,7 +220,7 @@ def load_analytics_data():
     df = load_offers_with_skills()
     if not df.empty:
         if 'skills_count' not in df.columns:
-            df['skills_count'] = df['all_skills'].apply(lambda x: len(str(x).split(',')) if pd.notna(x) else 0)
+            df['skills_count'] = load_skill_matrix().skills_per_offer(df['offer_key'])
         
         if 'added_at' not in df.columns or df['added_at'].isna().all():
             dates = pd.date_range(end=datetime.now(), periods=len(df), freq='H')
@@ -237,6 +236,7 @@ def load_analytics_data():
 
 with st.spinner("📡 CHARGEMENT DES DONNÉES..."):
     df = load_analytics_data()
+    skill_matrix = load_skill_matrix()
 
 if df.empty:
     st.error("⚠️ ERREUR: Aucune donnée")
@@ -291,11 +291,7 @@ filter2_col1, filter2_col2, filter2_col3 = st.columns(3)
 
 with filter2_col1:
     st.markdown("### 💼 Compétences Spécifiques")
-    all_skills_list = set()
-    for s in df['all_skills'].dropna():
-        if isinstance(s, str):
-            all_skills_list.update([x.strip() for x in s.split(',') if x.strip()])
-    all_skills_list = sorted(list(all_skills_list))[:100]
+    all_skills_list = skill_matrix.used_skills()[:100]
     
     sel_specific_skills = st.multiselect(
         "Filtrer par compétences",
@@ -351,13 +347,7 @@ filtered = filtered[
 ]
 
 if sel_specific_skills:
-    def has_any_skill(skills_str):
-        if pd.isna(skills_str):
-            return False
-        skills_list = [s.strip().lower() for s in str(skills_str).split(',')]
-        return any(skill.lower() in skills_list for skill in sel_specific_skills)
-    
-    filtered = filtered[filtered['all_skills'].apply(has_any_skill)]
+    filtered = filtered[skill_matrix.has_any_skill(filtered['offer_key'], sel_specific_skills)]
 
 if date_range and len(date_range) == 2 and 'added_at' in filtered.columns:
     filtered = filtered[
@@ -694,12 +684,7 @@ with chart_row4_col1:
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     st.markdown('<div class="chart-title">🔥 Top 20 Compétences</div>', unsafe_allow_html=True)
     
-    all_skills = []
-    for skills_str in filtered['all_skills'].dropna():
-        if isinstance(skills_str, str):
-            all_skills.extend([s.strip() for s in skills_str.split(',') if s.strip()])
-    
-    skill_counts = Counter(all_skills).most_common(20)
+    skill_counts = skill_matrix.top_skills(filtered['offer_key'], n=20)
     skills_df = pd.DataFrame(skill_counts, columns=['skill', 'count'])
     
     fig8 = go.Figure()
@@ -65,7 +65,7 @@ except ImportError as e:
     GeographicEnricher = None
 
 try:
-    from skills_extractor import SkillsExtractor
+    from skills_extractor import SkillsExtractor, DEFAULT_CACHE_PATH
 
     ENRICHERS_SKILLS_AVAILABLE = True
     print(" SkillsExtractor importé avec succès")
@@ -125,7 +125,7 @@ def get_enrichers():
     # Enrichisseur de compétences
     if ENRICHERS_SKILLS_AVAILABLE:
         try:
-            skills_enricher = SkillsExtractor()
+            skills_enricher = SkillsExtractor(cache_path=DEFAULT_CACHE_PATH)
         except Exception as e:
             st.warning(f"⚠️ SkillsExtractor non disponible : {e}")
 
@@ -286,6 +286,9 @@ def enrich_offers_batch(offers: list) -> list:
         if (idx + 1) % 10 == 0 or (idx + 1) == total:
             print(f"   Enrichissement : {idx + 1}/{total}")
 
+    # Le cache n'écrit seul que par paquets de flush_every textes
+    skills_enricher.flush_cache()
+
     return enriched_offers
 
 
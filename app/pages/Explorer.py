@@ -7,7 +7,7 @@ from datetime import datetime
 # Import des utilitaires
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from utils.components import inject_premium_css, premium_navbar
-from utils.db import load_offers_with_skills
+from utils.db import get_db_manager, load_offers_page, load_filter_options
 
 # ============================================================================
 # SESSION STATE
@@ -256,25 +256,11 @@ st.markdown("""
 # CHARGEMENT DONNÉES
 # ============================================================================
 
-@st.cache_data(ttl=300)
-def load_data():
-    df = load_offers_with_skills()
-    if not df.empty:
-        df['skills_count'] = df['all_skills'].apply(
-            lambda x: len(str(x).split(',')) if pd.notna(x) else 0
-        )
-        df['has_remote'] = df['remote'].apply(
-            lambda x: x in ['yes', 'oui', 'hybrid'] if pd.notna(x) else False
-        )
-        df['match_score'] = 70 + (df.index % 30)
-    return df
-
-with st.spinner("✨ Chargement des offres..."):
-    df = load_data()
+# Seules les valeurs des filtres sont chargées ici : les offres sont
+# filtrées et paginées en SQL (voir APPLICATION DES FILTRES)
+filter_options = load_filter_options()
 
-if df.empty:
-    st.error("⚠️ Aucune donnée disponible")
-    st.stop()
+items_per_page = 20
 
 # ============================================================================
 # HERO SECTION
@@ -306,7 +292,7 @@ search_query = st.text_input(
 filter_col1, filter_col2 = st.columns(2)
 
 with filter_col1:
-    all_regions = ['Toutes les régions'] + sorted(df['region_name'].dropna().unique().tolist())
+    all_regions = ['Toutes les régions'] + filter_options['regions']
     selected_region = st.selectbox(
         "🗺️ Sélectionnez une région",
         all_regions,
@@ -314,7 +300,7 @@ with filter_col1:
     )
 
 with filter_col2:
-    all_contracts = ['Tous les contrats'] + sorted(df['contract_type'].dropna().unique().tolist())
+    all_contracts = ['Tous les contrats'] + filter_options['contract_types']
     selected_contract = st.selectbox(
         "📋 Sélectionnez un type de contrat",
         all_contracts,
@@ -332,24 +318,30 @@ st.markdown("---")
 # APPLICATION DES FILTRES
 # ============================================================================
 
-filtered_df = df.copy()
+filters = {
+    'regions': [selected_region] if selected_region != 'Toutes les régions' else None,
+    'contract_types': [selected_contract] if selected_contract != 'Tous les contrats' else None,
+    'search_text': search_query or None,
+}
 
-if search_query:
-    query_lower = search_query.lower()
-    mask = (
-        filtered_df['title'].str.lower().str.contains(query_lower, na=False) |
-        filtered_df['company_name'].str.lower().str.contains(query_lower, na=False) |
-        filtered_df['all_skills'].str.lower().str.contains(query_lower, na=False)
-    )
-    filtered_df = filtered_df[mask]
+# Curseurs des pages visitées (pagination keyset), remis à zéro quand les
+# filtres changent
+if st.session_state.get('explorer_filters') != filters:
+    st.session_state['explorer_filters'] = filters
+    st.session_state['explorer_cursors'] = [None]
+
+cursors = st.session_state['explorer_cursors']
+page = len(cursors)
 
-if selected_region and selected_region != 'Toutes les régions':
-    filtered_df = filtered_df[filtered_df['region_name'] == selected_region]
+with st.spinner("✨ Chargement des offres..."):
+    result = load_offers_page(page_size=items_per_page, after=cursors[-1], **filters)
 
-if selected_contract and selected_contract != 'Tous les contrats':
-    filtered_df = filtered_df[filtered_df['contract_type'] == selected_contract]
+page_df = result['offers']
+summary = result['summary']
 
-filtered_df = filtered_df.sort_values('match_score', ascending=False)
+if summary['total'] == 0 and not any(filters.values()):
+    st.error("⚠️ Aucune donnée disponible")
+    st.stop()
 
 # ============================================================================
 # STATISTIQUES
@@ -362,13 +354,13 @@ stat_col1, stat_col2, stat_col3, stat_col4 = st.columns(4)
 with stat_col1:
     st.html(f"""
     <div class="stat-card">
-        <div class="stat-value">{len(filtered_df):,}</div>
+        <div class="stat-value">{summary['total']:,}</div>
         <div class="stat-label">Offres trouvées</div>
     </div>
     """)
 
 with stat_col2:
-    companies = filtered_df['company_name'].nunique() if not filtered_df.empty else 0
+    companies = summary['companies']
     st.html(f"""
     <div class="stat-card">
         <div class="stat-value">{companies}</div>
@@ -377,7 +369,7 @@ with stat_col2:
     """)
 
 with stat_col3:
-    regions = filtered_df['region_name'].nunique() if not filtered_df.empty else 0
+    regions = summary['regions']
     st.html(f"""
     <div class="stat-card">
         <div class="stat-value">{regions}</div>
@@ -386,7 +378,7 @@ with stat_col3:
     """)
 
 with stat_col4:
-    remote_count = filtered_df['has_remote'].sum() if not filtered_df.empty else 0
+    remote_count = summary['remote']
     st.html(f"""
     <div class="stat-card">
         <div class="stat-value">{remote_count}</div>
@@ -400,38 +392,41 @@ st.markdown("---")
 # AFFICHAGE DES OFFRES
 # ============================================================================
 
-if filtered_df.empty:
+if page_df.empty:
     st.info("😊 Aucune offre ne correspond à vos critères. Essayez d'élargir votre recherche.")
     st.stop()
 
-items_per_page = 20
-total_pages = max(1, (len(filtered_df) - 1) // items_per_page + 1)
+total_pages = max(1, (summary['total'] - 1) // items_per_page + 1)
+start_idx = (page - 1) * items_per_page
+end_idx = start_idx + len(page_df)
 
 if total_pages > 1:
-    page = st.number_input(
-        f"Page (1-{total_pages})",
-        min_value=1,
-        max_value=total_pages,
-        value=1,
-        key="page_number"
-    )
-else:
-    page = 1
-
-start_idx = (page - 1) * items_per_page
-end_idx = min(start_idx + items_per_page, len(filtered_df))
-page_df = filtered_df.iloc[start_idx:end_idx]
+    nav_col1, nav_col2, nav_col3 = st.columns([1, 2, 1])
+    
+    with nav_col1:
+        if st.button("◀ Précédent", disabled=page == 1, use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    
+    with nav_col2:
+        st.markdown(f"<div style='text-align: center;'>Page {page} / {total_pages}</div>", unsafe_allow_html=True)
+    
+    with nav_col3:
+        if st.button("Suivant ▶", disabled=result['next_cursor'] is None, use_container_width=True):
+            cursors.append(result['next_cursor'])
+            st.rerun()
 
-st.markdown(f"### Affichage des offres {start_idx + 1} à {end_idx} sur {len(filtered_df):,}")
+st.markdown(f"### Affichage des offres {start_idx + 1} à {end_idx} sur {summary['total']:,}")
 
-for idx, row in page_df.iterrows():
+for row in page_df.to_dict('records'):
+    idx = row['offer_key']
     title = str(row.get('title', 'Poste non spécifié'))
     company = str(row.get('company_name', 'Entreprise non spécifiée'))
     location = str(row.get('region_name', 'Lieu non spécifié'))
     contract = str(row.get('contract_type', 'CDI'))
     remote = str(row.get('remote', 'no'))
-    skills_count = int(row.get('skills_count', 0))
-    match_score = int(row.get('match_score', 75))
+    skills_count = len(str(row['all_skills']).split(',')) if pd.notna(row['all_skills']) else 0
+    match_score = 70 + (idx % 30)
     description = str(row.get('description', 'Description non disponible'))
     
     # Récupérer l'URL depuis source_url (colonne de la BDD)
@@ -581,20 +576,26 @@ st.markdown("---")
 footer_col1, footer_col2, footer_col3 = st.columns(3)
 
 with footer_col1:
-    st.markdown(f"**📊 {len(filtered_df):,} offres** correspondent à vos critères")
+    st.markdown(f"**📊 {summary['total']:,} offres** correspondent à vos critères")
 
 with footer_col2:
     st.markdown(f"**⭐ {len(st.session_state.favorites)} favoris**")
 
 with footer_col3:
-    csv = filtered_df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        "📥 Exporter en CSV",
-        csv,
-        f"offres_data_{datetime.now().strftime('%Y%m%d')}.csv",
-        "text/csv",
-        use_container_width=True
-    )
+    # Export de tout l'ensemble filtré, requêté seulement à la demande
+    if st.button("📥 Préparer l'export CSV", use_container_width=True):
+        export_df = get_db_manager().search_offers(
+            regions=filters['regions'],
+            contract_types=filters['contract_types'],
+            search_text=filters['search_text']
+        )
+        st.download_button(
+            "📥 Exporter en CSV",
+            export_df.to_csv(index=False).encode('utf-8'),
+            f"offres_data_{datetime.now().strftime('%Y%m%d')}.csv",
+            "text/csv",
+            use_container_width=True
+        )
 
 current_datetime = datetime.now().strftime("%d/%m/%Y à %H:%M")
 st.markdown(f"""
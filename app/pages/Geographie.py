@@ -10,7 +10,7 @@ from datetime import datetime
 # Import
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from utils.components import inject_premium_css, premium_navbar
-from utils.db import load_offers_with_skills
+from utils.db import load_offers_with_skills, load_skill_matrix
 
 # ============================================================================
 # CONFIG
@@ -120,11 +120,12 @@ def load_geo_data():
         df['lon'] += np.random.uniform(-0.5, 0.5, len(df))
         
         if 'skills_count' not in df.columns:
-            df['skills_count'] = df['all_skills'].apply(lambda x: len(str(x).split(',')) if pd.notna(x) else 0)
+            df['skills_count'] = load_skill_matrix().skills_per_offer(df['offer_key'])
     
     return df
 
 df = load_geo_data()
+skill_matrix = load_skill_matrix()
 
 if df.empty:
     st.error("⚠️ Aucune donnée")
@@ -179,11 +180,7 @@ with filter_col4:
 
 with filter_col5:
     st.markdown("### 💼 Compétences")
-    all_skills = set()
-    for s in df['all_skills'].dropna():
-        if isinstance(s, str):
-            all_skills.update([x.strip() for x in s.split(',') if x.strip()])
-    all_skills = sorted(list(all_skills))[:100]
+    all_skills = skill_matrix.used_skills()[:100]
     
     sel_skills = st.multiselect(
         "Compétences",
@@ -219,11 +216,7 @@ elif remote == "Non":
     filtered = filtered[filtered['remote'] == 'no']
 
 if sel_skills:
-    def has_skills(x):
-        if pd.isna(x):
-            return False
-        return any(s.lower() in str(x).lower() for s in sel_skills)
-    filtered = filtered[filtered['all_skills'].apply(has_skills)]
+    filtered = filtered[skill_matrix.has_any_skill(filtered['offer_key'], sel_skills)]
 
 filtered = filtered[(filtered['skills_count'] >= min_sk) & (filtered['skills_count'] <= max_sk)]
 
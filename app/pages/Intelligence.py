@@ -26,13 +26,17 @@ import plotly.figure_factory as ff
 # Embeding Libraries
 from gensim.models import Word2Vec
 from gensim.models.doc2vec import Doc2Vec, TaggedDocument
-from nltk.tokenize import word_tokenize
-import nltk
 
 # Import projet
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from utils.components import inject_premium_css, premium_navbar
-from utils.db import load_offers_with_skills
+from utils.db import current_snapshot_version, load_offers_with_skills
+from utils.skill_detector import SkillDetector
+from utils.nlp_preprocessing import GEOGRAPHIC_STOPWORDS, TEXT_COLUMNS, content_hash, prepare_texts, preprocess_corpus
+from utils.vector_index import VectorIndex
+from utils.embedding_store import EMBEDDING_EPOCHS, EMBEDDING_SEED, load_embedding_model
+from utils.cluster_layouts import layout_column, read_cluster_layouts
+from config import CLUSTER_LAYOUTS_PATH, NLP_CORPUS_PATH
 
 # ============================================================================
 # CONFIG
@@ -358,59 +362,9 @@ st.markdown(
 )
 
 # ============================================================================
-# STOPWORDS & COMPÉTENCES
+# COMPÉTENCES
 # ============================================================================
 
-GEOGRAPHIC_STOPWORDS = {
-    "france",
-    "ile",
-    "paris",
-    "lyon",
-    "marseille",
-    "toulouse",
-    "nice",
-    "nantes",
-    "strasbourg",
-    "montpellier",
-    "bordeaux",
-    "lille",
-    "rennes",
-    "reims",
-    "havre",
-    "saint",
-    "etienne",
-    "toulon",
-    "grenoble",
-    "dijon",
-    "angers",
-    "villeurbanne",
-    "region",
-    "rhone",
-    "alpes",
-    "aquitaine",
-    "bretagne",
-    "normandie",
-    "occitanie",
-    "hauts",
-    "nouvelle",
-    "grand",
-    "est",
-    "pays",
-    "loire",
-    "centre",
-    "val",
-    "cote",
-    "azur",
-    "ville",
-    "de",
-    "la",
-    "le",
-    "les",
-    "un",
-    "une",
-    "des",
-}
-
 TECH_SKILLS = {
     # Langages
     "python",
@@ -683,31 +637,23 @@ st.markdown(
 with st.spinner("🛸 INITIALISATION DU SYSTÈME NLP..."):
     df = load_offers_with_skills()
 
+# Version de la base, comparée à celle des résultats précalculés (clusterings, embeddings)
+db_version = current_snapshot_version()
+
 if df.empty:
     st.error("⚠️ ERREUR CRITIQUE : AUCUNE DONNÉE DISPONIBLE")
     st.stop()
 
-# Préparation des données
-df["text_corpus"] = df.apply(
-    lambda row: " ".join(
-        [
-            str(row.get("title", "")),
-            str(row.get("company_name", "")),
-            str(row.get("all_skills", "")),
-        ]
-    ).lower(),
-    axis=1,
-)
+# Préparation des données : texte nettoyé et tokens, calculés une fois par
+# version du corpus (cache Parquet à côté de la base, offres nouvelles seules)
+@st.cache_data(ttl=3600)
+def load_nlp_corpus(corpus_hash: str, _df: pd.DataFrame):
+    return preprocess_corpus(_df, GEOGRAPHIC_STOPWORDS, NLP_CORPUS_PATH)
 
 
-def clean_text_advanced(text):
-    text = re.sub(r"[^\w\s]", " ", str(text))
-    words = text.split()
-    words_filtered = [w for w in words if w not in GEOGRAPHIC_STOPWORDS and len(w) > 2]
-    return " ".join(words_filtered)
-
-
-df["text_clean"] = df["text_corpus"].apply(clean_text_advanced)
+nlp_corpus = load_nlp_corpus(content_hash(df), df)
+df["text_clean"] = nlp_corpus["text_clean"]
+df["tokens"] = nlp_corpus["tokens"]
 
 if "published_date" in df.columns:
     df["published_date"] = pd.to_datetime(df["published_date"], errors="coerce")
@@ -880,44 +826,35 @@ st.markdown("---")
 # EXTRACTION DES COMPÉTENCES
 # ============================================================================
 
-all_text = " ".join(filtered["text_clean"])
-skill_counts = {}
-
-for skill in TECH_SKILLS:
-    # Chercher le mot avec espaces autour (word boundary simple)
-    count = 0
-    skill_lower = skill.lower()
-    text_lower = " " + all_text.lower() + " "
-
-    # CAS SPÉCIAL pour R, C, Go (langages d'1-2 lettres)
-    if skill_lower in ["r", "c", "go"]:
-        # Pour R : chercher " r " (espace + majuscule + espace)
-        # Évite "for", "or", "programmer"
-        import re
-
-        if skill_lower == "r":
-            # Chercher R en MAJUSCULE uniquement
-            pattern = r"(?:^|\s)R(?:\s|$|,|\.)"
-            matches = re.findall(pattern, all_text)
-            count = len(matches)
-        elif skill_lower == "c":
-            # Chercher C en contexte (pas dans "recherche", "sciences")
-            pattern = r"(?:^|\s)C(?:\s|$|,|\.|/|\+)"
-            matches = re.findall(pattern, all_text)
-            count = len(matches)
-        elif skill_lower == "go":
-            # Go est OK avec la méthode normale
-            count = text_lower.count(" go ")
-            count += text_lower.count(" golang ")
-    else:
-        # Méthode normale pour les autres compétences
-        count += text_lower.count(" " + skill_lower + " ")
-        count += text_lower.count(" " + skill_lower + ".")
-        count += text_lower.count(" " + skill_lower + ",")
-        count += text_lower.count(" " + skill_lower + ";")
+# R et C (langages d'une lettre) : en MAJUSCULE uniquement, dans le texte
+# original (titre + description), pour éviter "or", "recherche", "sciences"...
+CASE_SENSITIVE_SKILLS = {
+    "r": r"(?<!\S)R(?=[\s,.]|$)",
+    "c": r"(?<!\S)C(?=[\s,./+]|$)",
+}
+
+
+@st.cache_resource
+def get_tech_skill_detector():
+    """Détecteur TECH_SKILLS compilé une fois par process"""
+    return SkillDetector(TECH_SKILLS, CASE_SENSITIVE_SKILLS)
+
+
+@st.cache_data(ttl=3600)
+def tag_tech_skills(clean_texts: pd.Series, original_texts: pd.Series):
+    """Matrice documents × TECH_SKILLS (occurrences) de tout le corpus"""
+    return get_tech_skill_detector().tag(clean_texts, original_texts)
+
+
+skill_detector = get_tech_skill_detector()
+skill_tags = tag_tech_skills(
+    df["text_clean"],
+    df["title"].fillna("").astype(str) + " " + df["description"].fillna("").astype(str),
+)
 
-    if count > 0:
-        skill_counts[skill] = count
+# Lignes de la matrice correspondant aux documents filtrés
+filtered_tags = skill_tags[df.index.get_indexer(filtered.index)]
+skill_counts = skill_detector.counts(filtered_tags).to_dict()
 
 # ============================================================================
 # SECTION 1 : TOP COMPÉTENCES AVEC 4 GRAPHIQUES DIFFÉRENTS
@@ -1066,67 +1003,18 @@ st.markdown(
 
 st.markdown('<div class="analysis-card">', unsafe_allow_html=True)
 
-sunburst_data = []
+# 3 premières compétences de chaque document, issues de la même matrice
+doc_skills = skill_detector.first_skills(filtered_tags, n=3)
+sunburst_data = pd.DataFrame({
+    "Région": filtered["region_name"].values[doc_skills["row"]],
+    "Contrat": filtered["contract_type"].values[doc_skills["row"]],
+    "Compétence": doc_skills["skill"].str.title().values,
+    "Value": 1,
+})
 
-for idx, row in filtered.iterrows():
-    region = row.get("region_name", "Zone Inconnue")
-    contract = row.get("contract_type", "Type Inconnu")
-    text = str(row.get("text_clean", "")).lower()
-
-    # 🔧 CORRECTION : Utiliser la même logique que skill_counts
-    doc_skills = []
-    text_with_spaces = " " + text + " "
-
-    for skill in TECH_SKILLS:
-        found = False
-        skill_lower = skill.lower()
-
-        # CAS SPÉCIAL pour R, C (langages d'1 lettre)
-        if skill_lower in ["r", "c"]:
-            import re
-
-            if skill_lower == "r":
-                # Chercher R MAJUSCULE uniquement dans le texte ORIGINAL
-                pattern = r"(?:^|\s)R(?:\s|$|,|\.)"
-                original_text = (
-                    str(row.get("title", "")) + " " + str(row.get("description", ""))
-                )
-                if re.search(pattern, original_text):
-                    found = True
-            elif skill_lower == "c":
-                pattern = r"(?:^|\s)C(?:\s|$|,|\.|/|\+)"
-                original_text = (
-                    str(row.get("title", "")) + " " + str(row.get("description", ""))
-                )
-                if re.search(pattern, original_text):
-                    found = True
-        else:
-            # Méthode normale : chercher avec espaces
-            if (
-                " " + skill_lower + " " in text_with_spaces
-                or " " + skill_lower + "." in text_with_spaces
-                or " " + skill_lower + "," in text_with_spaces
-            ):
-                found = True
-
-        if found:
-            doc_skills.append(skill)
-
-    if doc_skills:
-        for skill in doc_skills[:3]:
-            sunburst_data.append(
-                {
-                    "Région": region,
-                    "Contrat": contract,
-                    "Compétence": skill.title(),
-                    "Value": 1,
-                }
-            )
-
-if sunburst_data:
-    sunburst_df = pd.DataFrame(sunburst_data)
+if not sunburst_data.empty:
     sunburst_agg = (
-        sunburst_df.groupby(["Région", "Contrat", "Compétence"]).sum().reset_index()
+        sunburst_data.groupby(["Région", "Contrat", "Compétence"]).sum().reset_index()
     )
 
     fig_sunburst = px.sunburst(
@@ -1165,6 +1053,13 @@ st.markdown(
 
 st.markdown('<div class="analysis-card">', unsafe_allow_html=True)
 
+
+@st.cache_data(ttl=3600)
+def load_cluster_layouts(mtime):
+    """Clusterings + t-SNE précalculés (rechargés si le fichier change)"""
+    return read_cluster_layouts(CLUSTER_LAYOUTS_PATH)
+
+
 cluster_col1, cluster_col2 = st.columns([1, 3])
 
 with cluster_col1:
@@ -1178,28 +1073,64 @@ with cluster_col1:
 with cluster_col2:
     st.markdown("### 🎯 RÉSULTATS DU CLUSTERING")
 
-    # Préparation
-    sample_size = min(500, len(filtered))
-    sample_df = filtered.sample(n=sample_size, random_state=42)
-
-    tfidf_cluster = TfidfVectorizer(max_features=100, stop_words="english")
-    X_tfidf = tfidf_cluster.fit_transform(sample_df["text_clean"])
-
-    # Clustering selon algorithme choisi
-    if clustering_algo == "K-Means":
-        model = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        clusters = model.fit_predict(X_tfidf)
-    elif clustering_algo == "Hierarchical":
-        model = AgglomerativeClustering(n_clusters=n_clusters)
-        clusters = model.fit_predict(X_tfidf.toarray())
-    else:  # DBSCAN
-        model = DBSCAN(eps=0.5, min_samples=5)
-        clusters = model.fit_predict(X_tfidf.toarray())
-        n_clusters = len(set(clusters)) - (1 if -1 in clusters else 0)
-
-    # t-SNE
-    tsne = TSNE(n_components=2, random_state=42, perplexity=min(30, sample_size - 1))
-    X_tsne = tsne.fit_transform(X_tfidf.toarray())
+    cluster_layouts = load_cluster_layouts(
+        CLUSTER_LAYOUTS_PATH.stat().st_mtime if CLUSTER_LAYOUTS_PATH.exists() else None
+    )
+
+    if cluster_layouts is not None:
+        # Résultats précalculés sur toutes les offres (nlp_analysis/precompute_layouts.py)
+        layouts, layouts_version = cluster_layouts
+        positions = layouts.index.get_indexer(filtered["offer_key"])
+        sample_df = filtered[positions >= 0]
+        layout_rows = layouts.iloc[positions[positions >= 0]]
+
+        clusters = layout_rows[layout_column(clustering_algo, n_clusters)].to_numpy()
+        X_tsne = layout_rows[["x", "y"]].to_numpy()
+        if clustering_algo == "DBSCAN":
+            n_clusters = len(set(clusters)) - (1 if -1 in clusters else 0)
+
+        n_missing = len(filtered) - len(sample_df)
+        if layouts_version != db_version:
+            # Offres modifiées ou supprimées depuis le précalcul : clusters et
+            # positions ne reflètent plus la base, même pour les offres affichées
+            st.warning(
+                f"⚠️ Clusterings précalculés sur une version antérieure de la base "
+                f"({layouts_version or 'inconnue'}, version courante {db_version}) : "
+                f"{n_missing} offre(s) récente(s) non affichée(s). "
+                "Relancer `python nlp_analysis/precompute_layouts.py`."
+            )
+        elif n_missing:
+            st.caption(
+                f"ℹ️ {n_missing} offre(s) postérieure(s) au précalcul (version {layouts_version}) non affichée(s)"
+            )
+    else:
+        st.info(
+            "ℹ️ Clusterings non précalculés : calcul sur un échantillon de 500 offres. "
+            "Lancer `python nlp_analysis/precompute_layouts.py` pour toutes les offres."
+        )
+
+        # Préparation
+        sample_size = min(500, len(filtered))
+        sample_df = filtered.sample(n=sample_size, random_state=42)
+
+        tfidf_cluster = TfidfVectorizer(max_features=100, stop_words="english")
+        X_tfidf = tfidf_cluster.fit_transform(sample_df["text_clean"])
+
+        # Clustering selon algorithme choisi
+        if clustering_algo == "K-Means":
+            model = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+            clusters = model.fit_predict(X_tfidf)
+        elif clustering_algo == "Hierarchical":
+            model = AgglomerativeClustering(n_clusters=n_clusters)
+            clusters = model.fit_predict(X_tfidf.toarray())
+        else:  # DBSCAN
+            model = DBSCAN(eps=0.5, min_samples=5)
+            clusters = model.fit_predict(X_tfidf.toarray())
+            n_clusters = len(set(clusters)) - (1 if -1 in clusters else 0)
+
+        # t-SNE
+        tsne = TSNE(n_components=2, random_state=42, perplexity=min(30, sample_size - 1))
+        X_tsne = tsne.fit_transform(X_tfidf.toarray())
 
     tsne_df = pd.DataFrame(
         {
@@ -1408,11 +1339,6 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# Télécharger les ressources NLTK si nécessaire
-try:
-    nltk.data.find("tokenizers/punkt")
-except LookupError:
-    nltk.download("punkt", quiet=True)
 
 # ============================================================================
 # PRÉPARATION DES DONNÉES
@@ -1422,15 +1348,11 @@ except LookupError:
 @st.cache_resource
 def prepare_embeddings_data(df_input):
     """Prépare les données pour Word2Vec et Doc2Vec"""
-    corpus_tokens = []
-    for text in df_input["text_clean"]:
-        tokens = word_tokenize(text.lower())
-        tokens = [t for t in tokens if len(t) >= 3 and t.isalpha()]
-        if tokens:
-            corpus_tokens.append(tokens)
+    corpus_tokens = [list(tokens) for tokens in df_input["tokens"] if len(tokens)]
 
+    offer_keys = [str(key) for key, tokens in zip(df_input["offer_key"], df_input["tokens"]) if len(tokens)]
     documents = [
-        TaggedDocument(words=tokens, tags=[i]) for i, tokens in enumerate(corpus_tokens)
+        TaggedDocument(words=tokens, tags=[key]) for key, tokens in zip(offer_keys, corpus_tokens)
     ]
 
     return corpus_tokens, documents
@@ -1472,43 +1394,106 @@ with embed_col2:
 
 
 @st.cache_resource
-def train_word2vec(corpus, vector_size, window, min_count):
+def load_pretrained_embedding(kind, vector_size, window, min_count, corpus_version):
+    """Modèle pré-entraîné (nlp_analysis/embeddings.py), vecteurs mappés en mémoire"""
+    return load_embedding_model(kind, vector_size, window, min_count, corpus_version)
+
+
+# Repli si aucun modèle pré-entraîné ne correspond : entraînement sur les
+# offres filtrées, mis en cache par (offres, hyperparamètres)
+@st.cache_resource
+def train_word2vec(corpus_key, _corpus, vector_size, window, min_count):
     model = Word2Vec(
-        sentences=corpus,
+        sentences=_corpus,
         vector_size=vector_size,
         window=window,
         min_count=min_count,
-        epochs=20,
-        seed=42,
+        epochs=EMBEDDING_EPOCHS["word2vec"],
+        seed=EMBEDDING_SEED,
         workers=4,
     )
     return model
 
 
 @st.cache_resource
-def train_doc2vec(documents, vector_size, window, min_count):
+def train_doc2vec(corpus_key, _documents, vector_size, window, min_count):
     model = Doc2Vec(
-        documents=documents,
+        documents=_documents,
         vector_size=vector_size,
         window=window,
         min_count=min_count,
-        epochs=40,
-        seed=42,
+        epochs=EMBEDDING_EPOCHS["doc2vec"],
+        seed=EMBEDDING_SEED,
         workers=4,
     )
     return model
 
 
-# Entraînement
-with st.spinner("🧠 ENTRAÎNEMENT WORD2VEC EN COURS..."):
-    model_w2v = train_word2vec(corpus_tokens, w2v_size, w2v_window, w2v_min_count)
+corpus_key = content_hash(filtered, ("offer_key",) + TEXT_COLUMNS)
+pretrained_w2v = load_pretrained_embedding("word2vec", w2v_size, w2v_window, w2v_min_count, db_version)
+pretrained_d2v = load_pretrained_embedding("doc2vec", d2v_size, d2v_window, d2v_min_count, db_version)
 
-with st.spinner("🧠 ENTRAÎNEMENT DOC2VEC EN COURS..."):
-    model_d2v = train_doc2vec(doc_tagged, d2v_size, d2v_window, d2v_min_count)
+if pretrained_w2v is not None:
+    model_w2v, _ = pretrained_w2v
+else:
+    with st.spinner("🧠 ENTRAÎNEMENT WORD2VEC EN COURS..."):
+        model_w2v = train_word2vec(corpus_key, corpus_tokens, w2v_size, w2v_window, w2v_min_count)
+
+if pretrained_d2v is not None:
+    model_d2v, _ = pretrained_d2v
+else:
+    with st.spinner("🧠 ENTRAÎNEMENT DOC2VEC EN COURS..."):
+        model_d2v = train_doc2vec(corpus_key, doc_tagged, d2v_size, d2v_window, d2v_min_count)
+
+if pretrained_w2v is None or pretrained_d2v is None:
+    st.info(
+        "ℹ️ Modèle pré-entraîné absent pour ces paramètres : entraînement sur les offres filtrées. "
+        "Pour l'éviter : `python nlp_analysis/embeddings.py --sizes ... --windows ... --min-counts ...`"
+    )
+
+# Modèle entraîné sur une version antérieure de la base : utilisé quand même
+# (les offres récentes sont inférées plus bas), mais signalé
+stale_models = [
+    name for name, pretrained in (("Word2Vec", pretrained_w2v), ("Doc2Vec", pretrained_d2v))
+    if pretrained is not None and pretrained[1]["stale"]
+]
+if stale_models:
+    st.warning(
+        f"⚠️ {' et '.join(stale_models)} pré-entraîné(s) sur une version antérieure de la base "
+        f"(version courante {db_version}) : vocabulaire et vecteurs ne couvrent pas les dernières offres. "
+        "Relancer `python nlp_analysis/embeddings.py`."
+    )
 
 vocab_size_w2v = len(model_w2v.wv)
 vocab_size_d2v = len(model_d2v.dv)
 
+
+@st.cache_resource
+def build_doc_index(model_key, _model):
+    """Index de similarité (IVF) des vecteurs Doc2Vec, par offer_key"""
+    keys = [int(tag) for tag in _model.dv.index_to_key]
+    return VectorIndex.build(keys, _model.dv.vectors)
+
+
+d2v_model_key = (
+    f"{d2v_size}-{d2v_window}-{d2v_min_count}-"
+    f"{pretrained_d2v[1]['trained_at'] if pretrained_d2v is not None else corpus_key}"
+)
+doc_index = build_doc_index(d2v_model_key, model_d2v)
+
+# Offres absentes du modèle (contribuées après l'entraînement) : vecteurs
+# inférés puis insérés dans l'index, sans le reconstruire
+new_docs = [
+    (key, tokens)
+    for key, tokens in zip(filtered["offer_key"], filtered["tokens"])
+    if len(tokens) and key not in doc_index
+]
+if new_docs:
+    doc_index.add(
+        [key for key, _ in new_docs],
+        np.vstack([model_d2v.infer_vector(list(tokens)) for _, tokens in new_docs]),
+    )
+
 # Préparer vocabulaire
 word_freq = Counter()
 for doc in corpus_tokens:
@@ -2135,11 +2120,13 @@ doc_col1, doc_col2 = st.columns(2)
 with doc_col1:
     st.markdown("### 🔍 DOCUMENTS SIMILAIRES")
 
-    doc_indices = list(range(min(300, vocab_size_d2v)))
+    # Documents indexés par offer_key (modèle pré-entraîné ou non)
+    filtered_docs = filtered.set_index("offer_key")
+    doc_indices = [key for key in filtered_docs.index if key in doc_index][:300]
     selected_doc_idx = st.selectbox(
         "Document cible",
         options=doc_indices,
-        format_func=lambda x: f"Doc {x}: {filtered.iloc[x]['title'][:45]}...",
+        format_func=lambda x: f"Doc {x}: {filtered_docs.loc[x, 'title'][:45]}...",
         key="d2v_doc",
     )
 
@@ -2147,28 +2134,32 @@ with doc_col1:
 
     if st.button("🔍 RECHERCHER DOCUMENTS SIMILAIRES", use_container_width=True):
         try:
-            similar_docs = model_d2v.dv.most_similar(selected_doc_idx, topn=top_n_docs)
+            similar_docs = doc_index.search(
+                doc_index.vector(selected_doc_idx),
+                k=top_n_docs,
+                restrict=filtered_docs.index,
+                exclude=[selected_doc_idx],
+            )[0]
 
             st.markdown(f"#### 📄 Document source (#{selected_doc_idx})")
-            st.markdown(f"**Titre:** {filtered.iloc[selected_doc_idx]['title']}")
-            st.markdown(f"**Région:** {filtered.iloc[selected_doc_idx]['region_name']}")
+            st.markdown(f"**Titre:** {filtered_docs.loc[selected_doc_idx, 'title']}")
+            st.markdown(f"**Région:** {filtered_docs.loc[selected_doc_idx, 'region_name']}")
             st.markdown(
-                f"**Contrat:** {filtered.iloc[selected_doc_idx]['contract_type']}"
+                f"**Contrat:** {filtered_docs.loc[selected_doc_idx, 'contract_type']}"
             )
             st.markdown("---")
 
             similar_docs_data = []
             for doc_id, score in similar_docs:
-                if doc_id < len(filtered):
-                    similar_docs_data.append(
-                        {
-                            "Index": doc_id,
-                            "Score": score,
-                            "Titre": filtered.iloc[doc_id]["title"][:60],
-                            "Région": filtered.iloc[doc_id]["region_name"],
-                            "Contrat": filtered.iloc[doc_id]["contract_type"],
-                        }
-                    )
+                similar_docs_data.append(
+                    {
+                        "Index": doc_id,
+                        "Score": score,
+                        "Titre": filtered_docs.loc[doc_id, "title"][:60],
+                        "Région": filtered_docs.loc[doc_id, "region_name"],
+                        "Contrat": filtered_docs.loc[doc_id, "contract_type"],
+                    }
+                )
 
             similar_docs_df = pd.DataFrame(similar_docs_data)
 
@@ -2231,26 +2222,25 @@ with doc_col2:
     if st.button("🔍 ANALYSER LE TEXTE", use_container_width=True):
         if new_text.strip():
             try:
-                new_tokens = word_tokenize(new_text.lower())
-                new_tokens = [t for t in new_tokens if len(t) >= 3 and t.isalpha()]
+                # Même prétraitement que les documents d'entraînement
+                new_tokens = prepare_texts(pd.Series([new_text.lower()]), GEOGRAPHIC_STOPWORDS)["tokens"].iloc[0]
 
                 new_vector = model_d2v.infer_vector(new_tokens)
-                similar_to_new = model_d2v.dv.most_similar([new_vector], topn=10)
+                similar_to_new = doc_index.search(new_vector, k=10, restrict=filtered_docs.index)[0]
 
                 st.success("✅ ANALYSE TERMINÉE !")
 
                 new_similar_data = []
                 for doc_id, score in similar_to_new:
-                    if doc_id < len(filtered):
-                        new_similar_data.append(
-                            {
-                                "Index": doc_id,
-                                "Score": f"{score:.4f}",
-                                "Titre": filtered.iloc[doc_id]["title"][:55],
-                                "Région": filtered.iloc[doc_id]["region_name"],
-                                "Contrat": filtered.iloc[doc_id]["contract_type"],
-                            }
-                        )
+                    new_similar_data.append(
+                        {
+                            "Index": doc_id,
+                            "Score": f"{score:.4f}",
+                            "Titre": filtered_docs.loc[doc_id, "title"][:55],
+                            "Région": filtered_docs.loc[doc_id, "region_name"],
+                            "Contrat": filtered_docs.loc[doc_id, "contract_type"],
+                        }
+                    )
 
                 new_similar_df = pd.DataFrame(new_similar_data)
                 st.dataframe(new_similar_df, use_container_width=True, hide_index=True)
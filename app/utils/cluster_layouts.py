@@ -0,0 +1,43 @@
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+
+# Algorithmes proposés par la page Intelligence -> préfixe de colonne
+CLUSTER_ALGORITHMS = {
+    'K-Means': 'kmeans',
+    'Hierarchical': 'hierarchical',
+    'DBSCAN': 'dbscan',
+}
+
+# Valeurs de k précalculées (curseur "Nombre de Clusters" de la page)
+CLUSTER_K_RANGE = range(3, 11)
+
+
+def layout_column(algorithm: str, n_clusters: int) -> str:
+    """Colonne des labels d'un algorithme (DBSCAN ne dépend pas de k)"""
+    prefix = CLUSTER_ALGORITHMS[algorithm]
+    return prefix if prefix == 'dbscan' else f"{prefix}_{n_clusters}"
+
+
+def read_cluster_layouts(path: Path) -> Optional[Tuple[pd.DataFrame, str]]:
+    """
+    Charge les clusterings et la projection t-SNE précalculés
+    (nlp_analysis/precompute_layouts.py).
+
+    Returns:
+        (DataFrame indexé par offer_key : x, y et une colonne de labels par
+        algorithme et k ; version de la base au moment du calcul), ou None
+        si le fichier est absent
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    table = pq.read_table(path, memory_map=True)
+    metadata = table.schema.metadata or {}
+    version = metadata.get(b'dataset_version', b'').decode()
+
+    return table.to_pandas().set_index('offer_key'), version
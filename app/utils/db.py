@@ -1,27 +1,47 @@
+import re
 import sqlite3
 import pandas as pd
 from pathlib import Path
 import streamlit as st
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import sys
 
 # Ajouter le parent au path pour import config
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import DATABASE_PATH
+sys.path.insert(0, str(Path(__file__).parent))
+from config import DATABASE_PATH, SNAPSHOT_PATH, PROFILE_NAMES
+from sqlite_pool import get_pool
+from snapshot import read_offers_snapshot, snapshot_version
+from skill_matrix import SkillMatrix
+
+
+def build_fts_query(search_text: str) -> str:
+    """
+    Convertit un texte libre en requête FTS5 : chaque mot devient un
+    préfixe ("pyth"*), tous les mots doivent être présents.
+    
+    Returns:
+        Requête MATCH, ou '' si le texte ne contient aucun mot
+    """
+    words = re.findall(r"\w+", search_text or "")
+    return " ".join(f'"{word}"*' for word in words)
 
 
 class DatabaseManager:
     """Gestionnaire de connexion à la base de données"""
     
-    def __init__(self, db_path: Path = DATABASE_PATH):
+    def __init__(self, db_path: Path = DATABASE_PATH, pragmas: Dict[str, Any] = None):
         self.db_path = db_path
         
         if not self.db_path.exists():
             raise FileNotFoundError(f"Base de données introuvable: {self.db_path}")
+        
+        # Connexions partagées (lecture par thread + écrivain unique)
+        self.pool = get_pool(self.db_path, pragmas)
     
     def get_connection(self):
-        """Retourne une connexion à la base de données"""
-        return sqlite3.connect(self.db_path)
+        """Retourne une nouvelle connexion configurée (à fermer par l'appelant)"""
+        return self.pool.connect()
     
     def execute_query(self, query: str, params: tuple = None) -> pd.DataFrame:
         """
@@ -34,15 +54,10 @@ class DatabaseManager:
         Returns:
             DataFrame avec les résultats
         """
-        conn = self.get_connection()
-        try:
-            if params:
-                df = pd.read_sql_query(query, conn, params=params)
-            else:
-                df = pd.read_sql_query(query, conn)
-            return df
-        finally:
-            conn.close()
+        conn = self.pool.reader()
+        if params:
+            return pd.read_sql_query(query, conn, params=params)
+        return pd.read_sql_query(query, conn)
     
     def execute_write(self, query: str, params: tuple = None) -> int:
         """
@@ -51,17 +66,13 @@ class DatabaseManager:
         Returns:
             Nombre de lignes affectées
         """
-        conn = self.get_connection()
-        try:
+        with self.pool.writer() as conn:
             cursor = conn.cursor()
             if params:
                 cursor.execute(query, params)
             else:
                 cursor.execute(query)
-            conn.commit()
             return cursor.rowcount
-        finally:
-            conn.close()
     
     # ========================================================================
     # REQUÊTES MÉTIER
@@ -105,7 +116,7 @@ class DatabaseManager:
         return self.execute_query(query)
     
     def get_offers_with_skills(self) -> pd.DataFrame:
-        """Récupère les offres avec leurs compétences agrégées"""
+        """Récupère les offres avec leurs compétences agrégées (fact_offer_skill_agg)"""
         query = """
             SELECT 
                 fo.offer_key,
@@ -119,18 +130,14 @@ class DatabaseManager:
                 dr.region_name,
                 dc.company_name,
                 dct.contract_type,
-                GROUP_CONCAT(CASE WHEN ds.skill_type = 'competences' 
-                             THEN ds.skill_name END) as competences,
-                GROUP_CONCAT(CASE WHEN ds.skill_type = 'savoir_etre' 
-                             THEN ds.skill_name END) as savoir_etre,
-                GROUP_CONCAT(ds.skill_name) as all_skills
+                agg.competences,
+                agg.savoir_etre,
+                agg.all_skills
             FROM fact_offers fo
-            LEFT JOIN fact_offer_skill fos ON fo.offer_key = fos.offer_key
-            LEFT JOIN dim_skill ds ON fos.skill_key = ds.skill_key
+            LEFT JOIN fact_offer_skill_agg agg ON fo.offer_key = agg.offer_key
             LEFT JOIN dim_region dr ON fo.region_key = dr.region_key
             LEFT JOIN dim_company dc ON fo.company_key = dc.company_key
             LEFT JOIN dim_contract dct ON fo.contract_key = dct.contract_key
-            GROUP BY fo.offer_key
         """
         return self.execute_query(query)
     
@@ -184,6 +191,73 @@ class DatabaseManager:
             return df.iloc[0].to_dict()
         return {}
     
+    def _offer_filters(self,
+                       regions: List[str] = None,
+                       skills: List[str] = None,
+                       contract_types: List[str] = None,
+                       remote: str = None,
+                       search_text: str = None) -> Tuple[str, List[str], list, bool]:
+        """
+        Jointures et conditions SQL communes aux recherches d'offres
+        (alias : fo, dr, dc, dct, ds_src, et m pour la recherche texte).
+        
+        Returns:
+            (jointures, conditions, paramètres, recherche texte active)
+        """
+        joins = """
+            LEFT JOIN dim_region dr ON fo.region_key = dr.region_key
+            LEFT JOIN dim_company dc ON fo.company_key = dc.company_key
+            LEFT JOIN dim_contract dct ON fo.contract_key = dct.contract_key
+            LEFT JOIN dim_source ds_src ON fo.source_key = ds_src.source_key
+        """
+        conditions = []
+        params = []
+        
+        # Recherche texte (index FTS5, m.rank = score BM25)
+        fts_query = build_fts_query(search_text)
+        if fts_query:
+            joins += """
+            JOIN (
+                SELECT rowid AS offer_key, bm25(offers_fts) AS rank
+                FROM offers_fts
+                WHERE offers_fts MATCH ?
+            ) m ON m.offer_key = fo.offer_key
+            """
+            params.append(fts_query)
+        
+        # Filtre régions
+        if regions and len(regions) > 0 and 'Toutes' not in regions:
+            placeholders = ','.join(['?' for _ in regions])
+            conditions.append(f"dr.region_name IN ({placeholders})")
+            params.extend(regions)
+        
+        # Filtre compétences
+        if skills and len(skills) > 0:
+            # Au moins une compétence doit matcher
+            placeholders = ','.join(['?' for _ in skills])
+            conditions.append(f"""
+                EXISTS (
+                    SELECT 1 FROM fact_offer_skill fos
+                    JOIN dim_skill ds ON fos.skill_key = ds.skill_key
+                    WHERE fos.offer_key = fo.offer_key
+                    AND ds.skill_name IN ({placeholders})
+                )
+            """)
+            params.extend(skills)
+        
+        # Filtre contrats
+        if contract_types and len(contract_types) > 0 and 'Tous' not in contract_types:
+            placeholders = ','.join(['?' for _ in contract_types])
+            conditions.append(f"dct.contract_type IN ({placeholders})")
+            params.extend(contract_types)
+        
+        # Filtre télétravail
+        if remote and remote != 'Tous':
+            conditions.append("fo.remote = ?")
+            params.append(remote)
+        
+        return joins, conditions, params, bool(fts_query)
+    
     def search_offers(self, 
                      regions: List[str] = None,
                      skills: List[str] = None,
@@ -198,13 +272,19 @@ class DatabaseManager:
             skills: Liste de compétences
             contract_types: Liste de types de contrat
             remote: Télétravail (Oui/Non/Hybride)
-            search_text: Texte libre (titre ou description)
+            search_text: Texte libre (titre, description, entreprise ou
+                compétences), recherché par préfixe dans offers_fts
         
         Returns:
-            DataFrame avec offres filtrées
+            DataFrame avec offres filtrées, triées par pertinence (BM25)
+            si search_text est fourni, sinon par date d'ajout
         """
-        query = """
-            SELECT DISTINCT
+        joins, conditions, params, ranked = self._offer_filters(
+            regions, skills, contract_types, remote, search_text
+        )
+        
+        query = f"""
+            SELECT 
                 fo.offer_key,
                 fo.uid,
                 fo.title,
@@ -217,50 +297,134 @@ class DatabaseManager:
                 dct.contract_type,
                 ds_src.source_name
             FROM fact_offers fo
-            LEFT JOIN dim_region dr ON fo.region_key = dr.region_key
-            LEFT JOIN dim_company dc ON fo.company_key = dc.company_key
-            LEFT JOIN dim_contract dct ON fo.contract_key = dct.contract_key
-            LEFT JOIN dim_source ds_src ON fo.source_key = ds_src.source_key
-            LEFT JOIN fact_offer_skill fos ON fo.offer_key = fos.offer_key
-            LEFT JOIN dim_skill ds ON fos.skill_key = ds.skill_key
-            WHERE 1=1
+            {joins}
+            WHERE {' AND '.join(conditions) or '1=1'}
         """
         
-        params = []
+        if ranked:
+            query += " ORDER BY m.rank"
+        else:
+            query += " ORDER BY fo.added_at DESC"
         
-        # Filtre régions
-        if regions and len(regions) > 0 and 'Toutes' not in regions:
-            placeholders = ','.join(['?' for _ in regions])
-            query += f" AND dr.region_name IN ({placeholders})"
-            params.extend(regions)
+        return self.execute_query(query, tuple(params) if params else None)
+    
+    def get_offers_page(self,
+                        regions: List[str] = None,
+                        skills: List[str] = None,
+                        contract_types: List[str] = None,
+                        remote: str = None,
+                        search_text: str = None,
+                        page_size: int = 20,
+                        after: Tuple = None) -> Dict[str, Any]:
+        """
+        Une page d'offres filtrées, paginée par clé (keyset) : tri par
+        (added_at, offer_key) décroissants, ou par (score BM25, offer_key)
+        si search_text est fourni.
         
-        # Filtre compétences
-        if skills and len(skills) > 0:
-            # Au moins une compétence doit matcher
-            placeholders = ','.join(['?' for _ in skills])
-            query += f" AND ds.skill_name IN ({placeholders})"
-            params.extend(skills)
+        Args:
+            page_size: Nombre d'offres par page
+            after: Curseur 'next_cursor' de la page précédente
+                (None = première page)
         
-        # Filtre contrats
-        if contract_types and len(contract_types) > 0 and 'Tous' not in contract_types:
-            placeholders = ','.join(['?' for _ in contract_types])
-            query += f" AND dct.contract_type IN ({placeholders})"
-            params.extend(contract_types)
+        Returns:
+            {'offers': DataFrame de la page,
+             'next_cursor': curseur de la page suivante (None si dernière),
+             'summary': compteurs sur l'ensemble filtré (voir _count_offers)}
+        """
+        joins, conditions, params, ranked = self._offer_filters(
+            regions, skills, contract_types, remote, search_text
+        )
         
-        # Filtre télétravail
-        if remote and remote != 'Tous':
-            query += " AND fo.remote = ?"
-            params.append(remote)
+        if ranked:
+            sort_key = "m.rank"
+            order_by = "m.rank, fo.offer_key"
+            after_condition = "(m.rank, fo.offer_key) > (?, ?)"
+        else:
+            sort_key = "fo.added_at"
+            order_by = "fo.added_at DESC, fo.offer_key DESC"
+            after_condition = "(fo.added_at, fo.offer_key) < (?, ?)"
+        
+        page_conditions = list(conditions)
+        page_params = list(params)
+        if after is not None:
+            page_conditions.append(after_condition)
+            page_params.extend(after)
+        
+        # Une ligne de plus pour savoir s'il existe une page suivante
+        query = f"""
+            SELECT 
+                fo.offer_key,
+                fo.uid,
+                fo.title,
+                fo.location,
+                fo.salary,
+                fo.remote,
+                fo.description,
+                fo.source_url,
+                fo.added_at,
+                dr.region_name,
+                dc.company_name,
+                dct.contract_type,
+                agg.all_skills,
+                {sort_key} AS sort_key
+            FROM fact_offers fo
+            {joins}
+            LEFT JOIN fact_offer_skill_agg agg ON fo.offer_key = agg.offer_key
+            WHERE {' AND '.join(page_conditions) or '1=1'}
+            ORDER BY {order_by}
+            LIMIT ?
+        """
+        page_params.append(page_size + 1)
         
-        # Recherche texte
-        if search_text:
-            query += " AND (fo.title LIKE ? OR fo.description LIKE ?)"
-            search_pattern = f"%{search_text}%"
-            params.extend([search_pattern, search_pattern])
+        offers = self.execute_query(query, tuple(page_params))
         
-        query += " ORDER BY fo.added_at DESC"
+        next_cursor = None
+        if len(offers) > page_size:
+            offers = offers.iloc[:page_size]
+            last = offers.iloc[-1]
+            next_cursor = (last['sort_key'], int(last['offer_key']))
         
-        return self.execute_query(query, tuple(params) if params else None)
+        return {
+            'offers': offers.drop(columns='sort_key'),
+            'next_cursor': next_cursor,
+            'summary': self._count_offers(joins, conditions, params)
+        }
+    
+    def _count_offers(self, joins: str, conditions: List[str], params: list) -> Dict[str, int]:
+        """Compteurs {'total', 'companies', 'regions', 'remote'} sur l'ensemble filtré"""
+        query = f"""
+            SELECT 
+                COUNT(*) as total,
+                COUNT(DISTINCT fo.company_key) as companies,
+                COUNT(DISTINCT fo.region_key) as regions,
+                COALESCE(SUM(fo.remote IN ('yes', 'oui', 'hybrid')), 0) as remote
+            FROM fact_offers fo
+            {joins}
+            WHERE {' AND '.join(conditions) or '1=1'}
+        """
+        row = self.execute_query(query, tuple(params) if params else None).iloc[0]
+        return {key: int(value) for key, value in row.items()}
+    
+    def get_filter_options(self) -> Dict[str, List[str]]:
+        """Régions et types de contrat présents dans les offres"""
+        regions = self.execute_query("""
+            SELECT DISTINCT dr.region_name
+            FROM fact_offers fo
+            JOIN dim_region dr ON fo.region_key = dr.region_key
+            WHERE dr.region_name IS NOT NULL
+            ORDER BY dr.region_name
+        """)
+        contracts = self.execute_query("""
+            SELECT DISTINCT dct.contract_type
+            FROM fact_offers fo
+            JOIN dim_contract dct ON fo.contract_key = dct.contract_key
+            WHERE dct.contract_type IS NOT NULL
+            ORDER BY dct.contract_type
+        """)
+        return {
+            'regions': regions['region_name'].tolist(),
+            'contract_types': contracts['contract_type'].tolist()
+        }
     
     def get_offer_details(self, offer_key: int) -> Dict[str, Any]:
         """Récupère les détails complets d'une offre"""
@@ -313,6 +477,61 @@ class DatabaseManager:
         query = "SELECT COUNT(*) as count FROM fact_offers WHERE uid = ?"
         result = self.execute_query(query, (uid,))
         return result.iloc[0]['count'] > 0
+    
+    # ========================================================================
+    # PROFILS ET CLUSTERS (fact_offer_profile)
+    # ========================================================================
+    
+    def get_profile_distribution(self, model_version: str) -> pd.DataFrame:
+        """
+        Distribution des profils d'une version du modèle de topics (même
+        forme que nlp_utils.get_topic_distribution : topic_id, count,
+        percentage, topic_name).
+        """
+        query = """
+            SELECT dominant_profile AS topic_id, COUNT(*) AS count
+            FROM fact_offer_profile
+            WHERE model_version = ?
+            GROUP BY dominant_profile
+            ORDER BY dominant_profile
+        """
+        
+        df = self.execute_query(query, (model_version,))
+        df['percentage'] = (df['count'] / df['count'].sum()) * 100
+        df['topic_name'] = df['topic_id'].map(PROFILE_NAMES)
+        return df
+    
+    def get_representative_offers(self, model_version: str, topic_id: int, n: int = 5) -> pd.DataFrame:
+        """Offres les plus caractéristiques d'un profil (top N par probabilité, via l'index)"""
+        query = """
+            SELECT
+                fo.offer_key,
+                fo.title,
+                dc.company_name,
+                dr.region_name,
+                p.dominant_profile,
+                p.profile_probability
+            FROM fact_offer_profile p
+            JOIN fact_offers fo ON p.offer_key = fo.offer_key
+            LEFT JOIN dim_company dc ON fo.company_key = dc.company_key
+            LEFT JOIN dim_region dr ON fo.region_key = dr.region_key
+            WHERE p.model_version = ? AND p.dominant_profile = ?
+            ORDER BY p.profile_probability DESC
+            LIMIT ?
+        """
+        
+        return self.execute_query(query, (model_version, topic_id, n))
+    
+    def get_cluster_coordinates(self, model_version: str) -> pd.DataFrame:
+        """Cluster et coordonnées 2D des offres pour une version du modèle de clustering"""
+        query = """
+            SELECT offer_key, cluster_id, coord_x, coord_y
+            FROM fact_offer_profile
+            WHERE model_version = ?
+            ORDER BY offer_key
+        """
+        
+        return self.execute_query(query, (model_version,))
 
 
 
@@ -332,13 +551,83 @@ def load_all_offers():
 
 @st.cache_data(ttl=3600)
 def load_offers_with_skills():
-    """Charge offres avec compétences (avec cache 1h)"""
+    """Charge offres avec compétences : snapshot Parquet s'il est à jour, sinon SQL (avec cache 1h)"""
+    db = get_db_manager()
+    # Colonnes en texte : les pages filtrent, groupent et affichent ces valeurs
+    df = read_offers_snapshot(SNAPSHOT_PATH, db.pool.reader())
+    if df is None:
+        df = db.get_offers_with_skills()
+    return df
+
+
+@st.cache_resource(ttl=3600, max_entries=1)
+def _load_skill_matrix(version: str):
+    db = get_db_manager()
+    return SkillMatrix.from_connection(db.pool.reader())
+
+
+def load_skill_matrix():
+    """
+    Matrice creuse offres × compétences partagée par toutes les pages
+    (cache 1h, reconstruite dès que la version de la base change : une
+    contribution la rend obsolète même si seul st.cache_data est vidé)
+    """
+    return _load_skill_matrix(current_snapshot_version())
+
+
+def current_snapshot_version():
+    """Version courante de la base (non cachée), à comparer aux artefacts précalculés"""
     db = get_db_manager()
-    return db.get_offers_with_skills()
+    return snapshot_version(db.pool.reader())
 
 
 @st.cache_data(ttl=3600)
 def load_global_stats():
     """Charge stats globales (avec cache 1h)"""
     db = get_db_manager()
-    return db.get_global_stats()
\ No newline at end of file
+    return db.get_global_stats()
+
+
+@st.cache_data(ttl=300)
+def load_offers_page(regions: List[str] = None,
+                     contract_types: List[str] = None,
+                     search_text: str = None,
+                     page_size: int = 20,
+                     after: Tuple = None):
+    """Page d'offres filtrées côté SQL (avec cache 5 min)"""
+    db = get_db_manager()
+    return db.get_offers_page(
+        regions=regions,
+        contract_types=contract_types,
+        search_text=search_text,
+        page_size=page_size,
+        after=after
+    )
+
+
+@st.cache_data(ttl=300)
+def load_profile_distribution(model_version: str):
+    """Distribution des profils d'un modèle de topics (avec cache 5 min)"""
+    db = get_db_manager()
+    return db.get_profile_distribution(model_version)
+
+
+@st.cache_data(ttl=300)
+def load_representative_offers(model_version: str, topic_id: int, n: int = 5):
+    """Offres représentatives d'un profil (avec cache 5 min)"""
+    db = get_db_manager()
+    return db.get_representative_offers(model_version, topic_id, n)
+
+
+@st.cache_data(ttl=300)
+def load_cluster_coordinates(model_version: str):
+    """Clusters et coordonnées 2D d'un modèle de clustering (avec cache 5 min)"""
+    db = get_db_manager()
+    return db.get_cluster_coordinates(model_version)
+
+
+@st.cache_data(ttl=3600)
+def load_filter_options():
+    """Valeurs des filtres de recherche (avec cache 1h)"""
+    db = get_db_manager()
+    return db.get_filter_options()
@@ -1,133 +1,175 @@
 import sqlite3
 import pandas as pd
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import hashlib
 import sys
 
 # Import du DatabaseManager existant
 sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
 from config import DATABASE_PATH
+from sqlite_pool import get_pool
+from offer_profiles import OfferProfiler, get_offer_profiler
+from skill_aggregates import SKILL_AGG_REFRESH_QUERY
 
 
 class ContributionManager:
     """Gestionnaire d'insertion pour les contributions"""
     
-    def __init__(self, db_path: Path = DATABASE_PATH):
+    def __init__(self, db_path: Path = DATABASE_PATH, pragmas: Dict[str, Any] = None,
+                 profiler: Optional[OfferProfiler] = None):
+        """
+        Args:
+            db_path: Base SQLite des offres
+            pragmas: Profil de PRAGMA du pool
+            profiler: Inférence profil / cluster des offres insérées
+                (modèles nlp_analysis sauvegardés par défaut)
+        """
         self.db_path = db_path
         
         if not self.db_path.exists():
             raise FileNotFoundError(f"Base de données introuvable: {self.db_path}")
+        
+        # Même pool que DatabaseManager : un seul écrivain par base
+        self.pool = get_pool(self.db_path, pragmas)
+        self.profiler = profiler or get_offer_profiler()
     
     def get_connection(self):
-        """Retourne une connexion à la base de données"""
-        return sqlite3.connect(self.db_path)
+        """Retourne une nouvelle connexion configurée (à fermer par l'appelant)"""
+        return self.pool.connect()
     
 
     def insert_offers(self, offers: List[Dict[str, Any]]) -> Tuple[int, int, str]:
        
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         inserted_count = 0
         duplicate_count = 0
+        inserted_keys = []
         
         try:
-            for offer in offers:
-                # Générer UID unique
-                uid = self.generate_uid(offer)
-                
-                # Vérifier si l'offre existe déjà
-                cursor.execute("SELECT COUNT(*) FROM fact_offers WHERE uid = ?", (uid,))
-                exists = cursor.fetchone()[0] > 0
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
                 
-                if exists:
-                    duplicate_count += 1
-                    continue
-                
-                # Récupérer ou créer les dimensions
-                source_key = self._get_or_create_source(cursor, offer.get('source', 'manual'))
-                region_key = self._get_or_create_region(cursor, offer.get('region_name', 'Unknown'))
-                company_key = self._get_or_create_company(cursor, offer.get('company_name', 'Unknown'))
-                contract_key = self._get_or_create_contract(cursor, offer.get('contract_type', 'Unknown'))
-                date_key = self._get_or_create_date(cursor, datetime.now())
-                
-                # Générer offer_id (identifiant unique de l'offre source)
-                offer_id = offer.get('offer_id') or offer.get('uid') or uid
-                
-                # Insérer l'offre dans fact_offers
-                cursor.execute("""
-                    INSERT INTO fact_offers (
-                        offer_id, uid, title, location, salary, remote, description, source_url,
-                        skills_count, competences_count, savoir_etre_count,
-                        source_key, region_key, company_key, contract_key, date_key,
-                        added_by, added_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    offer_id,
-                    uid,
-                    offer.get('title', ''),
-                    offer.get('location', ''),
-                    offer.get('salary', ''),
-                    offer.get('remote', 'no'),
-                    offer.get('description', ''),
-                    offer.get('url', ''),
-                    0,  # skills_count (sera mis à jour après)
-                    0,  # competences_count
-                    0,  # savoir_etre_count
-                    source_key,
-                    region_key,
-                    company_key,
-                    contract_key,
-                    date_key,
-                    'streamlit_app',
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                ))
-                
-                offer_key = cursor.lastrowid
-                
-                # Insérer les compétences si présentes
-                if offer.get('all_skills'):
-                    skills_added = self._insert_skills(cursor, offer_key, offer['all_skills'])
+                for offer in offers:
+                    # Générer UID unique
+                    uid = self.generate_uid(offer)
+                    
+                    # Vérifier si l'offre existe déjà
+                    cursor.execute("SELECT COUNT(*) FROM fact_offers WHERE uid = ?", (uid,))
+                    exists = cursor.fetchone()[0] > 0
+                    
+                    if exists:
+                        duplicate_count += 1
+                        continue
                     
-                    # Mettre à jour skills_count
+                    # Récupérer ou créer les dimensions
+                    source_key = self._get_or_create_source(cursor, offer.get('source', 'manual'))
+                    region_key = self._get_or_create_region(cursor, offer.get('region_name', 'Unknown'))
+                    company_key = self._get_or_create_company(cursor, offer.get('company_name', 'Unknown'))
+                    contract_key = self._get_or_create_contract(cursor, offer.get('contract_type', 'Unknown'))
+                    date_key = self._get_or_create_date(cursor, datetime.now())
+                    
+                    # Générer offer_id (identifiant unique de l'offre source)
+                    offer_id = offer.get('offer_id') or offer.get('uid') or uid
+                    
+                    # Insérer l'offre dans fact_offers
                     cursor.execute("""
-                        UPDATE fact_offers 
-                        SET skills_count = ?, competences_count = ?
-                        WHERE offer_key = ?
-                    """, (skills_added, skills_added, offer_key))
-                
-                inserted_count += 1
+                        INSERT INTO fact_offers (
+                            offer_id, uid, title, location, salary, remote, description, source_url,
+                            skills_count, competences_count, savoir_etre_count,
+                            source_key, region_key, company_key, contract_key, date_key,
+                            added_by, added_at
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (
+                        offer_id,
+                        uid,
+                        offer.get('title', ''),
+                        offer.get('location', ''),
+                        offer.get('salary', ''),
+                        offer.get('remote', 'no'),
+                        offer.get('description', ''),
+                        offer.get('url', ''),
+                        0,  # skills_count (sera mis à jour après)
+                        0,  # competences_count
+                        0,  # savoir_etre_count
+                        source_key,
+                        region_key,
+                        company_key,
+                        contract_key,
+                        date_key,
+                        'streamlit_app',
+                        datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    ))
+                    
+                    offer_key = cursor.lastrowid
+                    
+                    # Insérer les compétences si présentes
+                    if offer.get('all_skills'):
+                        skills_added = self._insert_skills(cursor, offer_key, offer['all_skills'])
+                        
+                        # Mettre à jour skills_count
+                        cursor.execute("""
+                            UPDATE fact_offers 
+                            SET skills_count = ?, competences_count = ?
+                            WHERE offer_key = ?
+                        """, (skills_added, skills_added, offer_key))
+                    
+                    self._refresh_skill_aggregates(cursor, offer_key)
+                    
+                    inserted_keys.append(offer_key)
+                    inserted_count += 1
             
-            conn.commit()
+            # Profils et clusters du lot (un transform par modèle), après le
+            # commit : l'inférence ne retient pas le verrou d'écriture
+            profiled_count, profile_error = self._infer_profiles(inserted_keys)
             
             message = f"✅ {inserted_count} offres insérées dans la base de données"
             if duplicate_count > 0:
                 message += f" • {duplicate_count} doublons ignorés"
+            if profiled_count > 0:
+                message += f" • {profiled_count} offres profilées"
+            if profile_error:
+                message += f" • ⚠️ profils non calculés ({profile_error}), ils le seront au prochain job d'analyse"
             
             return inserted_count, duplicate_count, message
             
         except Exception as e:
-            conn.rollback()
+            # Le pool a déjà annulé la transaction
             return 0, 0, f"Erreur lors de l'insertion: {str(e)}"
-        
-        finally:
-            conn.close()
     
  
     
-    def check_duplicate_by_uid(self, uid: str) -> bool:
-        """Vérifie si un UID existe déjà dans fact_offers"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def _infer_profiles(self, offer_keys: List[int]) -> Tuple[int, Optional[str]]:
+        """
+        Profil et cluster des offres insérées (déjà commitées).
+        
+        Chargement des modèles et inférence sur la connexion de lecture ;
+        seule l'écriture des résultats prend le verrou d'écriture. Une
+        erreur (modèle illisible...) n'annule pas l'insertion : les offres
+        seront profilées au prochain job hors ligne.
+        
+        Returns:
+            (nombre d'offres profilées, message d'erreur ou None)
+        """
+        if not offer_keys:
+            return 0, None
         
         try:
-            cursor.execute("SELECT COUNT(*) FROM fact_offers WHERE uid = ?", (uid,))
-            exists = cursor.fetchone()[0] > 0
-            return exists
-        finally:
-            conn.close()
+            results = self.profiler.assign(self.pool.reader(), offer_keys)
+            if not results:
+                return 0, None
+            with self.pool.writer() as conn:
+                return self.profiler.write(conn, results), None
+        except Exception as e:
+            print(f"⚠️ Profilage des offres insérées impossible: {e}")
+            return 0, str(e)
+    
+    def check_duplicate_by_uid(self, uid: str) -> bool:
+        """Vérifie si un UID existe déjà dans fact_offers"""
+        cursor = self.pool.reader().cursor()
+        cursor.execute("SELECT COUNT(*) FROM fact_offers WHERE uid = ?", (uid,))
+        return cursor.fetchone()[0] > 0
     
     def generate_uid(self, offer: Dict[str, Any]) -> str:
         """Génère un UID unique basé sur title + company + location"""
@@ -206,6 +248,10 @@ class ContributionManager:
         ))
         return cursor.lastrowid
     
+    def _refresh_skill_aggregates(self, cursor, offer_key: int):
+        """Recalcule la ligne de fact_offer_skill_agg d'une offre"""
+        cursor.execute(SKILL_AGG_REFRESH_QUERY, (offer_key,))
+    
     def _insert_skills(self, cursor, offer_key: int, skills_str: str) -> int:
         """
         Insère les compétences d'une offre dans dim_skill et fact_offer_skill
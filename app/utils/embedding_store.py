@@ -0,0 +1,94 @@
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import EMBEDDINGS_DIR
+
+
+# Paramètres d'entraînement communs (identiques à l'entraînement in-process)
+EMBEDDING_EPOCHS = {'word2vec': 20, 'doc2vec': 40}
+EMBEDDING_SEED = 42
+
+
+def embedding_model_name(kind: str, vector_size: int, window: int, min_count: int) -> str:
+    """Nom de fichier d'un modèle : un fichier par jeu d'hyperparamètres"""
+    if kind not in EMBEDDING_EPOCHS:
+        raise ValueError(f"Type de modèle inconnu: {kind}")
+    return f"{kind}_d{vector_size}_w{window}_m{min_count}"
+
+
+def embedding_model_path(kind: str, vector_size: int, window: int, min_count: int,
+                         directory: Path = EMBEDDINGS_DIR) -> Path:
+    """Chemin du modèle gensim (les vecteurs sont dans des .npy à côté)"""
+    return Path(directory) / f"{embedding_model_name(kind, vector_size, window, min_count)}.model"
+
+
+def save_embedding_model(model, kind: str, vector_size: int, window: int, min_count: int,
+                         corpus_version: Optional[str], n_documents: int,
+                         directory: Path = EMBEDDINGS_DIR) -> Path:
+    """
+    Sauvegarde un modèle au format natif gensim + un manifeste JSON.
+
+    sep_limit=0 : tous les tableaux numpy sont écrits dans des fichiers .npy
+    séparés, qui pourront être mappés en mémoire au chargement.
+    """
+    path = embedding_model_path(kind, vector_size, window, min_count, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    model.save(str(path), sep_limit=0)
+
+    manifest = {
+        'kind': kind,
+        'vector_size': vector_size,
+        'window': window,
+        'min_count': min_count,
+        'epochs': EMBEDDING_EPOCHS[kind],
+        'seed': EMBEDDING_SEED,
+        'corpus_version': corpus_version,
+        'n_documents': n_documents,
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    with open(path.with_suffix('.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    return path
+
+
+def load_embedding_model(kind: str, vector_size: int, window: int, min_count: int,
+                         corpus_version: Optional[str] = None,
+                         directory: Path = EMBEDDINGS_DIR) -> Optional[Tuple[object, Dict]]:
+    """
+    Charge un modèle pré-entraîné, vecteurs mappés en lecture seule
+    (mmap='r') : les processus qui chargent le même modèle partagent les
+    pages du cache système au lieu de dupliquer les vecteurs.
+
+    Args:
+        corpus_version: Version courante de la base (snapshot_version) ;
+            si elle diffère de celle du manifeste, le modèle est signalé
+            obsolète (manifest['stale']) et un avertissement est affiché
+
+    Returns:
+        (modèle, manifeste), ou None si aucun modèle ne correspond
+    """
+    path = embedding_model_path(kind, vector_size, window, min_count, directory)
+    manifest_path = path.with_suffix('.json')
+    if not path.exists() or not manifest_path.exists():
+        return None
+
+    from gensim.models import Doc2Vec, Word2Vec
+
+    model_class = Word2Vec if kind == 'word2vec' else Doc2Vec
+    model = model_class.load(str(path), mmap='r')
+
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    manifest['stale'] = corpus_version is not None and manifest.get('corpus_version') != corpus_version
+    if manifest['stale']:
+        print(f"⚠️ {path.name} entraîné sur la version {manifest.get('corpus_version')} "
+              f"de la base (version courante {corpus_version})")
+
+    return model, manifest
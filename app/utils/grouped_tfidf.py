@@ -0,0 +1,97 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+# Paramètres du vectoriseur (identiques aux anciennes analyses par région)
+TFIDF_PARAMS = dict(min_df=2, token_pattern=r'\b\w+\b')
+
+
+class GroupedTFIDF:
+    """
+    TF-IDF ajusté une seule fois sur tout le corpus, puis agrégé par groupe
+    (région, contrat, source, mois...).
+
+    Le profil d'un groupe est la moyenne des vecteurs TF-IDF de ses offres,
+    obtenue pour tous les groupes d'un coup par le produit d'une matrice
+    indicatrice creuse (groupes × offres, 1/effectif) et de la matrice
+    TF-IDF. Vocabulaire et IDF étant communs, les scores sont comparables
+    d'un groupe à l'autre.
+    """
+
+    def __init__(self, max_features: Optional[int] = None, min_df: int = TFIDF_PARAMS['min_df']):
+        """
+        Args:
+            max_features: Taille maximale du vocabulaire (tout le corpus)
+            min_df: Nombre minimal d'offres contenant un terme
+        """
+        self.max_features = max_features
+        self.min_df = min_df
+        self.vectorizer = None
+        self.matrix = None
+        self.feature_names = None
+        self.index = None
+
+    def fit(self, documents: pd.Series) -> 'GroupedTFIDF':
+        """
+        Ajuste le vectoriseur sur les documents (valeurs manquantes ignorées).
+
+        Args:
+            documents: Textes, indexés comme les clés de regroupement
+        """
+        documents = documents.dropna()
+        self.index = documents.index
+        self.vectorizer = TfidfVectorizer(
+            max_features=self.max_features,
+            min_df=self.min_df,
+            token_pattern=TFIDF_PARAMS['token_pattern']
+        )
+        self.matrix = self.vectorizer.fit_transform(documents.tolist()).tocsr()
+        self.feature_names = self.vectorizer.get_feature_names_out()
+        return self
+
+    def group_profiles(self, keys: pd.Series, min_size: int = 1) -> Tuple[pd.Index, sparse.csr_matrix, np.ndarray]:
+        """
+        Profils TF-IDF moyens de tous les groupes en une multiplication creuse.
+
+        Args:
+            keys: Clé de groupe de chaque offre (alignée sur l'index des documents)
+            min_size: Effectif minimal d'un groupe
+
+        Returns:
+            (groupes, matrice groupes × termes, effectifs)
+        """
+        codes, groups = pd.factorize(keys.reindex(self.index), sort=True)
+        counts = np.bincount(codes[codes >= 0], minlength=len(groups))
+
+        # Matrice indicatrice : ligne g = 1/effectif sur les offres du groupe g
+        rows = np.flatnonzero(codes >= 0)
+        indicator = sparse.csr_matrix(
+            (1.0 / counts[codes[rows]], (codes[rows], rows)),
+            shape=(len(groups), self.matrix.shape[0])
+        )
+        profiles = (indicator @ self.matrix).tocsr()
+
+        kept = np.flatnonzero(counts >= min_size)
+        return groups[kept], profiles[kept], counts[kept]
+
+    def top_terms(self, keys: pd.Series, n_terms: int = 20,
+                  min_size: int = 1) -> Dict[object, List[Tuple[str, float]]]:
+        """
+        Termes de plus fort TF-IDF moyen de chaque groupe.
+
+        Returns:
+            Dict {groupe: [(terme, score), ...]} (scores décroissants)
+        """
+        groups, profiles, _ = self.group_profiles(keys, min_size)
+        terms = {}
+
+        for group, start, end in zip(groups, profiles.indptr[:-1], profiles.indptr[1:]):
+            indices, scores = profiles.indices[start:end], profiles.data[start:end]
+            top = np.argsort(-scores, kind='stable')[:n_terms]
+            terms[group] = [(self.feature_names[indices[i]], float(scores[i])) for i in top]
+
+        return terms
@@ -0,0 +1,175 @@
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import joblib
+import numpy as np
+
+
+# Format des répertoires de modèles :
+#   manifest.json      métadonnées (JSON) + index des tableaux et estimateurs
+#   <nom>.npy          tableaux numpy (mappés en mémoire au chargement)
+#   <nom>.joblib       estimateurs sklearn (chargés seulement si nécessaire)
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+def _to_json(value: Any) -> Any:
+    """Convertit les scalaires / tableaux numpy des métadonnées en types JSON"""
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return _to_json(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def new_model_version(kind: str) -> str:
+    """Identifiant d'une version de modèle (clé de fact_offer_profile)"""
+    return f"{kind}_{datetime.now():%Y%m%d_%H%M%S}"
+
+
+def save_artifact(directory: Path, kind: str, metadata: Dict[str, Any],
+                  arrays: Dict[str, np.ndarray] = None, estimators: Dict[str, Any] = None) -> Path:
+    """
+    Écrit un modèle au format répertoire (remplace l'éventuelle version
+    précédente en une fois).
+
+    Args:
+        directory: Répertoire du modèle
+        kind: Type de modèle ('topic_model', 'clustering'...)
+        metadata: Valeurs légères sérialisables en JSON
+        arrays: Tableaux numpy (dont la taille dépend du corpus)
+        estimators: Objets sklearn
+    """
+    directory = Path(directory)
+    tmp_dir = directory.with_name(directory.name + ".tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'kind': kind,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'metadata': _to_json(metadata),
+        'arrays': {},
+        'estimators': {},
+    }
+
+    for name, array in (arrays or {}).items():
+        array = np.ascontiguousarray(array)
+        np.save(tmp_dir / f"{name}.npy", array, allow_pickle=False)
+        manifest['arrays'][name] = {'file': f"{name}.npy", 'shape': list(array.shape), 'dtype': str(array.dtype)}
+
+    for name, estimator in (estimators or {}).items():
+        joblib.dump(estimator, tmp_dir / f"{name}.joblib")
+        manifest['estimators'][name] = {'file': f"{name}.joblib", 'class': type(estimator).__name__}
+
+    with open(tmp_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    if directory.exists():
+        old_dir = directory.with_name(directory.name + ".old")
+        if old_dir.exists():
+            shutil.rmtree(old_dir)
+        os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir)
+    else:
+        os.replace(tmp_dir, directory)
+
+    return directory
+
+
+class ModelArtifact:
+    """
+    Modèle chargé depuis son répertoire : seul le manifeste est lu à
+    l'ouverture, les tableaux (mmap, lecture seule) et les estimateurs sont
+    chargés au premier accès.
+
+    S'utilise comme l'ancien dict dépicklé : model['topics'],
+    'cluster_centers' in model, model.get('labels')...
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with open(self.directory / MANIFEST_NAME, encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(f"Format de modèle non supporté: {self.manifest.get('format_version')}")
+
+        self.kind = self.manifest['kind']
+        self.metadata = self.manifest['metadata']
+        self._loaded = {}
+
+    def array(self, name: str) -> np.ndarray:
+        """Tableau mappé en mémoire (lecture seule)"""
+        if name not in self._loaded:
+            entry = self.manifest['arrays'][name]
+            self._loaded[name] = np.load(self.directory / entry['file'], mmap_mode='r', allow_pickle=False)
+        return self._loaded[name]
+
+    def estimator(self, name: str):
+        """Estimateur sklearn (chargé au premier accès)"""
+        if name not in self._loaded:
+            entry = self.manifest['estimators'][name]
+            self._loaded[name] = joblib.load(self.directory / entry['file'])
+        return self._loaded[name]
+
+    def keys(self):
+        return [*self.metadata, *self.manifest['arrays'], *self.manifest['estimators']]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.metadata or key in self.manifest['arrays'] or key in self.manifest['estimators']
+
+    def __getitem__(self, key: str):
+        if key in self.metadata:
+            return self.metadata[key]
+        if key in self.manifest['arrays']:
+            return self.array(key)
+        if key in self.manifest['estimators']:
+            return self.estimator(key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        return self[key] if key in self else default
+
+
+def load_artifact(directory: Path) -> Optional[ModelArtifact]:
+    """Ouvre un modèle (None si le répertoire n'a pas de manifeste)"""
+    directory = Path(directory)
+    if not (directory / MANIFEST_NAME).exists():
+        return None
+    return ModelArtifact(directory)
+
+
+# Répartition des clés des anciens pickles (dict) entre les trois sections
+TOPIC_MODEL_LAYOUT = {
+    'metadata': ('model_version', 'feature_names', 'topics', 'n_topics', 'method'),
+    'arrays': (),
+    'estimators': ('vectorizer', 'model'),
+}
+CLUSTERING_LAYOUT = {
+    'metadata': ('model_version', 'n_clusters', 'mode'),
+    'arrays': ('labels', 'coords_2d', 'cluster_centers'),
+    'estimators': ('vectorizer', 'kmeans', 'pca'),
+}
+
+
+def save_model_dict(directory: Path, kind: str, model_data: Dict[str, Any], layout: Dict[str, tuple]) -> Path:
+    """Écrit un dict de modèle (ancien contenu des pickles) selon sa répartition"""
+    return save_artifact(
+        directory,
+        kind,
+        metadata={key: model_data[key] for key in layout['metadata'] if key in model_data},
+        arrays={key: model_data[key] for key in layout['arrays'] if model_data.get(key) is not None},
+        estimators={key: model_data[key] for key in layout['estimators'] if model_data.get(key) is not None},
+    )
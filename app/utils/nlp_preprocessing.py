@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# À incrémenter si le nettoyage ou la tokenisation change (invalide le cache)
+PREPROCESSING_VERSION = 2
+
+# Colonnes composant le texte analysé (titre + entreprise + compétences)
+TEXT_COLUMNS = ('title', 'company_name', 'all_skills')
+
+# Mots retirés du texte nettoyé (lieux, mots vides, termes génériques)
+GEOGRAPHIC_STOPWORDS = {
+    "france",
+    "ile",
+    "paris",
+    "lyon",
+    "marseille",
+    "toulouse",
+    "nice",
+    "nantes",
+    "strasbourg",
+    "montpellier",
+    "bordeaux",
+    "lille",
+    "rennes",
+    "reims",
+    "havre",
+    "saint",
+    "etienne",
+    "toulon",
+    "grenoble",
+    "dijon",
+    "angers",
+    "villeurbanne",
+    "region",
+    "rhone",
+    "alpes",
+    "aquitaine",
+    "bretagne",
+    "normandie",
+    "occitanie",
+    "hauts",
+    "nouvelle",
+    "grand",
+    "est",
+    "pays",
+    "loire",
+    "centre",
+    "val",
+    "cote",
+    "azur",
+    "ville",
+    "de",
+    "la",
+    "le",
+    "les",
+    "un",
+    "une",
+    "des",
+}
+
+
+def build_text_corpus(df: pd.DataFrame) -> pd.Series:
+    """Texte brut de chaque offre, en minuscules (valeurs manquantes : str(None))"""
+    parts = [df[column].map(str) if column in df.columns else pd.Series("", index=df.index)
+             for column in TEXT_COLUMNS]
+    return parts[0].str.cat(parts[1:], sep=" ").str.lower()
+
+
+def _split_rows(words: pd.Series, keep: pd.Series, n_rows: int) -> list:
+    """Regroupe les mots conservés d'une série explosée (index = position) par document"""
+    keep = keep.to_numpy(dtype=bool)
+    positions = np.asarray(words.index)[keep]
+    values = words.to_numpy(dtype=object)[keep]
+    bounds = np.cumsum(np.bincount(positions, minlength=n_rows))[:-1]
+    return np.split(values, bounds)
+
+
+def prepare_texts(texts: pd.Series, stopwords: Iterable[str]) -> pd.DataFrame:
+    """
+    Nettoyage et tokenisation vectorisés d'une série de textes.
+
+    - text_clean : ponctuation remplacée par des espaces, mots de 2 lettres
+      ou moins et stopwords retirés
+    - tokens : mots alphabétiques de text_clean (entrée Word2Vec/Doc2Vec)
+    """
+    n_rows = len(texts)
+    # Chaînes objet : avec le stockage Arrow (défaut de pandas 3, lecture
+    # Parquet), \w ne reconnaît que l'ASCII et retirerait les accents
+    words = (
+        texts.reset_index(drop=True)
+        .astype(object)
+        .str.replace(r"[^\w\s]", " ", regex=True)
+        .str.split()
+        .explode()
+    )
+    keep = words.notna() & (words.str.len() > 2) & ~words.isin(set(stopwords))
+    words = words[keep]
+
+    alpha = words.str.isalpha().astype(bool)
+    text_clean = [" ".join(row) for row in _split_rows(words, pd.Series(True, index=words.index), n_rows)]
+    tokens = [row.tolist() for row in _split_rows(words, alpha, n_rows)]
+
+    return pd.DataFrame({'text_clean': text_clean, 'tokens': tokens}, index=texts.index)
+
+
+def _fingerprint(stopwords: Iterable[str]) -> str:
+    """Empreinte des paramètres du prétraitement"""
+    payload = json.dumps([PREPROCESSING_VERSION, list(TEXT_COLUMNS), sorted(stopwords)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def row_hashes(df: pd.DataFrame, columns: Iterable[str] = TEXT_COLUMNS) -> np.ndarray:
+    """Empreinte (uint64) du texte source de chaque offre"""
+    columns = [column for column in columns if column in df.columns]
+    return pd.util.hash_pandas_object(df[columns].map(str), index=False).values
+
+
+def content_hash(df: pd.DataFrame, columns: Iterable[str] = TEXT_COLUMNS) -> str:
+    """Empreinte du texte source de tout le corpus (clé de cache)"""
+    return hashlib.sha256(row_hashes(df, columns).tobytes()).hexdigest()
+
+
+def _read_cache(cache_path: Path, fingerprint: str) -> pd.DataFrame:
+    """Cache existant indexé par row_hash (vide s'il est absent ou obsolète)"""
+    empty = pd.DataFrame(columns=['text_clean', 'tokens'], index=pd.Index([], dtype=np.uint64, name='row_hash'))
+
+    if cache_path is None or not Path(cache_path).exists():
+        return empty
+
+    metadata = pq.read_schema(cache_path).metadata or {}
+    if metadata.get(b'fingerprint') != fingerprint.encode():
+        return empty
+
+    cached = pq.read_table(cache_path, memory_map=True).to_pandas()
+    cached['tokens'] = cached['tokens'].apply(list)
+    return cached.set_index('row_hash')
+
+
+def _write_cache(cache_path: Path, fingerprint: str, hashes: np.ndarray, prepared: pd.DataFrame):
+    """Réécrit le cache avec les offres courantes (écriture atomique)"""
+    table = pa.table({
+        'row_hash': pa.array(hashes, type=pa.uint64()),
+        'text_clean': pa.array(prepared['text_clean'].tolist(), type=pa.string()),
+        'tokens': pa.array(prepared['tokens'].tolist(), type=pa.list_(pa.string())),
+    }).replace_schema_metadata({'fingerprint': fingerprint})
+
+    tmp_path = f"{cache_path}.tmp"
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, cache_path)
+
+
+def preprocess_corpus(df: pd.DataFrame, stopwords: Iterable[str], cache_path: Path = None) -> pd.DataFrame:
+    """
+    Texte nettoyé et tokens de chaque offre.
+
+    Les résultats sont persistés dans cache_path (Parquet) et indexés par
+    l'empreinte du texte source de chaque offre : seules les offres
+    nouvelles ou modifiées sont retraitées.
+
+    Returns:
+        DataFrame aligné sur df.index : text_clean (str), tokens (list)
+    """
+    stopwords = set(stopwords)
+    fingerprint = _fingerprint(stopwords)
+    hashes = row_hashes(df)
+
+    cached = _read_cache(cache_path, fingerprint)
+    cached = cached[~cached.index.duplicated()]
+    missing = ~np.isin(hashes, cached.index.values)
+
+    prepared = pd.DataFrame(index=df.index, columns=['text_clean', 'tokens'], dtype=object)
+
+    if (~missing).any():
+        hits = cached.loc[hashes[~missing]]
+        prepared.loc[~missing, 'text_clean'] = hits['text_clean'].values
+        prepared.loc[~missing, 'tokens'] = pd.Series(hits['tokens'].values, index=df.index[~missing])
+
+    if missing.any():
+        computed = prepare_texts(build_text_corpus(df[missing]), stopwords)
+        prepared.loc[missing, 'text_clean'] = computed['text_clean'].values
+        prepared.loc[missing, 'tokens'] = computed['tokens']
+
+        if cache_path is not None:
+            _write_cache(cache_path, fingerprint, hashes, prepared)
+
+    return prepared
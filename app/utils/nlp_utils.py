@@ -2,52 +2,88 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import pickle
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 import io
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-from config import TOPIC_MODEL_PATH, CLUSTERING_MODEL_PATH, PROFILE_NAMES
+sys.path.insert(0, str(Path(__file__).parent))
+from config import (
+    TOPIC_MODEL_DIR, CLUSTERING_MODEL_DIR, TOPIC_MODEL_PATH, CLUSTERING_MODEL_PATH, PROFILE_NAMES
+)
+from model_artifacts import load_artifact
+from grouped_tfidf import GroupedTFIDF
+from db import load_cluster_coordinates, load_profile_distribution, load_representative_offers
 
 
 
 
-def load_topic_model():
-    """Charge le modèle de topic modeling"""
-    if not TOPIC_MODEL_PATH.exists():
+def _load_legacy_pickle(path: Path):
+    """Ancien format (dict picklé), tant que le modèle n'a pas été converti"""
+    if not path.exists():
         return None
     
-    with open(TOPIC_MODEL_PATH, 'rb') as f:
-        model_data = pickle.load(f)
-    
-    return model_data
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def load_topic_model():
+    """
+    Charge le modèle de topic modeling : seul le manifeste est lu, les
+    estimateurs ne sont chargés qu'au premier accès.
+    """
+    model = load_artifact(TOPIC_MODEL_DIR)
+    if model is None:
+        model = _load_legacy_pickle(TOPIC_MODEL_PATH)
+    return model
 
 
 def load_clustering_model():
-    """Charge le modèle de clustering"""
-    if not CLUSTERING_MODEL_PATH.exists():
-        return None
-    
-    with open(CLUSTERING_MODEL_PATH, 'rb') as f:
-        model_data = pickle.load(f)
-    
-    return model_data
+    """
+    Charge le modèle de clustering : labels et coordonnées sont mappés en
+    mémoire au premier accès, les estimateurs chargés à la demande.
+    """
+    model = load_artifact(CLUSTERING_MODEL_DIR)
+    if model is None:
+        model = _load_legacy_pickle(CLUSTERING_MODEL_PATH)
+    return model
 
 
+def get_model_version(model) -> Optional[str]:
+    """
+    Version d'un modèle chargé, clé de ses assignations dans
+    fact_offer_profile (None pour un ancien pickle : pas d'assignations
+    en base, elles sont à recalculer).
+    """
+    if not model or 'model_version' not in model:
+        return None
+    return model['model_version']
 
 
-def get_topic_distribution(df: pd.DataFrame) -> pd.DataFrame:
+def get_topic_distribution(df: pd.DataFrame = None, topic_model=None) -> pd.DataFrame:
     """
-    Calcule la distribution des topics dans le DataFrame.
+    Calcule la distribution des topics.
+    
+    Avec un modèle versionné, elle est lue dans fact_offer_profile (requête
+    SQL groupée) ; sinon calculée sur les colonnes du DataFrame.
     
     Args:
         df: DataFrame avec colonne 'dominant_profile' ou 'dominant_topic'
+            (ancien modèle sans version)
+        topic_model: Modèle chargé (load_topic_model)
     
     Returns:
         DataFrame avec topic_id, count, percentage
     """
+    model_version = get_model_version(topic_model)
+    if model_version is not None:
+        return load_profile_distribution(model_version)
+    
+    if df is None:
+        return pd.DataFrame()
+    
     topic_col = 'dominant_profile' if 'dominant_profile' in df.columns else 'dominant_topic'
     
     if topic_col not in df.columns:
@@ -86,8 +122,20 @@ def get_topic_keywords(topic_model, topic_id: int, n_words: int = 10) -> List[st
 
 def get_representative_offers(df: pd.DataFrame, 
                               topic_id: int,
-                              n: int = 5) -> pd.DataFrame:
- 
+                              n: int = 5,
+                              topic_model=None) -> pd.DataFrame:
+    """
+    Offres les plus caractéristiques d'un profil : top N par probabilité
+    dans fact_offer_profile (index) avec un modèle versionné, sinon sur les
+    colonnes du DataFrame.
+    """
+    model_version = get_model_version(topic_model)
+    if model_version is not None:
+        return load_representative_offers(model_version, topic_id, n)
+    
+    if df is None:
+        return pd.DataFrame()
+    
     topic_col = 'dominant_profile' if 'dominant_profile' in df.columns else 'dominant_topic'
     prob_col = 'profile_probability' if 'profile_probability' in df.columns else 'topic_probability'
     
@@ -112,9 +160,16 @@ def get_cluster_centers_2d(clustering_model) -> np.ndarray:
     return clustering_model['cluster_centers']
 
 
-def get_cluster_coordinates(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
- 
-    if 'coord_x' not in df.columns or 'coord_y' not in df.columns:
+def get_cluster_coordinates(df: pd.DataFrame = None, clustering_model=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Coordonnées 2D et cluster des offres : lus dans fact_offer_profile
+    avec un modèle versionné, sinon dans les colonnes du DataFrame.
+    """
+    model_version = get_model_version(clustering_model)
+    if model_version is not None:
+        df = load_cluster_coordinates(model_version)
+    
+    if df is None or 'coord_x' not in df.columns or 'coord_y' not in df.columns:
         return np.array([]), np.array([])
     
     coords = df[['coord_x', 'coord_y']].values
@@ -249,7 +304,8 @@ def compare_regional_tfidf(df: pd.DataFrame,
                           skill_column: str = 'all_skills',
                           n_terms: int = 15) -> Dict[str, List[str]]:
     """
-    Compare les termes TF-IDF de 2 régions.
+    Compare les termes TF-IDF de 2 régions (TF-IDF commun ajusté une fois
+    sur tout le DataFrame, scores comparables entre régions).
     
     Args:
         df: DataFrame avec 'region_name' et skill_column
@@ -261,17 +317,17 @@ def compare_regional_tfidf(df: pd.DataFrame,
     Returns:
         Dict avec 'unique_region1', 'unique_region2', 'common'
     """
-    # Documents région 1
-    docs1 = df[df['region_name'] == region1][skill_column].dropna().tolist()
-    tfidf1 = compute_tfidf_scores(docs1, max_features=n_terms)
+    regions = df['region_name'].where(df['region_name'].isin([region1, region2]))
     
-    # Documents région 2
-    docs2 = df[df['region_name'] == region2][skill_column].dropna().tolist()
-    tfidf2 = compute_tfidf_scores(docs2, max_features=n_terms)
+    try:
+        top_terms = GroupedTFIDF().fit(df[skill_column]).top_terms(regions, n_terms=n_terms)
+    except ValueError as e:
+        print(f"Erreur TF-IDF: {e}")
+        top_terms = {}
     
     # Termes
-    terms1 = set(tfidf1['term'].head(n_terms).tolist())
-    terms2 = set(tfidf2['term'].head(n_terms).tolist())
+    terms1 = {term for term, _ in top_terms.get(region1, [])}
+    terms2 = {term for term, _ in top_terms.get(region2, [])}
     
     return {
         'unique_region1': list(terms1 - terms2),
@@ -285,7 +341,15 @@ def compare_regional_tfidf(df: pd.DataFrame,
 def extract_top_skills_by_group(df: pd.DataFrame,
                                 group_column: str,
                                 skill_column: str = 'all_skills',
-                                n_skills: int = 10) -> Dict[str, List[Tuple[str, int]]]:
+                                n_skills: int = 10,
+                                skill_matrix=None) -> Dict[str, List[Tuple[str, int]]]:
+    """
+    Top compétences par groupe. Avec skill_matrix (utils.skill_matrix),
+    un seul produit creux indicatrice × matrice remplace le découpage des
+    chaînes ligne par ligne (df doit contenir offer_key).
+    """
+    if skill_matrix is not None:
+        return skill_matrix.top_skills_by_group(df['offer_key'], df[group_column], n_skills)
     
     from collections import Counter
     
@@ -306,14 +370,25 @@ def extract_top_skills_by_group(df: pd.DataFrame,
 
 
 def calculate_skill_correlation(df: pd.DataFrame,
-                                skill_column: str = 'all_skills') -> pd.DataFrame:
-  
+                                skill_column: str = 'all_skills',
+                                skill_matrix=None,
+                                max_features: int = 50) -> pd.DataFrame:
+    """
+    Corrélation (phi) entre compétences. Avec skill_matrix
+    (utils.skill_matrix), le calcul se fait sur la matrice creuse des offres
+    de df (offer_key) par compétence entière, sans limite de vocabulaire
+    autre que max_features pour la matrice dense renvoyée.
+    """
+    if skill_matrix is not None:
+        engine = skill_matrix.cooccurrence_engine(df['offer_key'])
+        return engine.phi_matrix(max_skills=max_features)
+    
     from sklearn.feature_extraction.text import CountVectorizer
     
     documents = df[skill_column].dropna().tolist()
     
     vectorizer = CountVectorizer(
-        max_features=50,
+        max_features=max_features,
         binary=True,
         token_pattern=r'\b\w+\b'
     )
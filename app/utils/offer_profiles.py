@@ -0,0 +1,277 @@
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+from config import CLUSTERING_MODEL_DIR, TOPIC_MODEL_DIR
+from model_artifacts import MANIFEST_NAME, load_artifact
+
+
+# Même table que database/schema.sql (créée ici pour les bases antérieures).
+# Instructions séparées : executescript validerait la transaction en cours.
+PROFILE_TABLE_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS fact_offer_profile (
+        offer_key INTEGER NOT NULL,
+        model_version TEXT NOT NULL,
+        model_kind TEXT NOT NULL,
+        dominant_profile INTEGER,
+        profile_probability REAL,
+        cluster_id INTEGER,
+        coord_x REAL,
+        coord_y REAL,
+        PRIMARY KEY (model_version, offer_key),
+        FOREIGN KEY (offer_key) REFERENCES fact_offers(offer_key) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_fact_offer_profile_topic
+        ON fact_offer_profile(model_version, dominant_profile, profile_probability DESC)
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_fact_offer_profile_offer ON fact_offer_profile(offer_key)",
+)
+
+# Colonnes renseignées par type de modèle (kind des artefacts, utils/model_artifacts.py)
+PROFILE_COLUMNS = {
+    'topic_model': ('dominant_profile', 'profile_probability'),
+    'clustering': ('cluster_id', 'coord_x', 'coord_y'),
+}
+
+
+# Compétences des offres à profiler
+SKILL_DOCUMENTS_BY_KEY_QUERY = """
+    SELECT offer_key, competences, savoir_etre
+    FROM fact_offer_skill_agg
+    WHERE offer_key IN ({placeholders})
+"""
+
+
+def build_skill_documents(competences: pd.Series, savoir_etre: pd.Series) -> list:
+    """Documents texte « compétences savoir-être » (listes séparées par ',')"""
+    competences = competences.fillna('').str.replace(',', ' ')
+    savoir_etre = savoir_etre.fillna('').str.replace(',', ' ')
+    return competences.str.cat(savoir_etre, sep=' ').str.strip().tolist()
+
+
+def ensure_profile_table(conn: sqlite3.Connection):
+    """Crée fact_offer_profile et ses index s'ils n'existent pas"""
+    for statement in PROFILE_TABLE_DDL:
+        conn.execute(statement)
+
+
+def write_offer_profiles(conn: sqlite3.Connection, model_kind: str, model_version: str,
+                         assignments: pd.DataFrame) -> int:
+    """
+    Enregistre les assignations d'un modèle (remplace celles de la même
+    version pour ces offres). Ne commite pas.
+
+    Args:
+        conn: Connexion en écriture
+        model_kind: 'topic_model' ou 'clustering'
+        model_version: Version du modèle (manifeste de l'artefact)
+        assignments: DataFrame offer_key + colonnes de PROFILE_COLUMNS[model_kind]
+
+    Returns:
+        Nombre d'offres écrites
+    """
+    columns = PROFILE_COLUMNS[model_kind]
+    placeholders = ", ".join("?" * (len(columns) + 3))
+
+    rows = assignments[['offer_key', *columns]].astype(object).itertuples(index=False, name=None)
+    conn.executemany(
+        f"INSERT OR REPLACE INTO fact_offer_profile "
+        f"(offer_key, model_version, model_kind, {', '.join(columns)}) VALUES ({placeholders})",
+        ((int(row[0]), model_version, model_kind, *row[1:]) for row in rows)
+    )
+    return len(assignments)
+
+
+def store_offer_profiles(db_path: Union[str, Path], model_kind: str, model_version: str,
+                         chunks: Iterable[pd.DataFrame], model_dir: Union[str, Path] = None) -> int:
+    """
+    Écrit les assignations d'un job hors ligne dans une seule transaction.
+
+    Les lots (éventuellement produits par un générateur qui fait
+    l'inférence) sont tous calculés avant d'ouvrir la transaction :
+    le verrou d'écriture n'est tenu que le temps des insertions, sans
+    bloquer les contributions pendant l'inférence.
+
+    Les offres insérées pendant le job (absentes des lots, éventuellement
+    profilées à l'insertion avec l'ancien modèle) sont assignées avec le
+    modèle sauvegardé, elles aussi hors transaction. Les assignations des
+    versions précédentes ne sont supprimées que pour les offres réécrites.
+
+    Args:
+        db_path: Base SQLite des offres
+        model_kind: 'topic_model' ou 'clustering'
+        model_version: Version du modèle sauvegardé
+        chunks: DataFrames d'assignations (un seul, ou un par lot)
+        model_dir: Répertoire du modèle sauvegardé (pour les offres
+            arrivées pendant le job ; ignorées si None)
+
+    Returns:
+        Nombre d'offres écrites
+    """
+    staged = [chunk for chunk in chunks]
+
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_profile_table(conn)
+
+        if model_dir is not None:
+            offer_keys = pd.read_sql_query("SELECT offer_key FROM fact_offers", conn)['offer_key'].to_numpy()
+            staged_keys = np.concatenate([chunk['offer_key'].to_numpy() for chunk in staged]) if staged else []
+            missing = offer_keys[~np.isin(offer_keys, staged_keys)].tolist()
+
+            profiler = OfferProfiler()
+            profiler.model_dirs[model_kind] = Path(model_dir)
+            results = profiler.assign(conn, missing, kinds=(model_kind,))
+            if model_kind in results and results[model_kind][0] == model_version:
+                staged.append(results[model_kind][1])
+
+        # Transaction courte : insertions seulement
+        n_written = sum(write_offer_profiles(conn, model_kind, model_version, chunk) for chunk in staged)
+        conn.execute("""
+            DELETE FROM fact_offer_profile
+            WHERE model_kind = ? AND model_version != ?
+              AND offer_key IN (SELECT offer_key FROM fact_offer_profile WHERE model_version = ?)
+        """, (model_kind, model_version, model_version))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return n_written
+
+
+class OfferProfiler:
+    """
+    Profil (topic modeling) et cluster des offres nouvellement insérées,
+    avec les modèles sauvegardés par les jobs nlp_analysis : un seul
+    transform vectorisé par modèle pour tout le lot, sans réentraînement.
+
+    assign() (chargement des modèles et inférence) se fait sur une
+    connexion de lecture, hors de la transaction d'écriture ; write()
+    n'écrit que les résultats.
+
+    Les modèles sont rechargés quand leur manifeste change (nouvel
+    entraînement). Les anciens pickles, sans version, sont ignorés.
+    """
+
+    def __init__(self, topic_model_dir: Path = TOPIC_MODEL_DIR,
+                 clustering_model_dir: Path = CLUSTERING_MODEL_DIR):
+        self.model_dirs = {
+            'topic_model': Path(topic_model_dir),
+            'clustering': Path(clustering_model_dir),
+        }
+        self._models = {}  # kind -> (mtime du manifeste, artefact)
+        self._lock = threading.Lock()
+
+    def _model(self, kind: str):
+        """Artefact courant d'un type de modèle (None s'il n'y en a pas)"""
+        manifest = self.model_dirs[kind] / MANIFEST_NAME
+        mtime = manifest.stat().st_mtime if manifest.exists() else None
+
+        with self._lock:
+            cached = self._models.get(kind)
+            if cached is None or cached[0] != mtime:
+                model = load_artifact(self.model_dirs[kind]) if mtime is not None else None
+                cached = (mtime, model if model is not None and model.get('model_version') else None)
+                self._models[kind] = cached
+        return cached[1]
+
+    def assign_topics(self, model, documents: list) -> pd.DataFrame:
+        """Profil dominant et sa probabilité"""
+        doc_topic_dist = model['model'].transform(model['vectorizer'].transform(documents))
+        return pd.DataFrame({
+            'dominant_profile': doc_topic_dist.argmax(axis=1),
+            'profile_probability': doc_topic_dist.max(axis=1)
+        })
+
+    def assign_clusters(self, model, documents: list) -> pd.DataFrame:
+        """Cluster et coordonnées 2D (même projection que clustering.py)"""
+        tfidf_matrix = model['vectorizer'].transform(documents)
+        # PCA (mode 'full') travaille sur la matrice dense, TruncatedSVD sur la creuse
+        projection_input = tfidf_matrix if model.get('mode', 'full') == 'minibatch' else tfidf_matrix.toarray()
+        coords = model['pca'].transform(projection_input)
+        return pd.DataFrame({
+            'cluster_id': model['kmeans'].predict(tfidf_matrix),
+            'coord_x': coords[:, 0],
+            'coord_y': coords[:, 1]
+        })
+
+    def assign(self, conn: sqlite3.Connection, offer_keys: List[int],
+               kinds: Iterable[str] = None) -> Dict[str, Tuple[str, pd.DataFrame]]:
+        """
+        Profils et clusters des offres (lecture seule).
+
+        Args:
+            conn: Connexion à la base
+            offer_keys: Offres à profiler
+            kinds: Types de modèles à appliquer (tous si None)
+
+        Returns:
+            Dict {type de modèle: (version, DataFrame offer_key + colonnes)},
+            vide s'il n'y a pas de modèle versionné
+        """
+        models = {kind: self._model(kind) for kind in (kinds or self.model_dirs)}
+        models = {kind: model for kind, model in models.items() if model is not None}
+        if not offer_keys or not models:
+            return {}
+
+        # Lecture par tranches (limite du nombre de paramètres SQLite)
+        offer_keys = [int(key) for key in offer_keys]
+        df = pd.concat([
+            pd.read_sql_query(
+                SKILL_DOCUMENTS_BY_KEY_QUERY.format(placeholders=", ".join("?" * len(keys))),
+                conn, params=keys
+            )
+            for keys in (offer_keys[start:start + 900] for start in range(0, len(offer_keys), 900))
+        ], ignore_index=True)
+        if df.empty:
+            return {}
+        documents = build_skill_documents(df['competences'], df['savoir_etre'])
+
+        assign = {'topic_model': self.assign_topics, 'clustering': self.assign_clusters}
+        results = {}
+        for kind, model in models.items():
+            assignments = assign[kind](model, documents)
+            assignments.insert(0, 'offer_key', df['offer_key'].to_numpy(dtype=np.int64))
+            results[kind] = (model['model_version'], assignments)
+        return results
+
+    def write(self, conn: sqlite3.Connection, results: Dict[str, Tuple[str, pd.DataFrame]]) -> int:
+        """
+        Écrit les résultats de assign() dans fact_offer_profile (sans commit).
+
+        Returns:
+            Nombre d'offres assignées par au moins un modèle
+        """
+        if not results:
+            return 0
+
+        ensure_profile_table(conn)
+        offer_keys = set()
+        for kind, (model_version, assignments) in results.items():
+            write_offer_profiles(conn, kind, model_version, assignments)
+            offer_keys.update(assignments['offer_key'].tolist())
+        return len(offer_keys)
+
+
+_profiler = None
+
+
+def get_offer_profiler() -> OfferProfiler:
+    """Profileur partagé (les modèles restent chargés d'une insertion à l'autre)"""
+    global _profiler
+    if _profiler is None:
+        _profiler = OfferProfiler()
+    return _profiler
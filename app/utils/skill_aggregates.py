@@ -0,0 +1,23 @@
+# Agrégats de compétences par offre (table fact_offer_skill_agg), partagés
+# par database/etl_pipeline.py et les contributions (utils/db_insert.py)
+SKILL_AGG_SELECT = """
+    SELECT
+        fo.offer_key,
+        GROUP_CONCAT(CASE WHEN ds.skill_type = 'competences'
+                     THEN ds.skill_name END),
+        GROUP_CONCAT(CASE WHEN ds.skill_type = 'savoir_etre'
+                     THEN ds.skill_name END),
+        GROUP_CONCAT(ds.skill_name)
+    FROM fact_offers fo
+    LEFT JOIN fact_offer_skill fos ON fo.offer_key = fos.offer_key
+    LEFT JOIN dim_skill ds ON fos.skill_key = ds.skill_key
+"""
+
+# Recalcul de la ligne d'une offre (paramètre : offer_key)
+SKILL_AGG_REFRESH_QUERY = f"""
+    INSERT OR REPLACE INTO fact_offer_skill_agg
+        (offer_key, competences, savoir_etre, all_skills)
+    {SKILL_AGG_SELECT}
+    WHERE fo.offer_key = ?
+    GROUP BY fo.offer_key
+"""
@@ -0,0 +1,105 @@
+import re
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+class SkillDetector:
+    """
+    Détecte une liste fermée de compétences (ex. TECH_SKILLS) dans des
+    documents en une passe par document, et renvoie une matrice creuse
+    documents × compétences (nombre d'occurrences).
+
+    - compétences ordinaires : mots entiers du texte nettoyé (minuscules),
+      recherchés dans un dictionnaire mot -> colonne
+    - compétences ambiguës (R, C...) : motifs sensibles à la casse appliqués
+      au texte original, réunis dans une seule regex compilée
+    """
+
+    def __init__(self, skills: Iterable[str], case_sensitive_patterns: Dict[str, str] = None):
+        case_sensitive_patterns = case_sensitive_patterns or {}
+
+        self.vocabulary = sorted({skill.lower() for skill in skills})
+        self._column = {skill: i for i, skill in enumerate(self.vocabulary)}
+
+        self._word_pattern = re.compile(r"\w+")
+        self._word_columns = {
+            skill: i for skill, i in self._column.items()
+            if skill not in case_sensitive_patterns
+        }
+
+        # Une alternative nommée par compétence : m.lastgroup donne la colonne
+        self._case_sensitive_pattern = None
+        self._group_columns = {}
+        alternatives = []
+        for n, (skill, pattern) in enumerate(sorted(case_sensitive_patterns.items())):
+            group = f"s{n}"
+            alternatives.append(f"(?P<{group}>{pattern})")
+            self._group_columns[group] = self._column[skill.lower()]
+        if alternatives:
+            self._case_sensitive_pattern = re.compile("|".join(alternatives))
+
+    def tag(self, clean_texts: Iterable[str], original_texts: Iterable[str] = None) -> sparse.csr_matrix:
+        """
+        Matrice documents × vocabulary des occurrences de chaque compétence.
+
+        Args:
+            clean_texts: Textes nettoyés (minuscules), pour les mots entiers
+            original_texts: Textes originaux, pour les motifs sensibles à la
+                casse (ignorés si None)
+        """
+        clean_texts = list(clean_texts)
+        if original_texts is None:
+            original_texts = [None] * len(clean_texts)
+
+        rows, columns = [], []
+        word_columns = self._word_columns
+        find_words = self._word_pattern.findall
+
+        for row, (text, original) in enumerate(zip(clean_texts, original_texts)):
+            if isinstance(text, str):
+                for word in find_words(text):
+                    column = word_columns.get(word)
+                    if column is not None:
+                        rows.append(row)
+                        columns.append(column)
+
+            if self._case_sensitive_pattern is not None and isinstance(original, str):
+                for match in self._case_sensitive_pattern.finditer(original):
+                    rows.append(row)
+                    columns.append(self._group_columns[match.lastgroup])
+
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, columns)),
+            shape=(len(clean_texts), len(self.vocabulary))
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+    def counts(self, tags: sparse.csr_matrix) -> pd.Series:
+        """Occurrences totales par compétence (compétences absentes exclues), décroissant"""
+        totals = pd.Series(np.asarray(tags.sum(axis=0)).ravel(), index=self.vocabulary)
+        totals = totals[totals > 0]
+        return totals.iloc[np.argsort(-totals.values, kind='stable')]
+
+    def first_skills(self, tags: sparse.csr_matrix, n: int = 3) -> pd.DataFrame:
+        """
+        Les n premières compétences (ordre du vocabulaire) de chaque document.
+
+        Returns:
+            DataFrame (row, skill) : une ligne par (document, compétence)
+        """
+        tags = tags.tocsr()
+        tags.sort_indices()
+
+        lengths = np.diff(tags.indptr)
+        rows = np.repeat(np.arange(tags.shape[0]), lengths)
+        rank = np.arange(tags.nnz) - np.repeat(tags.indptr[:-1], lengths)
+        keep = rank < n
+
+        return pd.DataFrame({
+            'row': rows[keep],
+            'skill': np.asarray(self.vocabulary, dtype=object)[tags.indices[keep]]
+        })
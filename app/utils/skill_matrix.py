@@ -0,0 +1,336 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Any, Iterable
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+class SkillMatrix:
+    """
+    Matrice d'incidence offres × compétences (CSR binaire), construite une
+    fois depuis fact_offer_skill et partagée par toutes les pages.
+
+    Les lignes suivent offer_keys, les colonnes vocabulary (trié). Les
+    méthodes prennent des offer_key (par ex. df['offer_key'] d'un DataFrame
+    filtré) : les offres inconnues de la matrice comptent comme sans
+    compétence.
+    """
+
+    def __init__(self, offer_keys: np.ndarray, vocabulary: np.ndarray, matrix: sparse.csr_matrix):
+        self.offer_keys = offer_keys
+        self.vocabulary = vocabulary
+        self.matrix = matrix
+
+        self._row_index = pd.Index(offer_keys)
+        self._lower_vocabulary = np.char.lower(vocabulary.astype(str))
+
+        # Moteurs de co-occurrence par ensemble d'offres filtré (LRU)
+        self._engines = OrderedDict()
+        self._engines_lock = threading.Lock()
+
+    @classmethod
+    def from_connection(cls, conn: sqlite3.Connection) -> 'SkillMatrix':
+        """Construit la matrice depuis la base (3 requêtes, aucun GROUP_CONCAT)"""
+        offer_keys = np.array(
+            [key for (key,) in conn.execute("SELECT offer_key FROM fact_offers ORDER BY offer_key")],
+            dtype=np.int64
+        )
+        skills = conn.execute("SELECT skill_key, skill_name FROM dim_skill").fetchall()
+        pairs = np.array(
+            conn.execute("SELECT offer_key, skill_key FROM fact_offer_skill").fetchall(),
+            dtype=np.int64
+        ).reshape(-1, 2)
+
+        # Vocabulaire : compétences utilisées par au moins une offre, triées
+        used = set(pairs[:, 1].tolist())
+        skills = sorted((name, key) for key, name in skills if key in used and name)
+        vocabulary = np.array([name for name, _ in skills], dtype=object)
+        column_of = {key: column for column, (_, key) in enumerate(skills)}
+
+        rows = np.searchsorted(offer_keys, pairs[:, 0])
+        columns = np.array([column_of.get(key, -1) for key in pairs[:, 1]], dtype=np.int64)
+        known = (columns >= 0) & (rows < len(offer_keys))
+        known[known] &= offer_keys[rows[known]] == pairs[known, 0]
+
+        matrix = sparse.csr_matrix(
+            (np.ones(known.sum(), dtype=np.int32), (rows[known], columns[known])),
+            shape=(len(offer_keys), len(vocabulary))
+        )
+        matrix.data[:] = 1  # doublons éventuels : incidence binaire
+
+        return cls(offer_keys, vocabulary, matrix)
+
+    # ------------------------------------------------------------------------
+    # SÉLECTION
+    # ------------------------------------------------------------------------
+
+    def rows(self, offer_keys: Iterable = None) -> sparse.csr_matrix:
+        """
+        Sous-matrice des offres données, dans leur ordre (toutes si None).
+        Une offre inconnue donne une ligne vide.
+        """
+        if offer_keys is None:
+            return self.matrix
+
+        positions = self._row_index.get_indexer(np.asarray(offer_keys))
+        selector = sparse.csr_matrix(
+            (np.ones((positions >= 0).sum(), dtype=np.int32),
+             (np.flatnonzero(positions >= 0), positions[positions >= 0])),
+            shape=(len(positions), self.matrix.shape[0])
+        )
+        return (selector @ self.matrix).tocsr()
+
+    def skill_columns(self, skills: Iterable[str]) -> np.ndarray:
+        """Colonnes des compétences données (comparaison insensible à la casse)"""
+        wanted = {str(skill).strip().lower() for skill in skills}
+        return np.flatnonzero(np.isin(self._lower_vocabulary, list(wanted)))
+
+    # ------------------------------------------------------------------------
+    # AGRÉGATS
+    # ------------------------------------------------------------------------
+
+    def skills_per_offer(self, offer_keys: Iterable = None) -> np.ndarray:
+        """Nombre de compétences de chaque offre"""
+        return self.rows(offer_keys).getnnz(axis=1)
+
+    def has_any_skill(self, offer_keys: Iterable, skills: Iterable[str]) -> np.ndarray:
+        """Masque booléen : l'offre possède au moins une des compétences"""
+        columns = self.skill_columns(skills)
+        if len(columns) == 0:
+            return np.zeros(len(offer_keys), dtype=bool)
+        return self.rows(offer_keys)[:, columns].getnnz(axis=1) > 0
+
+    def skill_counts(self, offer_keys: Iterable = None) -> pd.Series:
+        """Nombre d'offres par compétence (compétences absentes exclues), décroissant"""
+        counts = np.asarray(self.rows(offer_keys).sum(axis=0)).ravel()
+        series = pd.Series(counts, index=self.vocabulary)
+        series = series[series > 0]
+        return series.iloc[np.argsort(-series.values, kind='stable')]
+
+    def top_skills(self, offer_keys: Iterable = None, n: int = 20) -> List[Tuple[str, int]]:
+        """Les n compétences les plus demandées [(compétence, nb offres)]"""
+        counts = self.skill_counts(offer_keys).head(n)
+        return list(zip(counts.index, counts.values.tolist()))
+
+    def used_skills(self) -> List[str]:
+        """Vocabulaire (compétences présentes dans au moins une offre), trié"""
+        return self.vocabulary.tolist()
+
+    def counts_by_group(self, offer_keys: Iterable, groups: Iterable) -> Tuple[np.ndarray, sparse.csr_matrix]:
+        """
+        Nombre d'offres par (groupe, compétence) en un produit creux :
+        indicatrice groupes × offres @ matrice offres × compétences.
+
+        Returns:
+            (libellés des groupes, matrice groupes × compétences)
+        """
+        groups = pd.Series(np.asarray(groups, dtype=object))
+        valid = groups.notna().values
+        codes, labels = pd.factorize(groups[valid], sort=True)
+
+        indicator = sparse.csr_matrix(
+            (np.ones(len(codes), dtype=np.int32), (codes, np.flatnonzero(valid))),
+            shape=(len(labels), len(groups))
+        )
+        return np.asarray(labels), (indicator @ self.rows(offer_keys)).tocsr()
+
+    def top_skills_by_group(self, offer_keys: Iterable, groups: Iterable, n: int = 10) -> Dict[Any, List[Tuple[str, int]]]:
+        """Les n compétences les plus demandées de chaque groupe"""
+        labels, counts = self.counts_by_group(offer_keys, groups)
+
+        results = {}
+        for label, row in zip(labels, counts):
+            order = np.lexsort((row.indices, -row.data))[:n]
+            results[label] = [
+                (self.vocabulary[row.indices[i]], int(row.data[i])) for i in order
+            ]
+        return results
+
+    def cooccurrence(self, offer_keys: Iterable = None) -> sparse.csr_matrix:
+        """Co-occurrences compétence × compétence (diagonale = nb d'offres)"""
+        rows = self.rows(offer_keys)
+        return (rows.T @ rows).tocsr()
+
+    def cooccurrence_engine(self, offer_keys: Iterable = None, max_cached: int = 16) -> 'SkillCooccurrence':
+        """
+        Moteur de co-occurrence pour un ensemble d'offres, mis en cache par
+        ensemble (clé = empreinte des offer_key) : les pages qui réaffichent
+        les mêmes filtres ne recalculent rien.
+        """
+        if offer_keys is None:
+            cache_key = 'all'
+        else:
+            keys = np.sort(np.asarray(offer_keys, dtype=np.int64))
+            cache_key = hashlib.blake2b(keys.tobytes(), digest_size=16).hexdigest()
+
+        with self._engines_lock:
+            engine = self._engines.get(cache_key)
+            if engine is not None:
+                self._engines.move_to_end(cache_key)
+                return engine
+
+        engine = SkillCooccurrence(self.rows(offer_keys), self.vocabulary)
+
+        with self._engines_lock:
+            self._engines[cache_key] = engine
+            while len(self._engines) > max_cached:
+                self._engines.popitem(last=False)
+
+        return engine
+
+
+class SkillCooccurrence:
+    """
+    Statistiques d'association entre compétences, calculées sur la matrice
+    creuse binaire offres × compétences pour tout le vocabulaire.
+
+    Avec n offres, c_i offres pour la compétence i et c_ij offres pour la
+    paire (i, j) :
+        lift = n·c_ij / (c_i·c_j)
+        pmi  = log(lift)
+        npmi = pmi / -log(c_ij / n)          (dans [-1, 1])
+        phi  = (n·c_ij - c_i·c_j) / sqrt(c_i·c_j·(n - c_i)·(n - c_j))
+
+    Les matrices de métriques ne stockent que les paires qui co-occurrent
+    (c_ij > 0), comme la matrice de comptes : leur taille suit le nombre de
+    paires observées, pas le carré du vocabulaire.
+    """
+
+    METRICS = ('count', 'lift', 'pmi', 'npmi', 'phi')
+
+    def __init__(self, rows: sparse.csr_matrix, vocabulary: np.ndarray):
+        self.vocabulary = vocabulary
+        self.n_offers = rows.shape[0]
+
+        counts = (rows.T @ rows).tocsr()
+        counts.sum_duplicates()
+        self.skill_counts = counts.diagonal().astype(np.float64)
+
+        # Paires hors diagonale uniquement
+        counts.setdiag(0)
+        counts.eliminate_zeros()
+        self.counts = counts
+
+        self._index = {skill: i for i, skill in enumerate(vocabulary)}
+        self._metrics = {}
+
+    def _pair_values(self, metric: str, rows: np.ndarray, columns: np.ndarray, c_ij: np.ndarray) -> np.ndarray:
+        """Valeurs de la métrique pour des paires (rows, columns) de comptes c_ij"""
+        if metric == 'count':
+            return c_ij.astype(np.int64)
+
+        c_ij = c_ij.astype(np.float64)
+        c_i = self.skill_counts[rows]
+        c_j = self.skill_counts[columns]
+        n = float(self.n_offers)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if metric == 'lift':
+                return n * c_ij / (c_i * c_j)
+            if metric == 'pmi':
+                return np.log(n * c_ij / (c_i * c_j))
+            if metric == 'npmi':
+                pmi = np.log(n * c_ij / (c_i * c_j))
+                # c_ij = n : les deux compétences sont dans toutes les offres
+                return np.where(c_ij < n, pmi / -np.log(c_ij / n), 1.0)
+            if metric == 'phi':
+                denominator = np.sqrt(c_i * c_j * (n - c_i) * (n - c_j))
+                return np.where(denominator > 0, (n * c_ij - c_i * c_j) / denominator, 0.0)
+
+        raise ValueError(f"Métrique inconnue: {metric} (attendu: {', '.join(self.METRICS)})")
+
+    def _pairs(self, min_count: int = 1, upper: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Paires stockées (lignes, colonnes, comptes), filtrées"""
+        counts = self.counts
+        rows = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))
+        keep = counts.data >= min_count
+        if upper:
+            keep &= rows < counts.indices
+        return rows[keep], counts.indices[keep], counts.data[keep]
+
+    def _pairs_frame(self, rows: np.ndarray, columns: np.ndarray, c_ij: np.ndarray) -> pd.DataFrame:
+        """DataFrame des métriques d'un ensemble de paires"""
+        result = pd.DataFrame({
+            'skill_a': self.vocabulary[rows],
+            'skill_b': self.vocabulary[columns],
+        })
+        for name in self.METRICS:
+            result[name] = self._pair_values(name, rows, columns, c_ij)
+        return result
+
+    def metric_matrix(self, metric: str = 'npmi') -> sparse.csr_matrix:
+        """Matrice creuse compétence × compétence de la métrique (mise en cache)"""
+        if metric not in self._metrics:
+            rows, columns, c_ij = self._pairs()
+            matrix = self.counts.astype(np.float64, copy=True)
+            matrix.data = self._pair_values(metric, rows, columns, c_ij)
+            self._metrics[metric] = matrix
+        return self._metrics[metric]
+
+    def neighbours(self, skill: str, k: int = 10, metric: str = 'npmi', min_count: int = 1) -> pd.DataFrame:
+        """
+        Les k compétences les plus associées à skill selon la métrique.
+
+        Args:
+            min_count: Nombre minimal d'offres communes (filtre le bruit des
+                compétences rares, auxquelles PMI/lift donnent des scores élevés)
+
+        Returns:
+            DataFrame (skill, count, lift, pmi, npmi, phi) trié par métrique
+        """
+        i = self._index.get(skill)
+        if i is None:
+            return pd.DataFrame(columns=['skill'] + list(self.METRICS))
+
+        start, end = self.counts.indptr[i], self.counts.indptr[i + 1]
+        columns = self.counts.indices[start:end]
+        c_ij = self.counts.data[start:end]
+        keep = c_ij >= min_count
+
+        result = self._pairs_frame(np.full(keep.sum(), i), columns[keep], c_ij[keep])
+        result = result.drop(columns='skill_a').rename(columns={'skill_b': 'skill'})
+
+        return result.sort_values([metric, 'skill'], ascending=[False, True]).head(k).reset_index(drop=True)
+
+    def top_pairs(self, k: int = 50, metric: str = 'npmi', min_count: int = 1) -> pd.DataFrame:
+        """Les k paires de compétences les plus associées (chaque paire une fois)"""
+        rows, columns, c_ij = self._pairs(min_count, upper=True)
+
+        # Sélection sur la seule métrique demandée, puis détail des k paires
+        values = self._pair_values(metric, rows, columns, c_ij)
+        values = np.nan_to_num(values, nan=-np.inf)
+        if len(values) > k:
+            selected = np.argpartition(-values, k)[:k]
+        else:
+            selected = np.arange(len(values))
+
+        result = self._pairs_frame(rows[selected], columns[selected], c_ij[selected])
+        return result.sort_values([metric, 'skill_a', 'skill_b'], ascending=[False, True, True]).reset_index(drop=True)
+
+    def phi_matrix(self, skills: List[str] = None, max_skills: int = 50) -> pd.DataFrame:
+        """
+        Corrélation phi dense (équivalente à np.corrcoef sur les colonnes
+        binaires) entre les compétences données, ou les max_skills plus
+        fréquentes. Les paires sans co-occurrence ont une corrélation négative.
+        """
+        if skills is None:
+            order = np.argsort(-self.skill_counts, kind='stable')
+            indices = order[self.skill_counts[order] > 0][:max_skills]
+        else:
+            indices = np.array([self._index[s] for s in skills if s in self._index], dtype=np.int64)
+
+        n = float(self.n_offers)
+        c = self.skill_counts[indices]
+        c_ij = self.counts[indices][:, indices].toarray().astype(np.float64)
+        np.fill_diagonal(c_ij, c)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = np.sqrt(c * (n - c))
+            phi = (n * c_ij - np.outer(c, c)) / np.outer(spread, spread)
+
+        labels = self.vocabulary[indices]
+        return pd.DataFrame(phi, index=labels, columns=labels)
@@ -0,0 +1,82 @@
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+# Version de la base associée à un snapshot Parquet (aussi utilisée par
+# database/etl_pipeline.py) : dernier chargement ETL, nombre et dernière offre
+SNAPSHOT_VERSION_QUERY = """
+    SELECT
+        (SELECT MAX(load_id) FROM etl_load_watermark),
+        COUNT(*),
+        MAX(offer_key)
+    FROM fact_offers
+"""
+
+# Colonnes du snapshot stockées en dictionnaire / en listes
+SNAPSHOT_DICTIONARY_COLUMNS = ('region_name', 'company_name', 'contract_type')
+SNAPSHOT_LIST_COLUMNS = ('competences', 'savoir_etre', 'all_skills')
+SNAPSHOT_TEXT_COLUMNS = SNAPSHOT_DICTIONARY_COLUMNS + SNAPSHOT_LIST_COLUMNS
+
+
+def snapshot_version(conn: sqlite3.Connection) -> Optional[str]:
+    """Version courante de la base (None si elle n'a pas de watermark ETL)"""
+    try:
+        row = conn.execute(SNAPSHOT_VERSION_QUERY).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return ":".join(str(value) for value in row)
+
+
+def read_offers_snapshot(snapshot_path: Path, conn: sqlite3.Connection,
+                         text_columns: Iterable[str] = SNAPSHOT_TEXT_COLUMNS) -> Optional[pd.DataFrame]:
+    """
+    Charge le snapshot Parquet des offres (fichier mappé en mémoire).
+
+    Le snapshot n'est utilisé que si sa version correspond à la base
+    (sinon une contribution ou un chargement ETL l'a rendu obsolète).
+
+    Les colonnes dictionnaire restent des Categorical et les compétences
+    des listes, sauf celles de text_columns, converties dans Arrow (sans
+    boucle Python) en texte comme DatabaseManager.get_offers_with_skills :
+    compétences séparées par ',' (valeur manquante si la liste est vide).
+    Le texte reste stocké par Arrow côté pandas (pas de chaînes objet).
+
+    Args:
+        snapshot_path: Fichier Parquet écrit par etl_pipeline.py --snapshot
+        conn: Connexion à la base (version courante)
+        text_columns: Colonnes dictionnaire / listes à convertir en texte
+            (toutes par défaut ; () pour garder Categorical et listes)
+
+    Returns:
+        DataFrame, ou None si le snapshot est absent ou obsolète
+    """
+    snapshot_path = Path(snapshot_path)
+    if not snapshot_path.exists():
+        return None
+
+    metadata = pq.read_schema(snapshot_path).metadata or {}
+    version = snapshot_version(conn)
+    if version is None or metadata.get(b'snapshot_version') != version.encode():
+        return None
+
+    table = pq.read_table(snapshot_path, memory_map=True)
+
+    for column in text_columns:
+        values = table[column]
+        if column in SNAPSHOT_LIST_COLUMNS:
+            # Liste vide -> valeur manquante (comme le GROUP_CONCAT de la base)
+            joined = pc.binary_join(values, ',')
+            values = pc.if_else(pc.greater(pc.list_value_length(values), 0), joined, None)
+        else:
+            values = pc.cast(values, pa.string())
+        table = table.set_column(table.schema.get_field_index(column), column, values)
+
+    text_dtype = pd.StringDtype('pyarrow', na_value=np.nan)
+    return table.to_pandas(types_mapper={pa.string(): text_dtype}.get)
@@ -0,0 +1,153 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import SQLITE_PRAGMAS
+
+
+class SQLitePool:
+    """
+    Connexions SQLite partagées pour une base.
+
+    - lecture : une connexion par thread (réutilisée, jamais fermée par
+      l'appelant), en query_only
+    - écriture : une connexion unique, sérialisée par un verrou ; un
+      writer() imbriqué rejoint la transaction en cours (commit ou
+      rollback au niveau le plus externe seulement)
+
+    Chaque connexion reçoit le profil de PRAGMA (WAL, cache, mmap...).
+    Les connexions sont rouvertes quand le fichier de la base change
+    d'inode ou de date de modification (base recréée par
+    etl_pipeline.py --recreate ou remplacée) : elles resteraient sinon
+    attachées à l'ancien fichier.
+    """
+
+    def __init__(self, db_path: Path, pragmas: Dict[str, Any] = None):
+        self.db_path = Path(db_path)
+        self.pragmas = dict(SQLITE_PRAGMAS if pragmas is None else pragmas)
+
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        self._writer = None
+        self._writer_identity = None
+        self._readers = {}  # thread -> connexion de lecture
+        self._readers_lock = threading.Lock()
+
+    def _file_identity(self):
+        """(périphérique, inode, mtime) du fichier de la base, None s'il n'existe pas"""
+        try:
+            stat = self.db_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_dev, stat.st_ino, stat.st_mtime_ns
+
+    def connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Nouvelle connexion configurée (à fermer par l'appelant)"""
+        timeout = self.pragmas.get('busy_timeout', 5000) / 1000
+        conn = sqlite3.connect(self.db_path, timeout=timeout, check_same_thread=False)
+
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+
+        return conn
+
+    def reader(self) -> sqlite3.Connection:
+        """Connexion de lecture du thread courant"""
+        conn = getattr(self._local, 'conn', None)
+        identity = self._file_identity()
+
+        if conn is not None and identity is not None and identity != self._local.identity:
+            with self._readers_lock:
+                self._readers.pop(threading.current_thread(), None)
+            conn.close()
+            conn = None
+
+        if conn is None:
+            conn = self.connect(read_only=True)
+            self._local.conn = conn
+            self._local.identity = self._file_identity()
+
+            with self._readers_lock:
+                # Streamlit crée un thread par exécution de script : on ferme
+                # les connexions des threads terminés
+                for thread in [t for t in self._readers if not t.is_alive()]:
+                    self._readers.pop(thread).close()
+                self._readers[threading.current_thread()] = conn
+
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """
+        Transaction d'écriture sur la connexion dédiée.
+
+        Commit en sortie, rollback (et exception propagée) en cas d'erreur.
+        Un writer() imbriqué dans le même thread ne fait ni l'un ni l'autre :
+        la transaction est validée ou annulée par le writer() le plus externe.
+        """
+        with self._write_lock:
+            outermost = self._write_depth == 0
+
+            if outermost and self._writer is not None:
+                identity = self._file_identity()
+                if identity is not None and identity != self._writer_identity:
+                    self._writer.close()
+                    self._writer = None
+
+            if self._writer is None:
+                self._writer = self.connect()
+                self._writer_identity = self._file_identity()
+
+            self._write_depth += 1
+            try:
+                yield self._writer
+                if outermost:
+                    self._writer.commit()
+            except Exception:
+                if outermost:
+                    self._writer.rollback()
+                raise
+            finally:
+                self._write_depth -= 1
+                if outermost:
+                    # Nos propres écritures changent la date de modification
+                    self._writer_identity = self._file_identity()
+
+    def close(self):
+        """Ferme toutes les connexions du pool"""
+        with self._readers_lock:
+            for conn in self._readers.values():
+                conn.close()
+            self._readers = {}
+        self._local = threading.local()
+
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+_pools: Dict[Path, SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Path, pragmas: Dict[str, Any] = None) -> SQLitePool:
+    """
+    Pool partagé (un par base et par process).
+
+    pragmas n'est pris en compte qu'à la création du pool.
+    """
+    key = Path(db_path).resolve()
+
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SQLitePool(key, pragmas)
+        return _pools[key]
@@ -0,0 +1,231 @@
+import threading
+from typing import Iterable, List, Tuple
+
+import numpy as np
+from sklearn.cluster import KMeans
+
+
+class VectorIndex:
+    """
+    Index de similarité cosinus approché (IVF) sur des vecteurs d'offres,
+    indexés par offer_key.
+
+    Les vecteurs normalisés sont répartis en n_lists listes par un k-means
+    (centroïdes normalisés) ; une requête ne parcourt que les n_probe listes
+    dont le centroïde est le plus proche, au lieu de toute la matrice.
+
+    - add() insère ou remplace des offres sans réentraîner les centroïdes
+      (ex. offres contribuées après l'entraînement Doc2Vec)
+    - search() traite un lot de requêtes et peut être restreint à un
+      sous-ensemble d'offres (ex. offres filtrées de la page)
+    """
+
+    def __init__(self, centroids: np.ndarray, n_probe: int = 8):
+        self.centroids = _normalize(centroids)
+        self.n_probe = n_probe
+        self.dim = self.centroids.shape[1]
+
+        self._keys = np.empty(0, dtype=np.int64)
+        self._vectors = np.empty((0, self.dim), dtype=np.float32)
+        self._assignments = np.empty(0, dtype=np.int64)
+        self._size = 0
+        self._position = {}
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(len(self.centroids))]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, keys: Iterable, vectors: np.ndarray, n_lists: int = None,
+              n_probe: int = 8, random_state: int = 42) -> 'VectorIndex':
+        """
+        Entraîne les centroïdes sur les vecteurs donnés puis les indexe.
+
+        Args:
+            keys: offer_key de chaque vecteur
+            vectors: Matrice (n, dim)
+            n_lists: Nombre de listes (par défaut ~ sqrt(n))
+            n_probe: Listes parcourues par requête (compromis rappel/latence)
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        normalized = _normalize(vectors)
+
+        if n_lists is None:
+            n_lists = int(np.sqrt(len(keys)))
+        n_lists = max(1, min(n_lists, len(keys)))
+
+        kmeans = KMeans(n_clusters=n_lists, n_init=1, random_state=random_state)
+        kmeans.fit(normalized)
+
+        index = cls(kmeans.cluster_centers_, n_probe=n_probe)
+        index.add(keys, normalized)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._position)
+
+    def __contains__(self, key) -> bool:
+        return int(key) in self._position
+
+    @property
+    def keys(self) -> np.ndarray:
+        """offer_key indexés (ordre d'insertion)"""
+        with self._lock:
+            positions = np.fromiter(self._position.values(), dtype=np.int64, count=len(self._position))
+            return self._keys[np.sort(positions)]
+
+    def vector(self, key) -> np.ndarray:
+        """Vecteur normalisé d'une offre"""
+        return self._vectors[self._position[int(key)]]
+
+    def positions(self, keys: Iterable) -> np.ndarray:
+        """Positions internes des offres données (-1 si absentes)"""
+        return np.array([self._position.get(int(key), -1) for key in keys], dtype=np.int64)
+
+    # ------------------------------------------------------------------------
+    # INSERTION
+    # ------------------------------------------------------------------------
+
+    def add(self, keys: Iterable, vectors: np.ndarray):
+        """
+        Insère des offres (une offre déjà indexée est remplacée).
+        Chaque vecteur rejoint la liste de son centroïde le plus proche.
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        vectors = _normalize(vectors)
+        if len(keys) == 0:
+            return
+
+        assignments = np.argmax(vectors @ self.centroids.T, axis=1)
+
+        with self._lock:
+            # Remplacement : anciennes positions retirées de leurs listes
+            replaced = [self._position[key] for key in keys.tolist() if key in self._position]
+            if replaced:
+                replaced = np.array(replaced, dtype=np.int64)
+                for list_id in np.unique(self._assignments[replaced]):
+                    self._lists[list_id] = np.setdiff1d(self._lists[list_id], replaced, assume_unique=True)
+
+            start = self._size
+            self._reserve(start + len(keys))
+            positions = np.arange(start, start + len(keys))
+            self._keys[positions] = keys
+            self._vectors[positions] = vectors
+            self._assignments[positions] = assignments
+            self._size += len(keys)
+
+            for key, position in zip(keys.tolist(), positions.tolist()):
+                self._position[key] = position
+
+            order = np.argsort(assignments, kind='stable')
+            list_ids, starts = np.unique(assignments[order], return_index=True)
+            for list_id, members in zip(list_ids, np.split(positions[order], starts[1:])):
+                self._lists[list_id] = np.concatenate([self._lists[list_id], members])
+
+    def _reserve(self, size: int):
+        """Agrandit les tableaux (capacité doublée) : insertions amorties"""
+        capacity = len(self._keys)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 64)
+
+        keys = np.empty(capacity, dtype=np.int64)
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        assignments = np.empty(capacity, dtype=np.int64)
+        keys[:self._size] = self._keys[:self._size]
+        vectors[:self._size] = self._vectors[:self._size]
+        assignments[:self._size] = self._assignments[:self._size]
+        self._keys, self._vectors, self._assignments = keys, vectors, assignments
+
+    # ------------------------------------------------------------------------
+    # RECHERCHE
+    # ------------------------------------------------------------------------
+
+    def search(self, queries: np.ndarray, k: int = 10, n_probe: int = None,
+               restrict: Iterable = None, exclude: Iterable = None) -> List[List[Tuple[int, float]]]:
+        """
+        k plus proches offres (similarité cosinus) de chaque requête.
+
+        Args:
+            queries: Matrice (q, dim) ou vecteur (dim,)
+            k: Nombre de résultats par requête
+            n_probe: Listes parcourues (self.n_probe par défaut)
+            restrict: offer_key autorisés (tous si None)
+            exclude: offer_key à ignorer (ex. l'offre requête)
+
+        Returns:
+            Pour chaque requête, liste de (offer_key, score) décroissante
+        """
+        queries = _normalize(np.atleast_2d(queries))
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+
+        with self._lock:
+            allowed = self._allowed_mask(restrict, exclude)
+
+            # Sous-ensemble autorisé plus petit que ce qu'on parcourrait : scan exact
+            n_allowed = self._size if allowed is None else int(allowed.sum())
+            expected_scan = self._size * n_probe / len(self.centroids)
+            if n_allowed <= expected_scan:
+                candidates = np.arange(self._size) if allowed is None else np.flatnonzero(allowed)
+                return [self._top_k(query, candidates, k) for query in queries]
+
+            probes = _top_indices(queries @ self.centroids.T, n_probe)
+            results = []
+            for query, lists in zip(queries, probes):
+                candidates = np.concatenate([self._lists[list_id] for list_id in lists])
+                if allowed is not None:
+                    candidates = candidates[allowed[candidates]]
+                results.append(self._top_k(query, candidates, k))
+            return results
+
+    def search_exact(self, queries: np.ndarray, k: int = 10, restrict: Iterable = None,
+                     exclude: Iterable = None) -> List[List[Tuple[int, float]]]:
+        """Même résultat que search() par parcours exhaustif (référence)"""
+        queries = _normalize(np.atleast_2d(queries))
+        with self._lock:
+            allowed = self._allowed_mask(restrict, exclude)
+            candidates = np.array(sorted(self._position.values()), dtype=np.int64)
+            if allowed is not None:
+                candidates = candidates[allowed[candidates]]
+            return [self._top_k(query, candidates, k) for query in queries]
+
+    def _allowed_mask(self, restrict, exclude):
+        """Masque booléen des positions autorisées (None : toutes les positions vivantes)"""
+        live = np.zeros(self._size, dtype=bool)
+        live[list(self._position.values())] = True
+        if restrict is None and exclude is None and live.all():
+            return None
+
+        allowed = live
+        if restrict is not None:
+            allowed = np.zeros(self._size, dtype=bool)
+            positions = self.positions(restrict)
+            allowed[positions[positions >= 0]] = True
+            allowed &= live
+        if exclude is not None:
+            positions = self.positions(exclude)
+            allowed[positions[positions >= 0]] = False
+        return allowed
+
+    def _top_k(self, query: np.ndarray, candidates: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Tri partiel des candidats par produit scalaire"""
+        if len(candidates) == 0:
+            return []
+        scores = self._vectors[candidates] @ query
+        top = _top_indices(scores[None, :], k)[0]
+        return [(int(self._keys[candidates[i]]), float(scores[i])) for i in top]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Vecteurs float32 de norme 1 (vecteurs nuls inchangés)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def _top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices des k meilleurs scores de chaque ligne, triés par score décroissant"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1)
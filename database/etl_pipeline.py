@@ -1,11 +1,150 @@
 import argparse
 import sqlite3
 import pandas as pd
+import ast
+import hashlib
 import json
+import os
 from pathlib import Path
+from typing import Tuple
 from datetime import datetime
 import sys
 
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "app" / "utils"))
+from skill_aggregates import SKILL_AGG_REFRESH_QUERY, SKILL_AGG_SELECT
+from snapshot import SNAPSHOT_DICTIONARY_COLUMNS, SNAPSHOT_LIST_COLUMNS, SNAPSHOT_VERSION_QUERY
+
+
+# Colonnes de listes de compétences (texte JSON / repr dans les CSV)
+SKILL_LIST_COLUMNS = ('competences', 'savoir_etre')
+
+
+# Colonnes source obligatoires (NOT NULL de fact_offers) et colonnes
+# stockées en texte (les dimensions sont indexées par leur nom)
+REQUIRED_COLUMNS = ('uid', 'offer_id', 'title')
+TEXT_COLUMNS = (
+    'uid', 'offer_id', 'source', 'region', 'company', 'contract_type', 'title',
+    'source_url', 'location', 'salary', 'remote', 'published_date', 'description'
+)
+COORDINATE_COLUMNS = ('region_lat', 'region_lon')
+
+# Nombre de lignes rejetées détaillées dans la sortie
+MAX_REJECTED_SHOWN = 10
+
+
+# Champs source pris en compte pour détecter une offre modifiée
+CONTENT_HASH_COLUMNS = (
+    'offer_id', 'source', 'region', 'company', 'contract_type', 'title',
+    'source_url', 'location', 'salary', 'remote', 'published_date',
+    'description', 'competences', 'savoir_etre'
+)
+
+
+# Colonnes de fact_offers alimentées par le pipeline (uid en premier)
+OFFER_COLUMNS = (
+    'uid', 'offer_id', 'source_key', 'region_key', 'company_key', 'contract_key',
+    'title', 'source_url', 'location', 'salary', 'remote', 'published_date',
+    'description', 'skills_count', 'competences_count', 'savoir_etre_count',
+    'content_hash'
+)
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _to_python(series: pd.Series) -> list:
+    """Valeurs d'une colonne en types Python natifs (NaN -> None)"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _to_records(df: pd.DataFrame) -> list:
+    """Lignes d'un DataFrame en tuples de types Python natifs"""
+    return list(zip(*(_to_python(df[col]) for col in df.columns)))
+
+
+def _decode_list(value) -> list:
+    """
+    Décode une cellule liste : liste Python, JSON ou représentation repr().
+    
+    Lève ValueError si la valeur n'est pas une liste de compétences.
+    """
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    
+    text = value.strip()
+    if not text:
+        return []
+    
+    try:
+        # JSON (rapide) sauf pour les repr() Python à apostrophes
+        if "'" not in text:
+            decoded = json.loads(text)
+        else:
+            decoded = ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        try:
+            decoded = ast.literal_eval(text)
+        except (ValueError, SyntaxError, MemoryError, RecursionError) as e:
+            raise ValueError(f"liste illisible: {text[:50]!r}") from e
+    
+    if not isinstance(decoded, (list, tuple)):
+        raise ValueError(f"liste attendue, reçu {type(decoded).__name__}")
+    return list(decoded)
+
+
+def decode_list_column(series: pd.Series) -> Tuple[pd.Series, int]:
+    """
+    Décode une colonne de listes en une passe sur ses valeurs distinctes.
+    
+    Returns:
+        (colonne de listes Python, nombre de cellules illisibles)
+        Les cellules vides ou illisibles deviennent [].
+    """
+    is_text = series.map(type).eq(str)
+    is_list = series.map(lambda v: isinstance(v, (list, tuple)))
+    
+    decoded_values = {}
+    errors = 0
+    for value, count in series[is_text].value_counts(dropna=True).items():
+        try:
+            decoded_values[value] = _decode_list(value)
+        except ValueError:
+            decoded_values[value] = []
+            errors += count
+    
+    decoded = series.map(
+        lambda v: list(decoded_values[v]) if type(v) is str
+        else list(v) if isinstance(v, (list, tuple))
+        else []
+    )
+    
+    # Cellules non textuelles et non listes (NaN exclus)
+    errors += int((~is_text & ~is_list & series.notna()).sum())
+    
+    return decoded, errors
+
+
+def compute_content_hashes(df: pd.DataFrame) -> list:
+    """
+    Empreinte SHA-256 du contenu de chaque offre (CONTENT_HASH_COLUMNS).
+    
+    Les colonnes de compétences doivent être décodées (listes).
+    """
+    columns = [
+        _to_python(df[col]) if col in df.columns else [None] * len(df)
+        for col in CONTENT_HASH_COLUMNS
+    ]
+    return [
+        hashlib.sha256(
+            json.dumps(values, ensure_ascii=False, default=str).encode('utf-8')
+        ).hexdigest()
+        for values in zip(*columns)
+    ]
+
 
 class ETLPipeline:
     """Pipeline ETL pour chargement des données"""
@@ -16,9 +155,13 @@ class ETLPipeline:
         self.stats = {
             'offers_inserted': 0,
             'offers_duplicates': 0,
+            'offers_updated': 0,
+            'offers_unchanged': 0,
             'skills_inserted': 0,
-            'associations_created': 0
+            'associations_created': 0,
+            'rows_rejected': 0
         }
+        self.rejected_rows = pd.DataFrame(columns=['line', 'uid', 'reason'])
     
     def connect(self):
         """Connexion à la base de données"""
@@ -39,211 +182,515 @@ class ETLPipeline:
         
         print("Schéma créé avec succès")
     
+    def ensure_schema(self, schema_file: str = "schema.sql"):
+        """
+        Crée le schéma si la base est vide, sinon met à niveau une base
+        existante (colonne content_hash, tables etl_load_watermark,
+        fact_offer_skill_agg et fact_offer_profile, index offers_fts et
+        idx_fact_offers_added) sans supprimer de données.
+        """
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fact_offers'"
+        ).fetchone()
+        
+        if not exists:
+            self.create_schema(schema_file)
+            return
+        
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(fact_offers)")}
+        if 'content_hash' not in columns:
+            self.conn.execute("ALTER TABLE fact_offers ADD COLUMN content_hash TEXT")
+        
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS etl_load_watermark (
+                load_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                mode TEXT NOT NULL,
+                source_file TEXT,
+                started_at TIMESTAMP NOT NULL,
+                finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                offers_inserted INTEGER DEFAULT 0,
+                offers_updated INTEGER DEFAULT 0,
+                offers_unchanged INTEGER DEFAULT 0,
+                max_published_date TEXT
+            );
+            
+            CREATE INDEX IF NOT EXISTS idx_fact_offers_added ON fact_offers(added_at, offer_key);
+            
+            CREATE TABLE IF NOT EXISTS fact_offer_profile (
+                offer_key INTEGER NOT NULL,
+                model_version TEXT NOT NULL,
+                model_kind TEXT NOT NULL,
+                dominant_profile INTEGER,
+                profile_probability REAL,
+                cluster_id INTEGER,
+                coord_x REAL,
+                coord_y REAL,
+                PRIMARY KEY (model_version, offer_key),
+                FOREIGN KEY (offer_key) REFERENCES fact_offers(offer_key) ON DELETE CASCADE
+            );
+            
+            CREATE INDEX IF NOT EXISTS idx_fact_offer_profile_topic
+                ON fact_offer_profile(model_version, dominant_profile, profile_probability DESC);
+            CREATE INDEX IF NOT EXISTS idx_fact_offer_profile_offer ON fact_offer_profile(offer_key);
+        """)
+        
+        has_aggregates = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fact_offer_skill_agg'"
+        ).fetchone()
+        
+        if not has_aggregates:
+            self.conn.executescript("""
+                CREATE TABLE fact_offer_skill_agg (
+                    offer_key INTEGER PRIMARY KEY,
+                    competences TEXT,
+                    savoir_etre TEXT,
+                    all_skills TEXT,
+                    FOREIGN KEY (offer_key) REFERENCES fact_offers(offer_key) ON DELETE CASCADE
+                );
+            """)
+            self.refresh_skill_aggregates()
+        
+        has_search_index = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'offers_fts'"
+        ).fetchone()
+        
+        if not has_search_index:
+            # Index FTS5 et triggers repris tels quels du schéma de référence
+            with open(schema_file, 'r', encoding='utf-8') as f:
+                reference = sqlite3.connect(":memory:")
+                reference.executescript(f.read())
+            
+            statements = reference.execute("""
+                SELECT sql FROM sqlite_master
+                WHERE name = 'offers_fts' OR name LIKE 'trg_offers_fts_%'
+                ORDER BY type = 'trigger'
+            """).fetchall()
+            reference.close()
+            
+            for (statement,) in statements:
+                self.conn.execute(statement)
+            self.rebuild_search_index()
+        
+        self.conn.commit()
+    
+    def load(self, df: pd.DataFrame, source_file: str = None):
+        """
+        Charge dimensions, compétences, offres et associations dans une
+        seule transaction (rollback complet en cas d'erreur).
+        """
+        started_at = _now()
+        df = self.validate_rows(df)
+        
+        with self.conn:
+            self.load_dimensions(df)
+            self.load_skills(df)
+            self.load_offers(df)
+            self.load_offer_skills(df)
+            self.refresh_skill_aggregates()
+            self._record_watermark('full', source_file, started_at, df)
+        
+        self.optimize_search_index()
+    
+    def load_incremental(self, df: pd.DataFrame, source_file: str = None):
+        """
+        Chargement incrémental : seules les offres nouvelles (uid inconnu) ou
+        modifiées (content_hash différent) sont écrites. Les offres modifiées
+        sont mises à jour sur place et leurs compétences recalculées.
+        
+        La détection des changements se fait avant d'ouvrir la transaction
+        d'écriture, pour limiter la durée du verrou.
+        """
+        print("\nDétection des changements...")
+        started_at = _now()
+        
+        df = self.validate_rows(df)
+        df = df.assign(content_hash=compute_content_hashes(df))
+        
+        # Doublons du fichier : comme INSERT OR IGNORE, la première
+        # occurrence d'un uid est gardée
+        duplicated = df['uid'].duplicated(keep='first')
+        self.stats['offers_duplicates'] += int(duplicated.sum())
+        df = df[~duplicated]
+        
+        existing = {
+            uid: (offer_key, content_hash)
+            for uid, offer_key, content_hash in self.conn.execute(
+                "SELECT uid, offer_key, content_hash FROM fact_offers"
+            )
+        }
+        
+        known = [existing.get(uid) for uid in _to_python(df['uid'])]
+        is_new = pd.Series([k is None for k in known], index=df.index)
+        is_changed = pd.Series(
+            [k is not None and k[1] != h for k, h in zip(known, df['content_hash'])],
+            index=df.index
+        )
+        
+        new_df = df[is_new]
+        changed_df = df[is_changed]
+        changed_keys = [k[0] for k, changed in zip(known, is_changed) if changed]
+        
+        self.stats['offers_unchanged'] = int((~is_new & ~is_changed).sum())
+        print(f"{len(new_df)} nouvelles, {len(changed_df)} modifiées, "
+              f"{self.stats['offers_unchanged']} inchangées")
+        
+        to_load = df[is_new | is_changed]
+        
+        with self.conn:
+            if len(to_load) > 0:
+                self.load_dimensions(to_load)
+                self.load_skills(to_load)
+                self.load_offers(new_df)
+                self.update_offers(changed_df)
+                
+                # Compétences des offres modifiées : recalculées entièrement
+                self.conn.executemany(
+                    "DELETE FROM fact_offer_skill WHERE offer_key = ?",
+                    [(key,) for key in changed_keys]
+                )
+                self.load_offer_skills(to_load)
+                
+                offer_keys = self._get_key_map("fact_offers", "uid", key_column="offer_key")
+                self.refresh_skill_aggregates(
+                    [offer_keys[uid] for uid in _to_python(to_load['uid']) if uid in offer_keys]
+                )
+            
+            self._record_watermark('incremental', source_file, started_at, to_load)
+    
+    def _record_watermark(self, mode: str, source_file: str, started_at: str, df: pd.DataFrame):
+        """Enregistre le chargement dans etl_load_watermark"""
+        max_published = None
+        if 'published_date' in df.columns and df['published_date'].notna().any():
+            max_published = str(df['published_date'].dropna().astype(str).max())
+        
+        self.conn.execute("""
+            INSERT INTO etl_load_watermark
+            (mode, source_file, started_at, offers_inserted, offers_updated,
+             offers_unchanged, max_published_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            mode, source_file, started_at,
+            self.stats['offers_inserted'], self.stats['offers_updated'],
+            self.stats['offers_unchanged'], max_published
+        ))
+    
+    def get_last_watermark(self) -> dict:
+        """Dernier chargement enregistré ({} si aucun)"""
+        cursor = self.conn.execute(
+            "SELECT * FROM etl_load_watermark ORDER BY load_id DESC LIMIT 1"
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return {}
+        return dict(zip([d[0] for d in cursor.description], row))
+    
+    def decode_skill_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Décode une seule fois les colonnes competences / savoir_etre en
+        listes Python, réutilisées par toutes les étapes de chargement.
+        
+        Colonnes absentes ou cellules vides -> [].
+        """
+        if df.attrs.get('skill_columns_decoded'):
+            return df
+        
+        df = df.copy()
+        for column in SKILL_LIST_COLUMNS:
+            if column not in df.columns:
+                df[column] = [[] for _ in range(len(df))]
+                continue
+            
+            df[column], errors = decode_list_column(df[column])
+            if errors:
+                print(f"⚠️  {errors} valeurs illisibles dans '{column}' (ignorées)")
+        
+        df.attrs['skill_columns_decoded'] = True
+        return df
+    
+    def validate_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Contrôle les lignes avant les insertions groupées : une seule valeur
+        invalide ferait échouer tout un executemany (donc tout le chargement),
+        et INSERT OR IGNORE écarterait sans le dire une offre incomplète.
+        
+        - champ obligatoire manquant, compétence non textuelle -> ligne rejetée
+        - nombre dans une colonne texte -> converti en texte (comme le ferait
+          SQLite), compétences numériques idem
+        - coordonnée non numérique -> NULL
+        
+        Les lignes rejetées sont affichées et conservées dans rejected_rows.
+        
+        Returns:
+            Lignes valides (compétences décodées)
+        """
+        df = self.decode_skill_columns(df)
+        reasons = pd.Series(None, index=df.index, dtype=object)
+        
+        for column in REQUIRED_COLUMNS:
+            missing = df[column].isna() if column in df.columns else pd.Series(True, index=df.index)
+            reasons = reasons.mask(reasons.isna() & missing, f"{column} manquant")
+        
+        def _is_skill(value) -> bool:
+            return isinstance(value, str) or (isinstance(value, (int, float)) and value == value)
+        
+        for column in SKILL_LIST_COLUMNS:
+            invalid = df[column].map(lambda skills: not all(_is_skill(skill) for skill in skills))
+            reasons = reasons.mask(reasons.isna() & invalid, f"compétence non textuelle dans {column}")
+        
+        rejected = reasons.notna()
+        if rejected.any():
+            rejected_now = pd.DataFrame({
+                'line': df.index[rejected],
+                'uid': _to_python(df.loc[rejected, 'uid']) if 'uid' in df.columns else None,
+                'reason': reasons[rejected].tolist()
+            })
+            self.rejected_rows = pd.concat([self.rejected_rows, rejected_now], ignore_index=True)
+            self.stats['rows_rejected'] += len(rejected_now)
+            
+            print(f"⚠️  {len(rejected_now)} lignes rejetées :")
+            for reason, count in rejected_now['reason'].value_counts().items():
+                print(f"   • {reason} : {count}")
+            for line, uid, reason in rejected_now.head(MAX_REJECTED_SHOWN).itertuples(index=False):
+                print(f"     ligne {line} (uid {uid}) : {reason}")
+        
+        df = df[~rejected].copy()
+        
+        for column in TEXT_COLUMNS:
+            if column not in df.columns:
+                continue
+            values = df[column]
+            non_text = values.notna() & ~values.map(lambda v: isinstance(v, str))
+            if non_text.any():
+                df[column] = values.astype(object).where(~non_text, values.astype(str))
+        
+        for column in SKILL_LIST_COLUMNS:
+            df[column] = df[column].map(lambda skills: [str(skill) for skill in skills])
+        
+        for column in COORDINATE_COLUMNS:
+            if column not in df.columns:
+                continue
+            coordinates = pd.to_numeric(df[column], errors='coerce')
+            invalid = int((coordinates.isna() & df[column].notna()).sum())
+            if invalid:
+                print(f"⚠️  {invalid} valeurs non numériques dans '{column}' (ignorées)")
+            df[column] = coordinates
+        
+        return df
+    
     def load_dimensions(self, df: pd.DataFrame):
         print("\nChargement des dimensions...")
         
         # 1. dim_source
         sources = df['source'].dropna().unique()
-        for source in sources:
-            source_type = 'api' if 'france travail' in source.lower() else 'scraping'
-            self.conn.execute(
-                "INSERT OR IGNORE INTO dim_source (source_name, source_type) VALUES (?, ?)",
-                (source, source_type)
-            )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO dim_source (source_name, source_type) VALUES (?, ?)",
+            [(source, 'api' if 'france travail' in source.lower() else 'scraping')
+             for source in sources]
+        )
         print(f"{len(sources)} sources")
         
         # 2. dim_region
         regions = df[['region', 'region_lat', 'region_lon']].dropna().drop_duplicates('region')
-        for _, row in regions.iterrows():
-            self.conn.execute(
-                "INSERT OR IGNORE INTO dim_region (region_name, latitude, longitude) VALUES (?, ?, ?)",
-                (row['region'], row['region_lat'], row['region_lon'])
-            )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO dim_region (region_name, latitude, longitude) VALUES (?, ?, ?)",
+            _to_records(regions)
+        )
         print(f"{len(regions)} régions")
         
-        # 3. dim_company
+        # 3. dim_company (pas de contrainte UNIQUE : on filtre les existantes)
         companies = df['company'].dropna().unique()
-        for company in companies:
-            self.conn.execute(
-                "INSERT OR IGNORE INTO dim_company (company_name) VALUES (?)",
-                (company,)
-            )
+        known_companies = self._get_key_map("dim_company", "company_name")
+        self.conn.executemany(
+            "INSERT INTO dim_company (company_name) VALUES (?)",
+            [(company,) for company in companies if company not in known_companies]
+        )
         print(f"{len(companies)} entreprises")
         
         # 4. dim_contract
         contracts = df['contract_type'].dropna().unique()
-        for contract in contracts:
-            self.conn.execute(
-                "INSERT OR IGNORE INTO dim_contract (contract_type) VALUES (?)",
-                (contract,)
-            )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO dim_contract (contract_type) VALUES (?)",
+            [(contract,) for contract in contracts]
+        )
         print(f"{len(contracts)} types de contrat")
-        
-        self.conn.commit()
     
     def load_skills(self, df: pd.DataFrame):
         print("\nChargement des compétences...")
         
+        df = self.decode_skill_columns(df)
         all_skills = set()
         
-        for _, row in df.iterrows():
-            
-            if pd.notna(row.get('competences')):
-                try:
-                    competences = eval(row['competences']) if isinstance(row['competences'], str) else row['competences']
-                    for skill in competences:
-                        all_skills.add((skill, 'competences', 'unknown'))
-                except:
-                    pass
-            
-            # Savoir-être
-            if pd.notna(row.get('savoir_etre')):
-                try:
-                    savoir_etre = eval(row['savoir_etre']) if isinstance(row['savoir_etre'], str) else row['savoir_etre']
-                    for skill in savoir_etre:
-                        all_skills.add((skill, 'savoir_etre', 'unknown'))
-                except:
-                    pass
+        for skill_type in SKILL_LIST_COLUMNS:
+            for skills in df[skill_type]:
+                for skill in skills:
+                    all_skills.add((skill, skill_type, 'unknown'))
         
         # Insérer
-        for skill_name, skill_type, skill_category in all_skills:
-            self.conn.execute(
-                "INSERT OR IGNORE INTO dim_skill (skill_name, skill_type, skill_category) VALUES (?, ?, ?)",
-                (skill_name, skill_type, skill_category)
-            )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO dim_skill (skill_name, skill_type, skill_category) VALUES (?, ?, ?)",
+            all_skills
+        )
         
-        self.conn.commit()
         self.stats['skills_inserted'] = len(all_skills)
         print(f"{len(all_skills)} compétences uniques")
     
+    def _offer_rows(self, df: pd.DataFrame) -> list:
+        """
+        Lignes fact_offers (ordre OFFER_COLUMNS), clés étrangères résolues
+        en mémoire (une requête par dimension).
+        """
+        df = self.decode_skill_columns(df)
+        
+        source_keys = self._get_key_map("dim_source", "source_name")
+        region_keys = self._get_key_map("dim_region", "region_name")
+        company_keys = self._get_key_map("dim_company", "company_name")
+        contract_keys = self._get_key_map("dim_contract", "contract_type")
+        
+        def _column(name):
+            if name not in df.columns:
+                return [None] * len(df)
+            return _to_python(df[name])
+        
+        competences_count = df['competences'].map(len).tolist()
+        savoir_etre_count = df['savoir_etre'].map(len).tolist()
+        
+        content_hashes = (
+            df['content_hash'].tolist() if 'content_hash' in df.columns
+            else compute_content_hashes(df)
+        )
+        
+        return list(zip(
+            _column('uid'),
+            _column('offer_id'),
+            [source_keys.get(v) for v in _column('source')],
+            [region_keys.get(v) for v in _column('region')],
+            [company_keys.get(v) for v in _column('company')],
+            [contract_keys.get(v) for v in _column('contract_type')],
+            _column('title'),
+            _column('source_url'),
+            _column('location'),
+            _column('salary'),
+            _column('remote'),
+            _column('published_date'),
+            _column('description'),
+            [c + s for c, s in zip(competences_count, savoir_etre_count)],
+            competences_count,
+            savoir_etre_count,
+            content_hashes
+        ))
+    
     def load_offers(self, df: pd.DataFrame):
-        """Charge les offres dans fact_offers"""
+        """Charge les offres dans fact_offers (insertion groupée)"""
         print("\nChargement des offres...")
         
-        cursor = self.conn.cursor()
+        rows = self._offer_rows(df)
         
-        for idx, row in df.iterrows():
-            try:
-                # Récupérer les clés étrangères
-                source_key = self._get_key("dim_source", "source_name", row.get('source'))
-                region_key = self._get_key("dim_region", "region_name", row.get('region'))
-                company_key = self._get_key("dim_company", "company_name", row.get('company'))
-                contract_key = self._get_key("dim_contract", "contract_type", row.get('contract_type'))
-                
-                # Compter les compétences
-                competences_count = 0
-                savoir_etre_count = 0
-                
-                if pd.notna(row.get('competences')):
-                    try:
-                        comp = eval(row['competences']) if isinstance(row['competences'], str) else row['competences']
-                        competences_count = len(comp)
-                    except:
-                        pass
-                
-                if pd.notna(row.get('savoir_etre')):
-                    try:
-                        se = eval(row['savoir_etre']) if isinstance(row['savoir_etre'], str) else row['savoir_etre']
-                        savoir_etre_count = len(se)
-                    except:
-                        pass
-                
-                skills_count = competences_count + savoir_etre_count
-                
-                # Insérer l'offre (si pas de doublon grâce à UNIQUE uid)
-                cursor.execute("""
-                    INSERT OR IGNORE INTO fact_offers 
-                    (uid, offer_id, source_key, region_key, company_key, contract_key,
-                     title, source_url, location, salary, remote, published_date, description,
-                     skills_count, competences_count, savoir_etre_count, added_by)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'import')
-                """, (
-                    row['uid'], row['offer_id'], source_key, region_key, company_key, contract_key,
-                    row['title'], row.get('source_url'), row.get('location'), 
-                    row.get('salary'), row.get('remote'), row.get('published_date'), 
-                    row.get('description'), skills_count, competences_count, savoir_etre_count
-                ))
-                
-                if cursor.rowcount > 0:
-                    self.stats['offers_inserted'] += 1
-                else:
-                    self.stats['offers_duplicates'] += 1
-                
-            except Exception as e:
-                print(f"Erreur ligne {idx}: {e}")
-                continue
-            
-            if (idx + 1) % 100 == 0:
-                print(f"   Traité {idx + 1}/{len(df)}")
+        # Insérer les offres (doublons ignorés grâce à UNIQUE uid)
+        cursor = self.conn.executemany(f"""
+            INSERT OR IGNORE INTO fact_offers 
+            ({', '.join(OFFER_COLUMNS)}, added_by)
+            VALUES ({', '.join('?' * len(OFFER_COLUMNS))}, 'import')
+        """, rows)
+        
+        self.stats['offers_inserted'] += cursor.rowcount
+        self.stats['offers_duplicates'] += len(rows) - cursor.rowcount
         
-        self.conn.commit()
         print(f"{self.stats['offers_inserted']} offres insérées")
         print(f"{self.stats['offers_duplicates']} doublons ignorés")
     
+    def update_offers(self, df: pd.DataFrame):
+        """Met à jour sur place (par uid) les offres déjà présentes"""
+        if len(df) == 0:
+            return
+        
+        print("\nMise à jour des offres modifiées...")
+        
+        # uid en premier dans OFFER_COLUMNS : passé en fin pour le WHERE.
+        # updated_at est mis à jour ici (le trigger de schema.sql peut manquer
+        # sur les bases créées autrement)
+        rows = [row[1:] + row[:1] for row in self._offer_rows(df)]
+        
+        cursor = self.conn.executemany(f"""
+            UPDATE OR IGNORE fact_offers
+            SET {', '.join(f'{col} = ?' for col in OFFER_COLUMNS[1:])},
+                updated_at = CURRENT_TIMESTAMP
+            WHERE uid = ?
+        """, rows)
+        
+        self.stats['offers_updated'] += cursor.rowcount
+        print(f"{self.stats['offers_updated']} offres mises à jour")
+    
     def load_offer_skills(self, df: pd.DataFrame):
        
         print("\nCréation des associations offre ↔ compétence...")
         
-        cursor = self.conn.cursor()
+        offer_keys = self._get_key_map("fact_offers", "uid", key_column="offer_key")
+        skill_keys = self._get_key_map("dim_skill", "skill_name")
         
-        for idx, row in df.iterrows():
-           
-            cursor.execute("SELECT offer_key FROM fact_offers WHERE uid = ?", (row['uid'],))
-            result = cursor.fetchone()
-            
-            if not result:
+        df = self.decode_skill_columns(df)
+        associations = []
+        
+        for uid, competences, savoir_etre in zip(
+            _to_python(df['uid']), df['competences'], df['savoir_etre']
+        ):
+            offer_key = offer_keys.get(uid)
+            if offer_key is None:
                 continue
             
-            offer_key = result[0]
-            
-            # Compétences techniques
-            if pd.notna(row.get('competences')):
-                try:
-                    competences = eval(row['competences']) if isinstance(row['competences'], str) else row['competences']
-                    for skill_name in competences:
-                        skill_key = self._get_key("dim_skill", "skill_name", skill_name)
-                        if skill_key:
-                            cursor.execute(
-                                "INSERT OR IGNORE INTO fact_offer_skill (offer_key, skill_key) VALUES (?, ?)",
-                                (offer_key, skill_key)
-                            )
-                            if cursor.rowcount > 0:
-                                self.stats['associations_created'] += 1
-                except:
-                    pass
-            
-            # Savoir-être
-            if pd.notna(row.get('savoir_etre')):
-                try:
-                    savoir_etre = eval(row['savoir_etre']) if isinstance(row['savoir_etre'], str) else row['savoir_etre']
-                    for skill_name in savoir_etre:
-                        skill_key = self._get_key("dim_skill", "skill_name", skill_name)
-                        if skill_key:
-                            cursor.execute(
-                                "INSERT OR IGNORE INTO fact_offer_skill (offer_key, skill_key) VALUES (?, ?)",
-                                (offer_key, skill_key)
-                            )
-                            if cursor.rowcount > 0:
-                                self.stats['associations_created'] += 1
-                except:
-                    pass
-            
-            if (idx + 1) % 100 == 0:
-                print(f"   Traité {idx + 1}/{len(df)}")
+            for skill_name in competences + savoir_etre:
+                skill_key = skill_keys.get(skill_name)
+                if skill_key:
+                    associations.append((offer_key, skill_key))
         
-        self.conn.commit()
+        cursor = self.conn.executemany(
+            "INSERT OR IGNORE INTO fact_offer_skill (offer_key, skill_key) VALUES (?, ?)",
+            associations
+        )
+        
+        self.stats['associations_created'] += cursor.rowcount
         print(f"{self.stats['associations_created']} associations créées")
     
-    def _get_key(self, table: str, column: str, value):
-        """Récupère la clé primaire d'une dimension"""
-        if pd.isna(value):
-            return None
+    def refresh_skill_aggregates(self, offer_keys: list = None):
+        """
+        Recalcule fact_offer_skill_agg pour les offres données (toutes si
+        None). À appeler après toute modification de fact_offer_skill.
+        """
+        if offer_keys is None:
+            self.conn.execute("DELETE FROM fact_offer_skill_agg")
+            self.conn.execute(
+                f"INSERT INTO fact_offer_skill_agg {SKILL_AGG_SELECT} GROUP BY fo.offer_key"
+            )
+        else:
+            self.conn.executemany(SKILL_AGG_REFRESH_QUERY, [(key,) for key in offer_keys])
+    
+    def rebuild_search_index(self):
+        """Reconstruit entièrement offers_fts depuis les tables"""
+        self.conn.execute("DELETE FROM offers_fts")
+        self.conn.execute("""
+            INSERT INTO offers_fts (rowid, title, description, company_name, skills)
+            SELECT fo.offer_key, fo.title, fo.description, dc.company_name, agg.all_skills
+            FROM fact_offers fo
+            LEFT JOIN dim_company dc ON fo.company_key = dc.company_key
+            LEFT JOIN fact_offer_skill_agg agg ON fo.offer_key = agg.offer_key
+        """)
+    
+    def optimize_search_index(self):
+        """Fusionne les segments de offers_fts après un chargement massif"""
+        with self.conn:
+            self.conn.execute("INSERT INTO offers_fts (offers_fts) VALUES ('optimize')")
+    
+    def _get_key_map(self, table: str, column: str, key_column: str = None) -> dict:
+        """
+        Charge {valeur: clé primaire} d'une table en une requête.
         
-        cursor = self.conn.cursor()
-        key_column = table.replace('dim_', '') + '_key'
-        cursor.execute(f"SELECT {key_column} FROM {table} WHERE {column} = ?", (value,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        En cas de valeurs en double (dim_company), la plus petite clé est
+        conservée.
+        """
+        key_column = key_column or table.replace('dim_', '') + '_key'
+        cursor = self.conn.execute(
+            f"SELECT {column}, {key_column} FROM {table} ORDER BY {key_column} DESC"
+        )
+        return dict(cursor.fetchall())
     
     def print_stats(self):
         """Affiche les statistiques finales"""
@@ -264,6 +711,11 @@ class ETLPipeline:
         print(f"• Savoir-être : {stats[4]:,}")
         print(f"Moyenne compétences/offre : {stats[5]:.1f}")
         print(f"\nAssociations offre ↔ compétence : {self.stats['associations_created']:,}")
+        if self.stats['rows_rejected']:
+            print(f"Lignes rejetées : {self.stats['rows_rejected']:,}")
+        if self.stats['offers_updated'] or self.stats['offers_unchanged']:
+            print(f"Offres mises à jour : {self.stats['offers_updated']:,}")
+            print(f"Offres inchangées : {self.stats['offers_unchanged']:,}")
         
         # Top 10 compétences
         print("\nTOP 10 COMPÉTENCES :")
@@ -277,6 +729,72 @@ class ETLPipeline:
         for region, count in cursor.fetchall():
             print(f"   • {region:30} {count:4} offres")
     
+    def snapshot_version(self) -> str:
+        """Version courante de la base (voir SNAPSHOT_VERSION_QUERY)"""
+        row = self.conn.execute(SNAPSHOT_VERSION_QUERY).fetchone()
+        return ":".join(str(value) for value in row)
+    
+    def export_snapshot(self, output_path: str):
+        """
+        Écrit la vue analytique des offres (offres + compétences agrégées)
+        dans un snapshot Parquet lu par l'application à la place de SQLite.
+        
+        Régions, entreprises et contrats sont encodés en dictionnaire, les
+        compétences stockées en listes. La version de la base est écrite
+        dans les métadonnées du fichier.
+        """
+        print("\nExport du snapshot Parquet...")
+        
+        df = pd.read_sql_query("""
+            SELECT 
+                fo.offer_key,
+                fo.uid,
+                fo.title,
+                fo.location,
+                fo.salary,
+                fo.remote,
+                fo.description,
+                fo.source_url,
+                dr.region_name,
+                dc.company_name,
+                dct.contract_type,
+                agg.competences,
+                agg.savoir_etre,
+                agg.all_skills
+            FROM fact_offers fo
+            LEFT JOIN fact_offer_skill_agg agg ON fo.offer_key = agg.offer_key
+            LEFT JOIN dim_region dr ON fo.region_key = dr.region_key
+            LEFT JOIN dim_company dc ON fo.company_key = dc.company_key
+            LEFT JOIN dim_contract dct ON fo.contract_key = dct.contract_key
+            ORDER BY fo.offer_key
+        """, self.conn)
+        
+        columns = {}
+        for column in df.columns:
+            if column in SNAPSHOT_LIST_COLUMNS:
+                columns[column] = pa.array(
+                    [value.split(',') if isinstance(value, str) else [] for value in df[column]],
+                    type=pa.list_(pa.string())
+                )
+            elif column in SNAPSHOT_DICTIONARY_COLUMNS:
+                columns[column] = pa.array(df[column], type=pa.string()).dictionary_encode()
+            elif column == 'offer_key':
+                columns[column] = pa.array(df[column], type=pa.int64())
+            else:
+                columns[column] = pa.array(df[column], type=pa.string(), from_pandas=True)
+        
+        table = pa.table(columns).replace_schema_metadata({
+            'snapshot_version': self.snapshot_version(),
+            'created_at': _now()
+        })
+        
+        # Écriture atomique : l'application peut lire l'ancien fichier pendant l'export
+        tmp_path = f"{output_path}.tmp"
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, output_path)
+        
+        print(f"{len(df):,} offres exportées dans {output_path}")
+    
     def close(self):
         """Ferme la connexion"""
         if self.conn:
@@ -290,6 +808,11 @@ def main():
     parser.add_argument('--db', default='jobs.db', help="Nom de la base de données")
     parser.add_argument('--schema', default='schema.sql', help="Fichier schema SQL")
     parser.add_argument('--recreate', action='store_true', help="Recréer la base (supprime l'existante)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ne charger que les offres nouvelles ou modifiées (sans recréer le schéma)")
+    parser.add_argument('--snapshot', default='offers_snapshot.parquet',
+                        help="Snapshot Parquet de la vue analytique lu par l'application")
+    parser.add_argument('--no-snapshot', action='store_true', help="Ne pas exporter le snapshot Parquet")
     
     args = parser.parse_args()
     
@@ -299,6 +822,7 @@ def main():
     print()
     print(f"Fichier source : {args.input}")
     print(f"Base de données : {args.db}")
+    print(f"Mode : {'incrémental' if args.incremental else 'complet'}")
     print()
     
     # Supprimer la base si --recreate
@@ -317,13 +841,17 @@ def main():
     
     try:
         etl.connect()
-        etl.create_schema(schema_file=args.schema)
-        etl.load_dimensions(df)
-        etl.load_skills(df)
-        etl.load_offers(df)
-        etl.load_offer_skills(df)
+        if args.incremental:
+            etl.ensure_schema(schema_file=args.schema)
+            etl.load_incremental(df, source_file=args.input)
+        else:
+            etl.create_schema(schema_file=args.schema)
+            etl.load(df, source_file=args.input)
         etl.print_stats()
         
+        if not args.no_snapshot:
+            etl.export_snapshot(args.snapshot)
+        
     except Exception as e:
         print(f"\nERREUR : {e}")
         import traceback
@@ -1,5 +1,8 @@
 
 -- Suppression des tables si elles existent
+DROP TABLE IF EXISTS offers_fts;
+DROP TABLE IF EXISTS fact_offer_profile;
+DROP TABLE IF EXISTS fact_offer_skill_agg;
 DROP TABLE IF EXISTS fact_offer_skill;
 DROP TABLE IF EXISTS fact_offers;
 DROP TABLE IF EXISTS dim_source;
@@ -8,6 +11,7 @@ DROP TABLE IF EXISTS dim_company;
 DROP TABLE IF EXISTS dim_contract;
 DROP TABLE IF EXISTS dim_skill;
 DROP TABLE IF EXISTS dim_date;
+DROP TABLE IF EXISTS etl_load_watermark;
 
 
 
@@ -96,6 +100,7 @@ CREATE TABLE fact_offers (
     savoir_etre_count INTEGER DEFAULT 0,
     
     -- ⭐ Métadonnées de traçabilité
+    content_hash TEXT,               -- empreinte du contenu source (ETL incrémental)
     added_by TEXT DEFAULT 'import',  -- 'import', 'manual', 'scraping_streamlit'
     added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -122,6 +127,53 @@ CREATE TABLE fact_offer_skill (
 
 
 
+-- Compétences agrégées par offre (matérialisées par l'ETL et l'application,
+-- évite les GROUP_CONCAT à la lecture)
+CREATE TABLE fact_offer_skill_agg (
+    offer_key INTEGER PRIMARY KEY,
+    competences TEXT,                -- compétences techniques, séparées par ','
+    savoir_etre TEXT,                -- savoir-être, séparés par ','
+    all_skills TEXT,                 -- toutes les compétences, séparées par ','
+    
+    FOREIGN KEY (offer_key) REFERENCES fact_offers(offer_key) ON DELETE CASCADE
+);
+
+
+
+-- Profils (topic modeling) et clusters des offres, écrits par les jobs
+-- nlp_analysis et à l'insertion des contributions (une ligne par offre et
+-- par version de modèle)
+CREATE TABLE fact_offer_profile (
+    offer_key INTEGER NOT NULL,
+    model_version TEXT NOT NULL,     -- version du modèle (manifeste de l'artefact)
+    model_kind TEXT NOT NULL,        -- 'topic_model', 'clustering'
+    dominant_profile INTEGER,        -- topic dominant (topic_model)
+    profile_probability REAL,
+    cluster_id INTEGER,              -- cluster K-Means (clustering)
+    coord_x REAL,                    -- projection 2D (clustering)
+    coord_y REAL,
+    
+    PRIMARY KEY (model_version, offer_key),
+    FOREIGN KEY (offer_key) REFERENCES fact_offers(offer_key) ON DELETE CASCADE
+);
+
+
+
+-- Historique des chargements ETL (watermark du mode incrémental)
+CREATE TABLE etl_load_watermark (
+    load_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mode TEXT NOT NULL,              -- 'full', 'incremental'
+    source_file TEXT,
+    started_at TIMESTAMP NOT NULL,
+    finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    offers_inserted INTEGER DEFAULT 0,
+    offers_updated INTEGER DEFAULT 0,
+    offers_unchanged INTEGER DEFAULT 0,
+    max_published_date TEXT
+);
+
+
+
 -- ⭐ Index UNIQUE sur uid (évite doublons)
 CREATE UNIQUE INDEX idx_fact_offers_uid_unique ON fact_offers(uid);
 
@@ -144,6 +196,63 @@ CREATE INDEX idx_dim_skill_category ON dim_skill(skill_category);
 CREATE INDEX idx_fact_offers_title ON fact_offers(title);
 CREATE INDEX idx_fact_offers_location ON fact_offers(location);
 
+-- Index de pagination (Explorer : tri par date d'ajout)
+CREATE INDEX idx_fact_offers_added ON fact_offers(added_at, offer_key);
+
+-- Index des profils (top N offres d'un topic, profils d'une offre)
+CREATE INDEX idx_fact_offer_profile_topic ON fact_offer_profile(model_version, dominant_profile, profile_probability DESC);
+CREATE INDEX idx_fact_offer_profile_offer ON fact_offer_profile(offer_key);
+
+-- ============================================================================
+-- RECHERCHE PLEIN TEXTE (FTS5)
+-- ============================================================================
+
+-- Index plein texte des offres (rowid = offer_key), synchronisé par triggers
+CREATE VIRTUAL TABLE offers_fts USING fts5(
+    title,
+    description,
+    company_name,
+    skills,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER trg_offers_fts_insert AFTER INSERT ON fact_offers BEGIN
+    INSERT INTO offers_fts (rowid, title, description, company_name, skills)
+    VALUES (
+        new.offer_key,
+        new.title,
+        new.description,
+        (SELECT company_name FROM dim_company WHERE company_key = new.company_key),
+        (SELECT all_skills FROM fact_offer_skill_agg WHERE offer_key = new.offer_key)
+    );
+END;
+
+CREATE TRIGGER trg_offers_fts_update AFTER UPDATE OF title, description, company_key ON fact_offers BEGIN
+    UPDATE offers_fts SET
+        title = new.title,
+        description = new.description,
+        company_name = (SELECT company_name FROM dim_company WHERE company_key = new.company_key)
+    WHERE rowid = new.offer_key;
+END;
+
+CREATE TRIGGER trg_offers_fts_delete AFTER DELETE ON fact_offers BEGIN
+    DELETE FROM offers_fts WHERE rowid = old.offer_key;
+END;
+
+-- Compétences : suivent fact_offer_skill_agg
+CREATE TRIGGER trg_offers_fts_skills_insert AFTER INSERT ON fact_offer_skill_agg BEGIN
+    UPDATE offers_fts SET skills = new.all_skills WHERE rowid = new.offer_key;
+END;
+
+CREATE TRIGGER trg_offers_fts_skills_update AFTER UPDATE ON fact_offer_skill_agg BEGIN
+    UPDATE offers_fts SET skills = new.all_skills WHERE rowid = new.offer_key;
+END;
+
+CREATE TRIGGER trg_offers_fts_skills_delete AFTER DELETE ON fact_offer_skill_agg BEGIN
+    UPDATE offers_fts SET skills = NULL WHERE rowid = old.offer_key;
+END;
+
 -- ============================================================================
 -- VUES UTILES
 -- ============================================================================
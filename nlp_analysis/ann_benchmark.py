@@ -0,0 +1,100 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "app" / "utils"))
+from vector_index import VectorIndex
+
+
+def load_doc2vec_vectors(vector_size: int, window: int, min_count: int):
+    """Vecteurs du modèle Doc2Vec pré-entraîné (nlp_analysis/embeddings.py)"""
+    from embedding_store import load_embedding_model
+
+    loaded = load_embedding_model('doc2vec', vector_size, window, min_count)
+    if loaded is None:
+        return None
+    model, manifest = loaded
+    keys = np.array([int(tag) for tag in model.dv.index_to_key], dtype=np.int64)
+    print(f"   Doc2Vec d={vector_size} (corpus {manifest['corpus_version']})")
+    return keys, np.asarray(model.dv.vectors)
+
+
+def synthetic_vectors(n: int, dim: int, n_topics: int = 50, seed: int = 42):
+    """Vecteurs regroupés en thèmes (mélange gaussien), à défaut de modèle"""
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(n_topics, dim))
+    vectors = topics[rng.integers(n_topics, size=n)] + 0.8 * rng.normal(size=(n, dim))
+    return np.arange(n, dtype=np.int64), vectors.astype(np.float32)
+
+
+def benchmark(index: VectorIndex, queries: np.ndarray, k: int, probes: list):
+    """Rappel@k et latence par requête de l'index IVF face au parcours exact"""
+    start = time.perf_counter()
+    exact = index.search_exact(queries, k)
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    truth = [{key for key, _ in result} for result in exact]
+
+    print(f"{'n_probe':>8} {'rappel@' + str(k):>10} {'ms/requête':>12} {'accélération':>13}")
+    print(f"{'exact':>8} {1.0:>10.3f} {exact_ms:>12.3f} {1.0:>12.1f}x")
+
+    for n_probe in probes:
+        start = time.perf_counter()
+        approx = index.search(queries, k, n_probe=n_probe)
+        approx_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        recall = np.mean([
+            len(expected & {key for key, _ in result}) / max(len(expected), 1)
+            for expected, result in zip(truth, approx)
+        ])
+        print(f"{n_probe:>8} {recall:>10.3f} {approx_ms:>12.3f} {exact_ms / approx_ms:>12.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rappel / latence de l'index IVF Doc2Vec")
+    parser.add_argument('--size', type=int, default=100, help="Dimension du modèle Doc2Vec")
+    parser.add_argument('--window', type=int, default=5, help="Fenêtre du modèle Doc2Vec")
+    parser.add_argument('--min-count', type=int, default=2, help="Fréquence minimale du modèle Doc2Vec")
+    parser.add_argument('--synthetic', type=int, default=0,
+                        help="Nombre de vecteurs synthétiques (au lieu du modèle Doc2Vec)")
+    parser.add_argument('--queries', type=int, default=200, help="Nombre de requêtes")
+    parser.add_argument('-k', type=int, default=10, help="Voisins par requête")
+    parser.add_argument('--probes', nargs='+', type=int, default=[1, 2, 4, 8, 16, 32],
+                        help="Valeurs de n_probe testées")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("⚡ INDEX DE SIMILARITÉ DOC2VEC - RAPPEL / LATENCE")
+    print("=" * 80)
+    print()
+
+    data = None if args.synthetic else load_doc2vec_vectors(args.size, args.window, args.min_count)
+    if data is None:
+        n = args.synthetic or 20000
+        print(f"   Vecteurs synthétiques: {n} x {args.size}")
+        data = synthetic_vectors(n, args.size)
+    keys, vectors = data
+
+    start = time.perf_counter()
+    index = VectorIndex.build(keys, vectors)
+    print(f"   Index: {len(index)} offres, {len(index.centroids)} listes "
+          f"({time.perf_counter() - start:.2f}s)")
+
+    # Insertion incrémentale : 1% d'offres supplémentaires sans réentraînement
+    rng = np.random.default_rng(0)
+    extra = vectors[rng.integers(len(vectors), size=max(1, len(vectors) // 100))]
+    extra = extra + 0.1 * rng.normal(size=extra.shape).astype(np.float32)
+    start = time.perf_counter()
+    index.add(np.arange(len(extra)) + keys.max() + 1, extra)
+    print(f"   Insertion: {len(extra)} offres ({(time.perf_counter() - start) * 1000:.1f}ms)")
+    print()
+
+    queries = vectors[rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)]
+    benchmark(index, queries, args.k, args.probes)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,59 @@
 import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import PCA, TruncatedSVD
 from sklearn.metrics import silhouette_score
 import matplotlib.pyplot as plt
 import seaborn as sns
-import pickle
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "app" / "utils"))
+from model_artifacts import CLUSTERING_LAYOUT, new_model_version, save_model_dict
+from offer_profiles import build_skill_documents, store_offer_profiles
+from topic_modeling import VOCABULARY_PARAMS, iter_skill_documents, stream_vocabulary
 
 
 class OfferClusterer:
-    """Clustering des offres d'emploi"""
+    """
+    Clustering des offres d'emploi.
+
+    Deux modes :
+    - 'full' : KMeans (n_init=10) + PCA sur la matrice densifiée
+    - 'minibatch' : MiniBatchKMeans (entraînable par lots avec partial_fit,
+      cf. fit_online) + TruncatedSVD sur la matrice creuse, pour les gros
+      corpus
+
+    Dans les deux cas, le silhouette est estimé sur un échantillon au-delà
+    de silhouette_sample documents, et predict() / assign() classent de
+    nouvelles offres sans réentraînement.
+    """
     
-    def __init__(self, n_clusters: int = 6):
+    def __init__(self, n_clusters: int = 6, mode: str = 'full',
+                 batch_size: int = 4096, silhouette_sample: int = 10000):
         """
         Args:
             n_clusters: Nombre de clusters
+            mode: 'full' ou 'minibatch'
+            batch_size: Taille des lots MiniBatchKMeans
+            silhouette_sample: Documents utilisés pour le score silhouette
         """
+        if mode not in ('full', 'minibatch'):
+            raise ValueError(f"Mode inconnu: {mode}")
+
         self.n_clusters = n_clusters
+        self.mode = mode
+        self.batch_size = batch_size
+        self.silhouette_sample = silhouette_sample
         self.vectorizer = None
         self.kmeans = None
         self.pca = None
         self.cluster_centers = None
         self.labels = None
         self.coords_2d = None
+        self.model_version = None
     
     def prepare_skill_documents(self, competences_lists: list, savoir_etre_lists: list):
         """Transforme les compétences en documents texte"""
@@ -61,47 +91,199 @@ class OfferClusterer:
         Args:
             skill_documents: Liste de documents (compétences)
         """
-        print(f"🎯 Clustering K-Means avec {self.n_clusters} clusters...")
+        print(f"🎯 Clustering K-Means ({self.mode}) avec {self.n_clusters} clusters...")
         print(f"   Documents: {len(skill_documents)}")
         
         # Vectorisation TF-IDF
         print("   🔢 Vectorisation TF-IDF...")
-        self.vectorizer = TfidfVectorizer(
-            max_features=200,
-            min_df=5,
-            max_df=0.8,
-            token_pattern=r'\b\w+\b'
-        )
+        self.vectorizer = self._new_vectorizer()
         
         tfidf_matrix = self.vectorizer.fit_transform(skill_documents)
         print(f"   ✅ Matrice: {tfidf_matrix.shape}")
         
         # K-Means
         print(f"   🎯 Clustering K-Means ({self.n_clusters} clusters)...")
-        self.kmeans = KMeans(
-            n_clusters=self.n_clusters,
-            random_state=42,
-            n_init=10,
-            max_iter=300
-        )
+        self.kmeans = self._new_kmeans()
         
         self.labels = self.kmeans.fit_predict(tfidf_matrix)
         
         # Score silhouette
-        silhouette = silhouette_score(tfidf_matrix, self.labels)
+        silhouette = self.silhouette(tfidf_matrix, self.labels)
         print(f"   ✅ Score silhouette: {silhouette:.3f}")
         
-        # PCA pour visualisation 2D
-        print("   📊 Réduction PCA (2D)...")
-        self.pca = PCA(n_components=2, random_state=42)
-        self.coords_2d = self.pca.fit_transform(tfidf_matrix.toarray())
+        # Réduction 2D pour visualisation
+        self.coords_2d = self.fit_projection(tfidf_matrix)
+    
+    def _new_vectorizer(self) -> TfidfVectorizer:
+        return TfidfVectorizer(**VOCABULARY_PARAMS)
+    
+    def _new_kmeans(self):
+        if self.mode == 'minibatch':
+            return MiniBatchKMeans(
+                n_clusters=self.n_clusters,
+                random_state=42,
+                batch_size=self.batch_size,
+                n_init=3
+            )
+        return KMeans(
+            n_clusters=self.n_clusters,
+            random_state=42,
+            n_init=10,
+            max_iter=300
+        )
+    
+    def _projection_input(self, tfidf_matrix):
+        """PCA a besoin d'une matrice dense, TruncatedSVD travaille sur la matrice creuse"""
+        return tfidf_matrix if self.mode == 'minibatch' else tfidf_matrix.toarray()
+    
+    def silhouette(self, tfidf_matrix, labels) -> float:
+        """
+        Score silhouette (O(n²)) : exact jusqu'à silhouette_sample documents,
+        estimé sur un échantillon aléatoire au-delà.
+        """
+        sample_size = self.silhouette_sample if tfidf_matrix.shape[0] > self.silhouette_sample else None
+        return silhouette_score(tfidf_matrix, labels, sample_size=sample_size, random_state=42)
+    
+    def fit_projection(self, tfidf_matrix) -> np.ndarray:
+        """
+        Ajuste la réduction 2D (PCA ou TruncatedSVD) et projette les centres.
+        
+        Returns:
+            Coordonnées 2D des documents (une seule densification en mode 'full')
+        """
+        if self.mode == 'minibatch':
+            print("   📊 Réduction TruncatedSVD (2D, matrice creuse)...")
+            self.pca = TruncatedSVD(n_components=2, random_state=42)
+        else:
+            print("   📊 Réduction PCA (2D)...")
+            self.pca = PCA(n_components=2, random_state=42)
+        coords = self.pca.fit_transform(self._projection_input(tfidf_matrix))
         
         variance = self.pca.explained_variance_ratio_
         print(f"   ✅ Variance expliquée: {variance[0]:.1%} + {variance[1]:.1%} = {variance.sum():.1%}")
         
         # Centres des clusters en 2D
-        cluster_centers_full = self.kmeans.cluster_centers_
-        self.cluster_centers = self.pca.transform(cluster_centers_full)
+        self.cluster_centers = self.pca.transform(self.kmeans.cluster_centers_)
+        return coords
+    
+    def fit_vocabulary_stream(self, db_path: str, chunk_size: int = 5000) -> int:
+        """
+        Fixe le vocabulaire TF-IDF (et l'idf) en un passage sur la base,
+        avec les mêmes règles que fit() sur tout le corpus.
+        
+        Returns:
+            Nombre de documents du corpus
+        """
+        vocabulary, idf, n_documents = stream_vocabulary(db_path, chunk_size)
+        self.vectorizer = TfidfVectorizer(vocabulary=vocabulary,
+                                          token_pattern=VOCABULARY_PARAMS['token_pattern'])
+        self.vectorizer.idf_ = idf
+        return n_documents
+    
+    def partial_fit(self, skill_documents: list):
+        """
+        Entraînement incrémental sur un lot de documents (mode 'minibatch').
+        
+        Le vocabulaire doit avoir été fixé sur tout le corpus
+        (fit_vocabulary_stream) : les lots ne font que mettre à jour les
+        centres. Appeler finalize() après le dernier lot pour ajuster la
+        projection 2D ; les labels s'obtiennent ensuite avec predict().
+        """
+        if self.mode != 'minibatch':
+            raise ValueError("partial_fit n'est disponible qu'en mode 'minibatch'")
+        if self.vectorizer is None:
+            raise ValueError("Vocabulaire non fixé : appeler fit_vocabulary_stream() avant partial_fit()")
+        
+        if self.kmeans is None:
+            self.kmeans = self._new_kmeans()
+        
+        self.kmeans.partial_fit(self.vectorizer.transform(skill_documents))
+        return self
+    
+    def fit_online(self, db_path: str, chunk_size: int = 5000, n_passes: int = 3,
+                   sample_size: int = 20000):
+        """
+        Entraînement par lots lus dans la base, sans charger tout le corpus :
+        vocabulaire (un passage), partial_fit sur chaque lot, puis finalize()
+        sur un échantillon aléatoire d'environ sample_size documents tiré
+        pendant le dernier passage.
+        
+        Args:
+            db_path: Base SQLite
+            chunk_size: Offres par lot
+            n_passes: Passages sur le corpus
+            sample_size: Taille de l'échantillon de la projection 2D
+        """
+        print(f"🎯 Clustering MiniBatchKMeans avec {self.n_clusters} clusters (lots de {chunk_size})...")
+        
+        print("   🔢 Vocabulaire TF-IDF...")
+        n_documents = self.fit_vocabulary_stream(db_path, chunk_size)
+        print(f"   ✅ {len(self.vectorizer.vocabulary)} compétences retenues, {n_documents} documents")
+        
+        rng = np.random.default_rng(42)
+        sample = []
+        for n_pass in range(n_passes):
+            print(f"   🎯 Passage {n_pass + 1}/{n_passes}...")
+            for _, documents in iter_skill_documents(db_path, chunk_size):
+                self.partial_fit(documents)
+                if n_pass == n_passes - 1:
+                    kept = np.flatnonzero(rng.random(len(documents)) < sample_size / max(n_documents, 1))
+                    sample.extend(documents[i] for i in kept)
+        
+        print(f"   📊 Échantillon de projection: {len(sample)} documents")
+        self.finalize(sample)
+        
+        silhouette = self.silhouette(self.vectorizer.transform(sample), self.labels)
+        print(f"   ✅ Score silhouette (échantillon): {silhouette:.3f}")
+        return self
+    
+    def finalize(self, sample_documents: list):
+        """
+        Termine un entraînement par lots : ajuste la projection 2D sur un
+        échantillon de documents (labels et coordonnées de l'échantillon
+        conservés pour la visualisation et save_model).
+        """
+        if self.kmeans is None:
+            raise ValueError("Aucun lot appris : appeler partial_fit() avant finalize()")
+        
+        tfidf_matrix = self.vectorizer.transform(sample_documents)
+        self.labels = self.kmeans.predict(tfidf_matrix)
+        self.coords_2d = self.fit_projection(tfidf_matrix)
+        return self
+    
+    def predict(self, skill_documents: list) -> np.ndarray:
+        """Cluster de nouvelles offres (sans réentraînement)"""
+        return self.kmeans.predict(self.vectorizer.transform(skill_documents))
+    
+    def assign(self, skill_documents: list) -> pd.DataFrame:
+        """
+        Cluster et coordonnées 2D de nouvelles offres (sans réentraînement).
+        
+        Returns:
+            DataFrame avec cluster_id, coord_x, coord_y
+        """
+        if self.pca is None:
+            raise ValueError("Projection 2D non ajustée : appeler finalize() après partial_fit()")
+        
+        tfidf_matrix = self.vectorizer.transform(skill_documents)
+        coords = self.pca.transform(self._projection_input(tfidf_matrix))
+        return pd.DataFrame({
+            'cluster_id': self.kmeans.predict(tfidf_matrix),
+            'coord_x': coords[:, 0],
+            'coord_y': coords[:, 1]
+        })
+    
+    def iter_cluster_assignments(self, db_path: str, chunk_size: int = 5000):
+        """
+        Clusters et coordonnées de toutes les offres de la base, lot par lot.
+        
+        Yields:
+            DataFrame offer_key, cluster_id, coord_x, coord_y
+        """
+        for offer_keys, documents in iter_skill_documents(db_path, chunk_size):
+            assignments = self.assign(documents)
+            assignments.insert(0, 'offer_key', offer_keys)
+            yield assignments
     
     def get_cluster_top_skills(self, n_skills: int = 10):
         """
@@ -215,32 +397,80 @@ class OfferClusterer:
             'coord_y': self.coords_2d[:, 1]
         })
     
-    def save_model(self, filepath: str):
-        """Sauvegarde le modèle"""
+    def save_model(self, directory: str) -> str:
+        """
+        Sauvegarde le modèle (manifeste JSON + .npy + estimateurs, cf.
+        utils/model_artifacts.py) sous une nouvelle version.
+        
+        Returns:
+            Version du modèle (clé des assignations dans fact_offer_profile)
+        """
+        if self.pca is None:
+            raise ValueError("Projection 2D non ajustée : appeler finalize() après partial_fit()")
+        
+        self.model_version = new_model_version('clustering')
         model_data = {
+            'model_version': self.model_version,
             'vectorizer': self.vectorizer,
             'kmeans': self.kmeans,
             'pca': self.pca,
             'labels': self.labels,
             'coords_2d': self.coords_2d,
             'cluster_centers': self.cluster_centers,
-            'n_clusters': self.n_clusters
+            'n_clusters': self.n_clusters,
+            'mode': self.mode
         }
         
-        with open(filepath, 'wb') as f:
-            pickle.dump(model_data, f)
+        save_model_dict(directory, 'clustering', model_data, CLUSTERING_LAYOUT)
         
-        print(f"✅ Modèle sauvegardé: {filepath}")
+        print(f"✅ Modèle sauvegardé: {directory} (version {self.model_version})")
+        return self.model_version
 
 
-if __name__ == "__main__":
-    import sqlite3
+def run_minibatch(args):
+    """Entraînement et assignation par lots, sans charger le corpus en mémoire"""
+    db_path = '../database/jobs.db'
     
-    print("=" * 80)
-    print("🎯 CLUSTERING K-MEANS - REGROUPEMENT DES OFFRES")
-    print("=" * 80)
-    print()
+    clusterer = OfferClusterer(n_clusters=6, mode='minibatch')
+    clusterer.fit_online(db_path, chunk_size=args.chunk_size, n_passes=args.passes,
+                         sample_size=args.sample_size)
+    
+    # Afficher clusters (effectifs de l'échantillon)
+    clusterer.print_clusters(n_skills=12)
+    
+    # Visualisation de l'échantillon
+    print("\n📊 Génération de la visualisation...")
+    clusterer.plot_clusters(save_path='clustering_visualization.png')
+    
+    model_version = clusterer.save_model('clustering_model')
     
+    # Assignation lot par lot : CSV écrit au fil de l'eau, fact_offer_profile
+    # en une transaction courte une fois tous les lots calculés
+    print("\n📊 Assignment des clusters aux offres...")
+    cluster_counts = {}
+    
+    def write_chunks():
+        for n_chunk, assignments in enumerate(clusterer.iter_cluster_assignments(db_path, args.chunk_size)):
+            assignments.to_csv('cluster_assignments.csv', mode='w' if n_chunk == 0 else 'a',
+                               header=(n_chunk == 0), index=False)
+            for cluster_id, count in assignments['cluster_id'].value_counts().items():
+                cluster_counts[cluster_id] = cluster_counts.get(cluster_id, 0) + count
+            yield assignments
+    
+    n_stored = store_offer_profiles(db_path, 'clustering', model_version, write_chunks(),
+                                    model_dir='clustering_model')
+    print(f"   ✅ {n_stored} offres enregistrées dans fact_offer_profile")
+    
+    n_offers = sum(cluster_counts.values())
+    print("\n📊 Distribution des clusters :")
+    for cluster_id, count in sorted(cluster_counts.items()):
+        print(f"   Cluster {cluster_id:<11} {count:4} offres ({count / n_offers * 100:.1f}%)")
+    
+    print("\n Clustering terminé !")
+
+
+def run_full(args):
+    """Entraînement sur tout le corpus chargé en mémoire"""
     # Charger données
     print("📂 Chargement des données...")
     conn = sqlite3.connect('../database/jobs.db')
@@ -266,16 +496,8 @@ if __name__ == "__main__":
     print()
     
     # Préparer documents
-    clusterer = OfferClusterer(n_clusters=6)
-    
-    skill_docs = []
-    for _, row in df.iterrows():
-        skills = []
-        if pd.notna(row['competences']):
-            skills.extend(row['competences'].split(','))
-        if pd.notna(row['savoir_etre']):
-            skills.extend(row['savoir_etre'].split(','))
-        skill_docs.append(" ".join(skills))
+    clusterer = OfferClusterer(n_clusters=6, mode='full')
+    skill_docs = build_skill_documents(df['competences'], df['savoir_etre'])
     
     # Clustering
     clusterer.fit(skill_docs)
@@ -303,7 +525,35 @@ if __name__ == "__main__":
         print(f"   {region:30} → Cluster {top_cluster} ({count} offres, {pct:.1f}%)")
     
     # Sauvegarder
-    clusterer.save_model('clustering_model.pkl')
+    model_version = clusterer.save_model('clustering_model')
     assignments.to_csv('cluster_assignments.csv', index=False)
     
-    print("\n Clustering terminé !")
\ No newline at end of file
+    assignments.insert(0, 'offer_key', df['offer_key'].to_numpy())
+    n_stored = store_offer_profiles('../database/jobs.db', 'clustering', model_version, [assignments],
+                                    model_dir='clustering_model')
+    print(f"   ✅ {n_stored} offres enregistrées dans fact_offer_profile")
+    
+    print("\n Clustering terminé !")
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Clustering K-Means des offres")
+    parser.add_argument('--mode', choices=['full', 'minibatch'], default='full',
+                        help="'minibatch' : MiniBatchKMeans par lots depuis la base + TruncatedSVD (gros corpus)")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="Offres par lot (minibatch)")
+    parser.add_argument('--passes', type=int, default=3, help="Passages sur le corpus (minibatch)")
+    parser.add_argument('--sample-size', type=int, default=20000,
+                        help="Documents de l'échantillon de projection 2D (minibatch)")
+    args = parser.parse_args()
+    
+    print("=" * 80)
+    print("🎯 CLUSTERING K-MEANS - REGROUPEMENT DES OFFRES")
+    print("=" * 80)
+    print()
+    
+    if args.mode == 'minibatch':
+        run_minibatch(args)
+    else:
+        run_full(args)
@@ -0,0 +1,36 @@
+import pickle
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "app" / "utils"))
+from config import CLUSTERING_MODEL_DIR, CLUSTERING_MODEL_PATH, TOPIC_MODEL_DIR, TOPIC_MODEL_PATH
+from model_artifacts import CLUSTERING_LAYOUT, TOPIC_MODEL_LAYOUT, save_model_dict
+
+
+# Anciens pickles -> répertoires manifeste JSON + .npy + estimateurs
+CONVERSIONS = [
+    (TOPIC_MODEL_PATH, TOPIC_MODEL_DIR, 'topic_model', TOPIC_MODEL_LAYOUT),
+    (CLUSTERING_MODEL_PATH, CLUSTERING_MODEL_DIR, 'clustering', CLUSTERING_LAYOUT),
+]
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print("📦 CONVERSION DES MODÈLES PICKLE")
+    print("=" * 80)
+    print()
+
+    for pickle_path, directory, kind, layout in CONVERSIONS:
+        if not pickle_path.exists():
+            print(f"   ⏭️  {pickle_path.name} absent")
+            continue
+
+        with open(pickle_path, 'rb') as f:
+            model_data = pickle.load(f)
+
+        save_model_dict(directory, kind, model_data, layout)
+        print(f"   ✅ {pickle_path.name} -> {directory.name}/")
+
+    print()
+    print("✅ Conversion terminée (les .pkl peuvent être supprimés)")
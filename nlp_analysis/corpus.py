@@ -0,0 +1,52 @@
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+
+# Modules de l'application (prétraitement partagé avec la page Intelligence)
+sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "app" / "utils"))
+from config import DATABASE_PATH, NLP_CORPUS_PATH
+from nlp_preprocessing import GEOGRAPHIC_STOPWORDS, preprocess_corpus
+from snapshot import snapshot_version
+
+
+CORPUS_QUERY = """
+    SELECT
+        fo.offer_key,
+        fo.title,
+        dc.company_name,
+        agg.all_skills,
+        dr.region_name,
+        dct.contract_type
+    FROM fact_offers fo
+    LEFT JOIN fact_offer_skill_agg agg ON fo.offer_key = agg.offer_key
+    LEFT JOIN dim_company dc ON fo.company_key = dc.company_key
+    LEFT JOIN dim_region dr ON fo.region_key = dr.region_key
+    LEFT JOIN dim_contract dct ON fo.contract_key = dct.contract_key
+    ORDER BY fo.offer_key
+"""
+
+
+def load_offer_corpus(db_path: Path = DATABASE_PATH) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    Offres de la base avec leur texte nettoyé et leurs tokens (même
+    prétraitement et même cache que la page Intelligence).
+
+    Returns:
+        (DataFrame offer_key, title, company_name, all_skills, region_name,
+        contract_type, text_clean, tokens ; version de la base)
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        df = pd.read_sql_query(CORPUS_QUERY, conn)
+        version = snapshot_version(conn)
+    finally:
+        conn.close()
+
+    prepared = preprocess_corpus(df, GEOGRAPHIC_STOPWORDS, NLP_CORPUS_PATH)
+    df['text_clean'] = prepared['text_clean']
+    df['tokens'] = prepared['tokens']
+    return df, version
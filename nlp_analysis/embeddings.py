@@ -0,0 +1,117 @@
+import argparse
+from itertools import product
+from pathlib import Path
+
+from gensim.models import Word2Vec
+from gensim.models.doc2vec import Doc2Vec, TaggedDocument
+
+from corpus import load_offer_corpus
+from config import DATABASE_PATH, EMBEDDINGS_DIR
+from embedding_store import EMBEDDING_EPOCHS, EMBEDDING_SEED, save_embedding_model
+
+
+class EmbeddingTrainer:
+    """Entraînement hors ligne des modèles Word2Vec / Doc2Vec de la page Intelligence"""
+
+    def __init__(self, db_path: Path = DATABASE_PATH, output_dir: Path = EMBEDDINGS_DIR, workers: int = 4):
+        """
+        Args:
+            db_path: Base SQLite des offres
+            output_dir: Répertoire des modèles
+            workers: Threads d'entraînement gensim
+        """
+        self.db_path = Path(db_path)
+        self.output_dir = Path(output_dir)
+        self.workers = workers
+        self.corpus_version = None
+        self.corpus_tokens = None
+        self.documents = None
+
+    def load_corpus(self):
+        """Charge les offres et leurs tokens (nlp_analysis/corpus.py)"""
+        print("📂 Chargement des données...")
+        df, self.corpus_version = load_offer_corpus(self.db_path)
+        df = df[df['tokens'].str.len() > 0]
+
+        self.corpus_tokens = [list(tokens) for tokens in df['tokens']]
+        # Documents étiquetés par offer_key : stables d'un entraînement à l'autre
+        self.documents = [
+            TaggedDocument(words=tokens, tags=[str(offer_key)])
+            for tokens, offer_key in zip(self.corpus_tokens, df['offer_key'])
+        ]
+
+        print(f"   ✅ {len(self.corpus_tokens)} documents tokenisés")
+        print(f"   Version du corpus: {self.corpus_version}")
+
+    def train_word2vec(self, vector_size: int, window: int, min_count: int) -> Path:
+        """Entraîne et sauvegarde un modèle Word2Vec"""
+        print(f"🧠 Word2Vec d={vector_size} w={window} m={min_count}...")
+        model = Word2Vec(
+            sentences=self.corpus_tokens,
+            vector_size=vector_size,
+            window=window,
+            min_count=min_count,
+            epochs=EMBEDDING_EPOCHS['word2vec'],
+            seed=EMBEDDING_SEED,
+            workers=self.workers,
+        )
+        path = save_embedding_model(
+            model, 'word2vec', vector_size, window, min_count,
+            self.corpus_version, len(self.corpus_tokens), self.output_dir
+        )
+        print(f"   ✅ {len(model.wv)} mots -> {path}")
+        return path
+
+    def train_doc2vec(self, vector_size: int, window: int, min_count: int) -> Path:
+        """Entraîne et sauvegarde un modèle Doc2Vec"""
+        print(f"🧠 Doc2Vec d={vector_size} w={window} m={min_count}...")
+        model = Doc2Vec(
+            documents=self.documents,
+            vector_size=vector_size,
+            window=window,
+            min_count=min_count,
+            epochs=EMBEDDING_EPOCHS['doc2vec'],
+            seed=EMBEDDING_SEED,
+            workers=self.workers,
+        )
+        path = save_embedding_model(
+            model, 'doc2vec', vector_size, window, min_count,
+            self.corpus_version, len(self.documents), self.output_dir
+        )
+        print(f"   ✅ {len(model.dv)} documents -> {path}")
+        return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement hors ligne des modèles Word2Vec / Doc2Vec")
+    parser.add_argument('--db', default=str(DATABASE_PATH), help="Base SQLite des offres")
+    parser.add_argument('--output', default=str(EMBEDDINGS_DIR), help="Répertoire des modèles")
+    parser.add_argument('--models', nargs='+', choices=['word2vec', 'doc2vec'],
+                        default=['word2vec', 'doc2vec'], help="Modèles à entraîner")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[100], help="Dimensions des vecteurs")
+    parser.add_argument('--windows', nargs='+', type=int, default=[5], help="Fenêtres de contexte")
+    parser.add_argument('--min-counts', nargs='+', type=int, default=[2], help="Fréquences minimales")
+    parser.add_argument('--workers', type=int, default=4, help="Threads d'entraînement")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🧠 EMBEDDINGS WORD2VEC / DOC2VEC - ENTRAÎNEMENT HORS LIGNE")
+    print("=" * 80)
+    print()
+
+    trainer = EmbeddingTrainer(args.db, args.output, args.workers)
+    trainer.load_corpus()
+    print()
+
+    for vector_size, window, min_count in product(args.sizes, args.windows, args.min_counts):
+        if 'word2vec' in args.models:
+            trainer.train_word2vec(vector_size, window, min_count)
+        if 'doc2vec' in args.models:
+            trainer.train_doc2vec(vector_size, window, min_count)
+
+    print()
+    print("✅ Entraînement terminé")
+
+
+if __name__ == "__main__":
+    main()
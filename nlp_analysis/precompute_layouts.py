@@ -0,0 +1,152 @@
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sklearn.cluster import DBSCAN, AgglomerativeClustering, KMeans
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.manifold import TSNE
+
+from corpus import load_offer_corpus
+from config import CLUSTER_LAYOUTS_PATH, DATABASE_PATH
+from cluster_layouts import CLUSTER_K_RANGE, layout_column
+
+
+class ClusterLayoutBuilder:
+    """
+    Précalcule, sur toutes les offres, les clusterings de la page
+    Intelligence (K-Means et hiérarchique pour chaque k, DBSCAN) et leur
+    projection t-SNE 2D, avec les mêmes paramètres que la page.
+    """
+
+    def __init__(self, max_features: int = 100, max_hierarchical: int = 20000, random_state: int = 42):
+        """
+        Args:
+            max_features: Vocabulaire TF-IDF
+            max_hierarchical: Au-delà, le clustering hiérarchique (mémoire
+                O(n²)) est calculé sur un échantillon puis étendu aux autres
+                offres par centroïde le plus proche
+            random_state: Graine (K-Means, t-SNE, échantillon)
+        """
+        self.max_features = max_features
+        self.max_hierarchical = max_hierarchical
+        self.random_state = random_state
+        self.X = None
+
+    def vectorize(self, texts: pd.Series):
+        """TF-IDF identique à celui de la page (100 termes, stopwords anglais)"""
+        vectorizer = TfidfVectorizer(max_features=self.max_features, stop_words="english")
+        self.X = vectorizer.fit_transform(texts)
+        return self.X
+
+    def layout(self) -> np.ndarray:
+        """Projection t-SNE 2D (une seule pour tous les algorithmes)"""
+        perplexity = min(30, self.X.shape[0] - 1)
+        tsne = TSNE(n_components=2, random_state=self.random_state, perplexity=perplexity)
+        return tsne.fit_transform(self.X.toarray())
+
+    def kmeans(self, n_clusters: int) -> np.ndarray:
+        model = KMeans(n_clusters=n_clusters, random_state=self.random_state, n_init=10)
+        return model.fit_predict(self.X)
+
+    def hierarchical(self, n_clusters: int) -> np.ndarray:
+        n = self.X.shape[0]
+        if n <= self.max_hierarchical:
+            return AgglomerativeClustering(n_clusters=n_clusters).fit_predict(self.X.toarray())
+
+        rng = np.random.default_rng(self.random_state)
+        sample = rng.choice(n, size=self.max_hierarchical, replace=False)
+        X_sample = self.X[sample].toarray()
+        sample_labels = AgglomerativeClustering(n_clusters=n_clusters).fit_predict(X_sample)
+
+        centroids = np.vstack([X_sample[sample_labels == c].mean(axis=0) for c in range(n_clusters)])
+        distances = (
+            np.asarray(self.X.multiply(self.X).sum(axis=1))
+            - 2 * (self.X @ centroids.T)
+            + (centroids ** 2).sum(axis=1)
+        )
+        labels = np.asarray(distances).argmin(axis=1)
+        labels[sample] = sample_labels
+        return labels
+
+    def dbscan(self) -> np.ndarray:
+        return DBSCAN(eps=0.5, min_samples=5).fit_predict(self.X)
+
+    def build(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Args:
+            df: Offres (offer_key, text_clean)
+
+        Returns:
+            DataFrame offer_key, x, y + une colonne de labels par algorithme et k
+        """
+        print(f"🔢 TF-IDF sur {len(df)} offres...")
+        self.vectorize(df['text_clean'])
+
+        print("🗺️  t-SNE 2D...")
+        start = time.time()
+        coords = self.layout()
+        print(f"   ✅ {time.time() - start:.1f}s")
+
+        result = pd.DataFrame({
+            'offer_key': df['offer_key'].to_numpy(dtype=np.int64),
+            'x': coords[:, 0].astype(np.float32),
+            'y': coords[:, 1].astype(np.float32),
+        })
+
+        for n_clusters in CLUSTER_K_RANGE:
+            print(f"🎯 k={n_clusters} : K-Means, hiérarchique...")
+            result[layout_column('K-Means', n_clusters)] = self.kmeans(n_clusters).astype(np.int16)
+            result[layout_column('Hierarchical', n_clusters)] = self.hierarchical(n_clusters).astype(np.int16)
+
+        print("🎯 DBSCAN...")
+        result[layout_column('DBSCAN', 0)] = self.dbscan().astype(np.int16)
+
+        return result
+
+
+def save_cluster_layouts(layouts: pd.DataFrame, dataset_version: str, output_path: Path):
+    """Écrit les résultats en Parquet, avec la version de la base (écriture atomique)"""
+    table = pa.Table.from_pandas(layouts, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        'dataset_version': dataset_version or '',
+    })
+
+    tmp_path = f"{output_path}.tmp"
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Précalcul des clusterings et de la projection t-SNE")
+    parser.add_argument('--db', default=str(DATABASE_PATH), help="Base SQLite des offres")
+    parser.add_argument('--output', default=str(CLUSTER_LAYOUTS_PATH), help="Fichier Parquet de sortie")
+    parser.add_argument('--max-hierarchical', type=int, default=20000,
+                        help="Taille max. du clustering hiérarchique exact")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🌳 CLUSTERINGS + PROJECTION t-SNE - PRÉCALCUL")
+    print("=" * 80)
+    print()
+
+    print("📂 Chargement des données...")
+    df, version = load_offer_corpus(args.db)
+    print(f"   ✅ {len(df)} offres (version {version})")
+    print()
+
+    builder = ClusterLayoutBuilder(max_hierarchical=args.max_hierarchical)
+    layouts = builder.build(df)
+
+    save_cluster_layouts(layouts, version, args.output)
+    print()
+    print(f"✅ Résultats sauvegardés: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
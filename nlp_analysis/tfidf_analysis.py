@@ -1,22 +1,60 @@
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
 from collections import defaultdict
 import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "app" / "utils"))
+from grouped_tfidf import GroupedTFIDF
 
 
 class RegionalTFIDF:
-    """Analyse TF-IDF par région"""
+    """
+    Analyse TF-IDF par région (ou par contrat, source, mois...) : un seul
+    TF-IDF ajusté sur tout le corpus, agrégé par groupe (utils/grouped_tfidf.py)
+    """
     
-    def __init__(self, max_features: int = 50):
+    def __init__(self, max_features: int = None, n_terms: int = 20, min_offers: int = 5):
         """
         Args:
-            max_features: Nombre de termes à extraire par région
+            max_features: Taille maximale du vocabulaire commun (tout le corpus)
+            n_terms: Nombre de termes à extraire par groupe
+            min_offers: Nombre minimal d'offres d'un groupe
         """
         self.max_features = max_features
-        self.vectorizers = {}
+        self.n_terms = n_terms
+        self.min_offers = min_offers
+        self.engine = None
+        self.group_terms = {}
         self.regional_terms = {}
     
+    def fit(self, df: pd.DataFrame, text_column: str = 'skills'):
+        """Ajuste le TF-IDF commun sur tous les textes du corpus"""
+        self.engine = GroupedTFIDF(max_features=self.max_features).fit(df[text_column])
+        print(f"   Vocabulaire commun: {len(self.engine.feature_names)} termes "
+              f"({self.engine.matrix.shape[0]} offres)")
+    
+    def analyze_by(self, df: pd.DataFrame, group_column: str, text_column: str = 'skills'):
+        """
+        Termes caractéristiques de chaque valeur d'une colonne de regroupement
+        (le TF-IDF n'est ajusté qu'au premier appel).
+        
+        Args:
+            df: DataFrame avec group_column et text_column
+            group_column: Clé de regroupement ('region', 'contract_type', 'month'...)
+            text_column: Nom de la colonne contenant le texte
+        
+        Returns:
+            Dict {groupe: [(terme, score), ...]}
+        """
+        if self.engine is None:
+            self.fit(df, text_column)
+        
+        terms = self.engine.top_terms(df[group_column], n_terms=self.n_terms, min_size=self.min_offers)
+        self.group_terms[group_column] = terms
+        return terms
+    
     def analyze_by_region(self, df: pd.DataFrame, text_column: str = 'skills'):
         """
         Analyse TF-IDF par région.
@@ -29,46 +67,9 @@ class RegionalTFIDF:
         print(f"   Colonne analysée: {text_column}")
         print()
         
-        regions = df['region'].dropna().unique()
-        print(f"   Régions détectées: {len(regions)}")
+        print(f"   Régions détectées: {df['region'].nunique()}")
         
-        for region in regions:
-            # Filtrer les offres de cette région
-            region_df = df[df['region'] == region]
-            
-            if len(region_df) < 5:
-                continue
-            
-            # Combiner tous les textes de la région
-            region_texts = region_df[text_column].dropna().tolist()
-            
-            if not region_texts:
-                continue
-            
-            # TF-IDF pour cette région
-            vectorizer = TfidfVectorizer(
-                max_features=self.max_features,
-                min_df=2,
-                token_pattern=r'\b\w+\b'
-            )
-            
-            try:
-                tfidf_matrix = vectorizer.fit_transform(region_texts)
-                
-                # Moyenne TF-IDF par terme
-                mean_tfidf = tfidf_matrix.mean(axis=0).A1
-                feature_names = vectorizer.get_feature_names_out()
-                
-                # Trier par score TF-IDF
-                top_indices = mean_tfidf.argsort()[-20:][::-1]
-                top_terms = [(feature_names[i], mean_tfidf[i]) for i in top_indices]
-                
-                self.regional_terms[region] = top_terms
-                self.vectorizers[region] = vectorizer
-                
-            except Exception as e:
-                print(f"   ⚠️  Erreur pour {region}: {e}")
-                continue
+        self.regional_terms = self.analyze_by(df, 'region', text_column)
         
         print(f"   ✅ {len(self.regional_terms)} régions analysées")
     
@@ -196,14 +197,16 @@ if __name__ == "__main__":
         SELECT 
             fo.offer_key,
             fo.title,
-            GROUP_CONCAT(ds.skill_name) as skills,
-            dr.region_name as region
+            agg.all_skills as skills,
+            dr.region_name as region,
+            dct.contract_type,
+            dso.source_name as source,
+            substr(fo.published_date, 1, 7) as month
         FROM fact_offers fo
-        LEFT JOIN fact_offer_skill fos ON fo.offer_key = fos.offer_key
-        LEFT JOIN dim_skill ds ON fos.skill_key = ds.skill_key
+        LEFT JOIN fact_offer_skill_agg agg ON fo.offer_key = agg.offer_key
         LEFT JOIN dim_region dr ON fo.region_key = dr.region_key
-        WHERE dr.region_name IS NOT NULL
-        GROUP BY fo.offer_key
+        LEFT JOIN dim_contract dct ON fo.contract_key = dct.contract_key
+        LEFT JOIN dim_source dso ON fo.source_key = dso.source_key
     """
     
     df = pd.read_sql_query(query, conn)
@@ -213,7 +216,7 @@ if __name__ == "__main__":
     print()
     
     # Analyse TF-IDF
-    analyzer = RegionalTFIDF(max_features=50)
+    analyzer = RegionalTFIDF()
     analyzer.analyze_by_region(df, text_column='skills')
     
     # Afficher résultats
@@ -249,6 +252,16 @@ if __name__ == "__main__":
     if 'Île-de-France' in analyzer.regional_terms and 'Auvergne-Rhône-Alpes' in analyzer.regional_terms:
         analyzer.compare_regions('Île-de-France', 'Auvergne-Rhône-Alpes', n_terms=15)
     
+    # Autres regroupements, sur le même TF-IDF
+    print("\n" + "=" * 80)
+    print("📑 TERMES CARACTÉRISTIQUES PAR CONTRAT, SOURCE ET MOIS")
+    print("=" * 80)
+    
+    for group_column in ['contract_type', 'source', 'month']:
+        for group, terms in analyzer.analyze_by(df, group_column).items():
+            print(f"   {str(group):30} → {', '.join(term for term, _ in terms[:8])}")
+        print()
+    
     # Export
     analyzer.export_results('regional_tfidf_results.json')
     
@@ -1,9 +1,98 @@
 import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
-from sklearn.decomposition import LatentDirichletAllocation, NMF
-import pickle
+from sklearn.decomposition import LatentDirichletAllocation, NMF, MiniBatchNMF
+from collections import Counter
+from typing import Iterator, Tuple
+import sqlite3
+import shutil
+import sys
 import ast
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "app" / "utils"))
+from model_artifacts import TOPIC_MODEL_LAYOUT, load_artifact, new_model_version, save_artifact, save_model_dict
+from offer_profiles import build_skill_documents, store_offer_profiles
+from snapshot import snapshot_version
+
+
+# Compétences par offre, lues par lots (pagination par offer_key)
+SKILL_DOCUMENTS_QUERY = """
+    SELECT
+        fo.offer_key,
+        agg.competences,
+        agg.savoir_etre
+    FROM fact_offers fo
+    LEFT JOIN fact_offer_skill_agg agg ON fo.offer_key = agg.offer_key
+    WHERE fo.offer_key > ?
+    ORDER BY fo.offer_key
+    LIMIT ?
+"""
+
+# Paramètres du vocabulaire (identiques au mode batch)
+VOCABULARY_PARAMS = dict(max_features=200, min_df=5, max_df=0.8, token_pattern=r'\b\w+\b')
+
+
+def iter_skill_documents(db_path: str, chunk_size: int = 5000,
+                         after: int = 0) -> Iterator[Tuple[np.ndarray, list]]:
+    """
+    Parcourt les documents de compétences de la base par lots, sans
+    charger tout le corpus.
+
+    Args:
+        db_path: Base SQLite
+        chunk_size: Offres par lot
+        after: Reprendre après cet offer_key
+
+    Yields:
+        (offer_keys, documents) de chaque lot
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        while True:
+            chunk = pd.read_sql_query(SKILL_DOCUMENTS_QUERY, conn, params=(after, chunk_size))
+            if chunk.empty:
+                break
+            yield chunk['offer_key'].to_numpy(), build_skill_documents(chunk['competences'], chunk['savoir_etre'])
+            after = int(chunk['offer_key'].iloc[-1])
+    finally:
+        conn.close()
+
+
+def stream_vocabulary(db_path: str, chunk_size: int = 5000) -> Tuple[list, np.ndarray, int]:
+    """
+    Vocabulaire du corpus en un passage sur la base, sans le charger en
+    mémoire (mêmes règles que CountVectorizer avec VOCABULARY_PARAMS :
+    min_df, max_df, puis max_features par fréquence).
+    
+    Returns:
+        (vocabulaire trié, idf de chaque terme comme TfidfVectorizer
+        avec smooth_idf, nombre de documents)
+    """
+    analyzer = CountVectorizer(token_pattern=VOCABULARY_PARAMS['token_pattern']).build_analyzer()
+    term_counts, doc_counts = Counter(), Counter()
+    n_documents = 0
+    
+    for _, documents in iter_skill_documents(db_path, chunk_size):
+        n_documents += len(documents)
+        for document in documents:
+            terms = analyzer(document)
+            term_counts.update(terms)
+            doc_counts.update(set(terms))
+    
+    max_doc_count = VOCABULARY_PARAMS['max_df'] * n_documents
+    candidates = [
+        term for term, df in doc_counts.items()
+        if VOCABULARY_PARAMS['min_df'] <= df <= max_doc_count
+    ]
+    # Les plus fréquents (égalités départagées par ordre alphabétique),
+    # vocabulaire trié comme CountVectorizer
+    candidates.sort(key=lambda term: (-term_counts[term], term))
+    vocabulary = sorted(candidates[:VOCABULARY_PARAMS['max_features']])
+    
+    df = np.array([doc_counts[term] for term in vocabulary], dtype=np.float64)
+    idf = np.log((1 + n_documents) / (1 + df)) + 1
+    return vocabulary, idf, n_documents
 
 
 class SkillTopicModeler:
@@ -21,6 +110,7 @@ class SkillTopicModeler:
         self.model = None
         self.feature_names = None
         self.topics = None
+        self.model_version = None
     
     def prepare_skill_documents(self, competences_lists: list, savoir_etre_lists: list):
         """
@@ -77,20 +167,12 @@ class SkillTopicModeler:
         # Vectorisation - CountVectorizer pour LDA
         print("   🔢 Vectorisation...")
         
+        # min_df=5 : compétence présente dans au moins 5 offres
+        # max_df=0.8 : pas plus de 80% des offres
         if self.method == 'lda':
-            self.vectorizer = CountVectorizer(
-                max_features=200,
-                min_df=5,        # Compétence présente dans au moins 5 offres
-                max_df=0.8,      # Pas plus de 80% des offres
-                token_pattern=r'\b\w+\b'
-            )
+            self.vectorizer = CountVectorizer(**VOCABULARY_PARAMS)
         else:  # NMF
-            self.vectorizer = TfidfVectorizer(
-                max_features=200,
-                min_df=5,
-                max_df=0.8,
-                token_pattern=r'\b\w+\b'
-            )
+            self.vectorizer = TfidfVectorizer(**VOCABULARY_PARAMS)
         
         matrix = self.vectorizer.fit_transform(skill_documents)
         self.feature_names = self.vectorizer.get_feature_names_out()
@@ -120,6 +202,138 @@ class SkillTopicModeler:
         
         self._extract_topics()
     
+    # ------------------------------------------------------------------------
+    # ENTRAÎNEMENT EN LIGNE (HORS MÉMOIRE)
+    # ------------------------------------------------------------------------
+    
+    def fit_vocabulary_stream(self, db_path: str, chunk_size: int = 5000) -> int:
+        """
+        Fixe le vocabulaire en un passage sur la base (mêmes règles que
+        CountVectorizer : min_df, max_df, max_features par fréquence).
+        
+        Returns:
+            Nombre de documents du corpus
+        """
+        vocabulary, idf, n_documents = stream_vocabulary(db_path, chunk_size)
+        
+        token_pattern = VOCABULARY_PARAMS['token_pattern']
+        if self.method == 'lda':
+            self.vectorizer = CountVectorizer(vocabulary=vocabulary, token_pattern=token_pattern)
+        else:  # NMF : idf calculé sur le corpus complet
+            self.vectorizer = TfidfVectorizer(vocabulary=vocabulary, token_pattern=token_pattern)
+            self.vectorizer.idf_ = idf
+        
+        self.feature_names = self.vectorizer.get_feature_names_out()
+        return n_documents
+    
+    def _new_online_model(self, n_documents: int):
+        if self.method == 'lda':
+            return LatentDirichletAllocation(
+                n_components=self.n_topics,
+                learning_method='online',
+                total_samples=n_documents,
+                random_state=42
+            )
+        # NMF n'a pas de partial_fit : variante mini-batch
+        return MiniBatchNMF(
+            n_components=self.n_topics,
+            random_state=42
+        )
+    
+    def fit_online(self, db_path: str, chunk_size: int = 5000, n_passes: int = 5,
+                   checkpoint_path: str = None, checkpoint_every: int = 10):
+        """
+        Entraînement en ligne : les documents sont lus par lots dans la base
+        et le modèle apprend avec partial_fit, sans charger tout le corpus.
+        
+        Args:
+            db_path: Base SQLite
+            chunk_size: Offres par lot
+            n_passes: Passages sur le corpus
+            checkpoint_path: Point de reprise (repris s'il correspond à la même
+                base et aux mêmes paramètres, supprimé en fin d'entraînement)
+            checkpoint_every: Lots entre deux sauvegardes du point de reprise
+        """
+        print(f"🧠 Découverte de {self.n_topics} profils (en ligne, lots de {chunk_size})...")
+        
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            corpus_version = snapshot_version(conn)
+        finally:
+            conn.close()
+        
+        state = {'pass': 0, 'after': 0}
+        checkpoint = load_artifact(checkpoint_path) if checkpoint_path else None
+        if checkpoint is not None and not self._can_resume(checkpoint, corpus_version, n_passes):
+            checkpoint = None
+        
+        if checkpoint is not None:
+            self.vectorizer = checkpoint['vectorizer']
+            self.feature_names = checkpoint['feature_names']
+            self.model = checkpoint['model']
+            n_documents = checkpoint['n_documents']
+            state = checkpoint['state']
+            print(f"   ↩️  Reprise: passage {state['pass'] + 1}, après l'offre {state['after']}")
+        else:
+            print("   🔢 Vocabulaire...")
+            n_documents = self.fit_vocabulary_stream(db_path, chunk_size)
+            self.model = self._new_online_model(n_documents)
+            print(f"   ✅ {len(self.feature_names)} compétences retenues, {n_documents} documents")
+        
+        for n_pass in range(state['pass'], n_passes):
+            print(f"   🎯 Passage {n_pass + 1}/{n_passes}...")
+            after = state['after'] if n_pass == state['pass'] else 0
+            
+            for n_chunk, (offer_keys, documents) in enumerate(
+                    iter_skill_documents(db_path, chunk_size, after), start=1):
+                self.model.partial_fit(self.vectorizer.transform(documents))
+                
+                if checkpoint_path and n_chunk % checkpoint_every == 0:
+                    self._save_checkpoint(checkpoint_path, n_documents, corpus_version,
+                                          {'pass': n_pass, 'after': int(offer_keys[-1])})
+            
+            if checkpoint_path and n_pass + 1 < n_passes:
+                self._save_checkpoint(checkpoint_path, n_documents, corpus_version,
+                                      {'pass': n_pass + 1, 'after': 0})
+        
+        # Entraînement complet : le prochain lancement repart de zéro
+        if checkpoint_path and Path(checkpoint_path).exists():
+            shutil.rmtree(checkpoint_path)
+        
+        print("   ✅ Modèle entraîné !")
+        self._extract_topics()
+    
+    def _can_resume(self, checkpoint, corpus_version: str, n_passes: int) -> bool:
+        """Le point de reprise correspond-il à cet entraînement (même base, mêmes paramètres) ?"""
+        state = checkpoint['state']
+        if checkpoint.get('corpus_version') != corpus_version:
+            print(f"   ⚠️  Point de reprise ignoré: base modifiée depuis "
+                  f"({checkpoint.get('corpus_version')} -> {corpus_version})")
+            return False
+        if checkpoint['method'] != self.method or checkpoint['n_topics'] != self.n_topics:
+            print("   ⚠️  Point de reprise ignoré: autre méthode ou nombre de profils")
+            return False
+        if state['pass'] >= n_passes:
+            print("   ⚠️  Point de reprise ignoré: entraînement déjà terminé")
+            return False
+        return True
+    
+    def _save_checkpoint(self, checkpoint_path: str, n_documents: int, corpus_version: str, state: dict):
+        """Point de reprise (même format que les modèles, remplacé en une fois)"""
+        save_artifact(
+            checkpoint_path,
+            'topic_model_checkpoint',
+            metadata={
+                'feature_names': self.feature_names,
+                'n_documents': n_documents,
+                'corpus_version': corpus_version,
+                'state': state,
+                'n_topics': self.n_topics,
+                'method': self.method
+            },
+            estimators={'vectorizer': self.vectorizer, 'model': self.model}
+        )
+    
     def _extract_topics(self, n_skills: int = 15):
         """Extrait les compétences principales de chaque profil"""
         self.topics = []
@@ -167,28 +381,58 @@ class SkillTopicModeler:
             
             print(f"   Compétences clés: {', '.join(skills_display)}")
     
-    def assign_profiles(self, skill_documents: list):
+    def assign_profiles(self, skill_documents: list, batch_size: int = None):
         """
         Assigne un profil dominant à chaque offre.
         
+        Args:
+            skill_documents: Documents de compétences
+            batch_size: Inférence par lots (mémoire bornée), tout d'un coup si None
+        
         Returns:
             DataFrame avec profile_id et probability
         """
-        matrix = self.vectorizer.transform(skill_documents)
-        doc_topic_dist = self.model.transform(matrix)
+        batch_size = batch_size or max(len(skill_documents), 1)
+        dominant_profiles, dominant_probs = [], []
         
-        dominant_profiles = doc_topic_dist.argmax(axis=1)
-        dominant_probs = doc_topic_dist.max(axis=1)
+        for start in range(0, len(skill_documents), batch_size):
+            matrix = self.vectorizer.transform(skill_documents[start:start + batch_size])
+            doc_topic_dist = self.model.transform(matrix)
+            dominant_profiles.append(doc_topic_dist.argmax(axis=1))
+            dominant_probs.append(doc_topic_dist.max(axis=1))
         
         return pd.DataFrame({
             'document_id': range(len(skill_documents)),
-            'dominant_profile': dominant_profiles,
-            'profile_probability': dominant_probs
+            'dominant_profile': np.concatenate(dominant_profiles) if dominant_profiles else np.array([], dtype=int),
+            'profile_probability': np.concatenate(dominant_probs) if dominant_probs else np.array([])
         })
     
-    def save_model(self, filepath: str):
-        """Sauvegarde le modèle"""
+    def iter_profile_assignments(self, db_path: str, chunk_size: int = 5000) -> Iterator[pd.DataFrame]:
+        """
+        Profils de toutes les offres de la base, lot par lot.
+        
+        Yields:
+            DataFrame offer_key, document_id, dominant_profile, profile_probability
+        """
+        n_seen = 0
+        for offer_keys, documents in iter_skill_documents(db_path, chunk_size):
+            assignments = self.assign_profiles(documents)
+            assignments['document_id'] += n_seen
+            assignments.insert(0, 'offer_key', offer_keys)
+            n_seen += len(documents)
+            yield assignments
+    
+    def save_model(self, directory: str) -> str:
+        """
+        Sauvegarde le modèle (manifeste JSON + .npy + estimateurs, cf.
+        utils/model_artifacts.py) sous une nouvelle version.
+        
+        Returns:
+            Version du modèle (clé des assignations dans fact_offer_profile)
+        """
+        self.model_version = new_model_version('topic_model')
         model_data = {
+            'model_version': self.model_version,
             'vectorizer': self.vectorizer,
             'model': self.model,
             'feature_names': self.feature_names,
@@ -196,19 +440,47 @@ class SkillTopicModeler:
             'n_topics': self.n_topics,
             'method': self.method
         }
-        with open(filepath, 'wb') as f:
-            pickle.dump(model_data, f)
-        print(f"✅ Modèle sauvegardé dans {filepath}")
+        save_model_dict(directory, 'topic_model', model_data, TOPIC_MODEL_LAYOUT)
+        print(f"✅ Modèle sauvegardé dans {directory} (version {self.model_version})")
+        return self.model_version
 
 
-if __name__ == "__main__":
-    import sqlite3
+def run_online(args):
+    """Entraînement et assignation par lots, sans charger le corpus en mémoire"""
+    db_path = '../database/jobs.db'
     
-    print("=" * 80)
-    print("🧠 DÉCOUVERTE DE PROFILS - TOPIC MODELING SUR COMPÉTENCES")
-    print("=" * 80)
-    print()
+    modeler = SkillTopicModeler(n_topics=6, method=args.method)
+    modeler.fit_online(db_path, chunk_size=args.chunk_size, n_passes=args.passes,
+                       checkpoint_path='skill_topic_model.ckpt')
+    modeler.print_topics(n_skills=12)
+    model_version = modeler.save_model('skill_topic_model')
     
+    # Assignation lot par lot : CSV écrit au fil de l'eau, fact_offer_profile
+    # en une transaction courte une fois tous les lots calculés
+    print("\n📊 Assignment des profils aux offres...")
+    profile_counts = Counter()
+    
+    def write_chunks():
+        for n_chunk, assignments in enumerate(modeler.iter_profile_assignments(db_path, args.chunk_size)):
+            assignments.to_csv('profile_assignments.csv', mode='w' if n_chunk == 0 else 'a',
+                               header=(n_chunk == 0), index=False)
+            profile_counts.update(assignments['dominant_profile'].tolist())
+            yield assignments
+    
+    n_stored = store_offer_profiles(db_path, 'topic_model', model_version, write_chunks(),
+                                    model_dir='skill_topic_model')
+    print(f"   ✅ {n_stored} offres enregistrées dans fact_offer_profile")
+    
+    n_offers = sum(profile_counts.values())
+    print("\n📊 Distribution des profils :")
+    for profile_id, count in sorted(profile_counts.items()):
+        print(f"   Profil {profile_id:<13} {count:4} offres ({count / n_offers * 100:.1f}%)")
+    
+    print("\n✅ Découverte de profils terminée !")
+
+
+def run_batch(args):
+    """Entraînement sur tout le corpus chargé en mémoire"""
     # Charger données
     print("📂 Chargement des données...")
     conn = sqlite3.connect('../database/jobs.db')
@@ -237,23 +509,13 @@ if __name__ == "__main__":
     # Préparer documents (compétences)
     print("📝 Préparation des documents de compétences...")
     
-    skill_docs = []
-    for _, row in df.iterrows():
-        skills = []
-        
-        if pd.notna(row['competences']):
-            skills.extend(row['competences'].split(','))
-        
-        if pd.notna(row['savoir_etre']):
-            skills.extend(row['savoir_etre'].split(','))
-        
-        skill_docs.append(" ".join(skills))
+    skill_docs = build_skill_documents(df['competences'], df['savoir_etre'])
     
     print(f"   ✅ {len(skill_docs)} documents créés")
     print()
     
     # Entraîner
-    modeler = SkillTopicModeler(n_topics=6, method='lda')
+    modeler = SkillTopicModeler(n_topics=6, method=args.method)
     modeler.fit(skill_docs)
     
     # Afficher profils
@@ -294,7 +556,34 @@ if __name__ == "__main__":
         print(f"   {region:30} → {profile_name}")
     
     # Sauvegarder
-    modeler.save_model('skill_topic_model.pkl')
+    model_version = modeler.save_model('skill_topic_model')
     profile_assignments.to_csv('profile_assignments.csv', index=False)
     
-    print("\n✅ Découverte de profils terminée !")
\ No newline at end of file
+    profile_assignments.insert(0, 'offer_key', df['offer_key'].to_numpy())
+    n_stored = store_offer_profiles('../database/jobs.db', 'topic_model', model_version,
+                                    [profile_assignments], model_dir='skill_topic_model')
+    print(f"   ✅ {n_stored} offres enregistrées dans fact_offer_profile")
+    
+    print("\n✅ Découverte de profils terminée !")
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Découverte de profils par topic modeling")
+    parser.add_argument('--method', choices=['lda', 'nmf'], default='lda', help="Modèle de topics")
+    parser.add_argument('--online', action='store_true',
+                        help="Entraînement en ligne par lots depuis la base (gros corpus)")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="Offres par lot (--online)")
+    parser.add_argument('--passes', type=int, default=5, help="Passages sur le corpus (--online)")
+    args = parser.parse_args()
+    
+    print("=" * 80)
+    print("🧠 DÉCOUVERTE DE PROFILS - TOPIC MODELING SUR COMPÉTENCES")
+    print("=" * 80)
+    print()
+    
+    if args.online:
+        run_online(args)
+    else:
+        run_batch(args)
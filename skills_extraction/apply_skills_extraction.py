@@ -1,20 +1,129 @@
 import argparse
+import os
 import pandas as pd
 from pathlib import Path
+from collections import Counter
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from skills_extractor import extract_skills_from_dataframe, get_global_skills_stats
+from skills_extractor import (
+    extract_skills_from_dataframe,
+    extract_skills_batch,
+    create_extraction_pool,
+    get_global_skills_stats,
+    SkillsStatsAccumulator,
+    DEFAULT_CACHE_PATH,
+)
+
+
+def read_input(path: str, chunksize: int = None):
+    """
+    Lit un fichier CSV ou JSONL.
+    
+    Avec chunksize, retourne un itérateur de DataFrames de taille bornée.
+    """
+    if Path(path).suffix.lower() in ('.jsonl', '.json'):
+        return pd.read_json(path, lines=True, chunksize=chunksize,
+                            dtype=False, convert_dates=False)
+    return pd.read_csv(path, chunksize=chunksize)
+
+
+def stream_extraction(args):
+    """
+    Extraction en streaming : lecture, extraction et écriture par paquets.
+    
+    Seul le paquet courant est en mémoire ; les statistiques globales sont
+    accumulées au fil de l'eau. Les colonnes du premier paquet fixent celles
+    du fichier de sortie (les clés JSONL peuvent varier d'un paquet à
+    l'autre). La sortie est écrite dans un fichier temporaire, renommé
+    seulement quand tout le fichier a été traité.
+    
+    Returns:
+        (SkillsStatsAccumulator, première ligne enrichie) ou (None, None)
+    """
+    accumulator = SkillsStatsAccumulator()
+    first_row = None
+    columns = None
+    tmp_output = f"{args.output}.tmp"
+    
+    executor = None
+    if args.workers > 1:
+        executor = create_extraction_pool(args.workers, cache_path=args.cache)
+    
+    try:
+        for chunk in read_input(args.input, chunksize=args.stream_rows):
+            if columns is None:
+                if args.text_column not in chunk.columns:
+                    print(f"Colonne '{args.text_column}' introuvable")
+                    print(f"Colonnes disponibles: {', '.join(chunk.columns)}")
+                    return None, None
+                columns = list(chunk.columns)
+            else:
+                extra = chunk.columns.difference(columns)
+                if len(extra) > 0:
+                    print(f"   ⚠️  Colonnes absentes du premier paquet ignorées: {', '.join(extra)}")
+                # Mêmes colonnes, dans le même ordre que l'en-tête
+                chunk = chunk.reindex(columns=columns)
+            
+            results = extract_skills_batch(
+                chunk[args.text_column].tolist(),
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                verbose=False,
+                executor=executor,
+                cache_path=args.cache,
+                cache_counters=args.cache_counters
+            )
+            results_df = pd.DataFrame(
+                results,
+                index=chunk.index,
+                columns=['competences', 'savoir_etre', 'skills_count', 'skills_json']
+            )
+            chunk_enriched = pd.concat([chunk, results_df], axis=1)
+            
+            # Écriture incrémentale (en-tête au premier paquet uniquement)
+            is_first = accumulator.n_offers == 0
+            chunk_enriched.to_csv(
+                tmp_output,
+                mode='w' if is_first else 'a',
+                header=is_first,
+                index=False,
+                encoding='utf-8'
+            )
+            
+            accumulator.update(chunk_enriched)
+            if first_row is None and len(chunk_enriched) > 0:
+                first_row = chunk_enriched.iloc[0]
+            
+            print(f"   Traité {accumulator.n_offers:,} offres")
+        
+        if os.path.exists(tmp_output):
+            os.replace(tmp_output, args.output)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        # Interruption ou erreur : pas de fichier de sortie tronqué
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
+    
+    return accumulator, first_row
 
 
 def main():
     parser = argparse.ArgumentParser(description="Extraction de compétences sur données scrapées")
-    parser.add_argument('-i', '--input', required=True, help="Fichier CSV d'entrée")
+    parser.add_argument('-i', '--input', required=True, help="Fichier CSV ou JSONL d'entrée")
     parser.add_argument('-o', '--output', help="Fichier CSV de sortie (défaut: input_with_skills.csv)")
     parser.add_argument('--text-column', default='description', help="Colonne contenant le texte")
+    parser.add_argument('--workers', type=int, default=1, help="Nombre de process d'extraction (défaut: 1)")
+    parser.add_argument('--chunk-size', type=int, default=500, help="Nombre d'offres par paquet (défaut: 500)")
+    parser.add_argument('--stream', action='store_true', help="Mode streaming (mémoire constante, écriture incrémentale)")
+    parser.add_argument('--stream-rows', type=int, default=10000, help="Lignes lues par paquet en mode streaming (défaut: 10000)")
+    parser.add_argument('--cache', nargs='?', const=str(DEFAULT_CACHE_PATH), default=None,
+                        help=f"Cache d'extraction persistant (défaut si activé: {DEFAULT_CACHE_PATH})")
     
     args = parser.parse_args()
+    args.cache_counters = Counter()
     
     if not args.output:
         input_path = Path(args.input)
@@ -26,30 +135,50 @@ def main():
     print()
     print(f"Fichier d'entrée  : {args.input}")
     print(f"Fichier de sortie : {args.output}")
+    print(f"Workers : {args.workers} (paquets de {args.chunk_size})")
+    if args.cache:
+        print(f"Cache d'extraction : {args.cache}")
     print()
     
-    # Charger données
-    print("Chargement...")
-    df = pd.read_csv(args.input)
-    print(f"{len(df):,} lignes chargées")
-    print()
-    
-    # Vérifier colonne description
-    if args.text_column not in df.columns:
-        print(f"Colonne '{args.text_column}' introuvable")
-        print(f"Colonnes disponibles: {', '.join(df.columns)}")
-        return
-    
-    # Extraction
-    df_enriched = extract_skills_from_dataframe(df, text_column=args.text_column)
+    if args.stream:
+        print(f"Mode streaming (paquets de {args.stream_rows:,} lignes)...")
+        accumulator, first_row = stream_extraction(args)
+        if accumulator is None:
+            return
+        
+        stats = accumulator.get_stats()
+        n_offers = accumulator.n_offers
+    else:
+        # Charger données
+        print("Chargement...")
+        df = read_input(args.input)
+        print(f"{len(df):,} lignes chargées")
+        print()
+        
+        # Vérifier colonne description
+        if args.text_column not in df.columns:
+            print(f"Colonne '{args.text_column}' introuvable")
+            print(f"Colonnes disponibles: {', '.join(df.columns)}")
+            return
+        
+        # Extraction
+        df_enriched = extract_skills_from_dataframe(
+            df,
+            text_column=args.text_column,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            cache_path=args.cache
+        )
+        
+        stats = get_global_skills_stats(df_enriched)
+        n_offers = len(df_enriched)
+        first_row = df_enriched.iloc[0] if n_offers > 0 else None
     
     # Stats globales
     print()
     print("STATISTIQUES GLOBALES")
     print("-" * 80)
     
-    stats = get_global_skills_stats(df_enriched)
-    
     print(f"Compétences techniques : {stats['total_competences']}")
     print(f"Savoir-être : {stats['total_savoir_etre']}")
     print(f"Mentions totales : {stats['total_mentions']:,}")
@@ -59,28 +188,34 @@ def main():
     print()
     print("TOP 15 COMPÉTENCES TECHNIQUES:")
     for skill, count in stats['top_competences'][:15]:
-        pct = (count / len(df_enriched)) * 100
+        pct = (count / n_offers) * 100
         print(f"   • {skill:25} {count:4} offres ({pct:.1f}%)")
     
     print()
     print("TOP 15 SAVOIR-ÊTRE:")
     for skill, count in stats['top_savoir_etre'][:15]:
-        pct = (count / len(df_enriched)) * 100
+        pct = (count / n_offers) * 100
         print(f"   • {skill:25} {count:4} offres ({pct:.1f}%)")
     
     # Sauvegarder
     print()
-    print(f"Sauvegarde dans : {args.output}")
+    if args.stream:
+        print(f"Sauvegardé au fil de l'eau dans : {args.output}")
+        if args.cache:
+            print(f"Cache : {args.cache_counters['hits']} hits / {args.cache_counters['misses']} misses")
+    else:
+        print(f"Sauvegarde dans : {args.output}")
+        df_enriched.to_csv(args.output, index=False, encoding='utf-8')
     
-    df_enriched.to_csv(args.output, index=False, encoding='utf-8')
+    print(f"Sauvegardé : {n_offers:,} lignes")
     
-    print(f"Sauvegardé : {len(df_enriched):,} lignes")
+    if first_row is None:
+        return
     
     # Aperçu
     print()
     print("APERÇU (première offre):")
     print("-" * 80)
-    first_row = df_enriched.iloc[0]
     print(f"Titre: {first_row.get('title', 'N/A')}")
     print(f"Compétences ({len(first_row['competences'])}): {', '.join(first_row['competences'][:10])}")
     if len(first_row['competences']) > 10:
@@ -0,0 +1,78 @@
+import argparse
+import json
+import time
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from skills_extractor import SkillsExtractor
+
+
+DEFAULT_INPUT = Path(__file__).parent.parent / "data" / "france_travail.jsonl"
+
+
+def load_descriptions(path: str, text_field: str = 'description') -> list:
+    """Charge les descriptions d'un fichier JSONL"""
+    descriptions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            descriptions.append(json.loads(line).get(text_field) or "")
+    return descriptions
+
+
+def run_matcher(matcher: str, descriptions: list, repeat: int = 1):
+    """
+    Exécute l'extraction et mesure le débit.
+
+    Returns:
+        (résultats du dernier passage, offres/seconde)
+    """
+    extractor = SkillsExtractor(matcher=matcher)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [extractor.extract(text) for text in descriptions]
+    elapsed = time.perf_counter() - start
+
+    return results, (len(descriptions) * repeat) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des moteurs d'extraction de compétences")
+    parser.add_argument('-i', '--input', default=str(DEFAULT_INPUT), help="Fichier JSONL d'offres")
+    parser.add_argument('--text-field', default='description', help="Champ contenant le texte")
+    parser.add_argument('--repeat', type=int, default=3, help="Nombre de passages sur le corpus")
+
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("BENCHMARK EXTRACTION DE COMPÉTENCES")
+    print("=" * 80)
+    print()
+
+    descriptions = load_descriptions(args.input, args.text_field)
+    print(f"{len(descriptions):,} offres chargées depuis {args.input}")
+    print()
+
+    reference, per_pattern_rate = run_matcher('per_pattern', descriptions, args.repeat)
+    results, single_pass_rate = run_matcher('single_pass', descriptions, args.repeat)
+
+    print(f"per_pattern : {per_pattern_rate:8.1f} offres/s")
+    print(f"single_pass : {single_pass_rate:8.1f} offres/s")
+    print(f"Accélération : x{single_pass_rate / per_pattern_rate:.1f}")
+    print()
+
+    mismatches = sum(1 for ref, res in zip(reference, results) if ref != res)
+    if mismatches:
+        print(f"⚠️  {mismatches} offres avec des résultats différents")
+        sys.exit(1)
+
+    print("Résultats identiques sur toutes les offres")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,20 @@
 import re
 import json
+import hashlib
+import sqlite3
+import threading
 from pathlib import Path
 from typing import List, Dict, Set, Tuple
 from dataclasses import dataclass
-from collections import defaultdict
+from collections import Counter, defaultdict
+
+
+# Version des règles d'extraction (confiance, normalisation) : à incrémenter
+# à chaque changement de logique pour invalider le cache d'extraction
+EXTRACTION_RULES_VERSION = 1
+
+# Emplacement par défaut du cache d'extraction persistant
+DEFAULT_CACHE_PATH = Path(__file__).parent / "extraction_cache.db"
 
 
 @dataclass
@@ -14,14 +25,127 @@ class Skill:
     confidence: float  
 
 
+class ExtractionCache:
+    """
+    Cache persistant (SQLite) des résultats d'extraction.
+    
+    Clé : hash du texte normalisé + empreinte du dictionnaire / des règles
+    + min_confidence. Une modification de skills_dict.json change
+    l'empreinte : les anciennes entrées ne sont plus servies et sont
+    purgées à l'ouverture.
+    """
+    
+    def __init__(self, cache_path, fingerprint: str, flush_every: int = 500):
+        self.cache_path = str(cache_path)
+        self.fingerprint = fingerprint
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        
+        self._pending = []
+        self._lock = threading.Lock()
+        
+        self.conn = sqlite3.connect(self.cache_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                text_hash TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                min_confidence REAL NOT NULL,
+                skills_json TEXT NOT NULL,
+                PRIMARY KEY (text_hash, fingerprint, min_confidence)
+            )
+        """)
+        # Entrées calculées avec un autre dictionnaire : jamais réutilisables
+        self.conn.execute("DELETE FROM extraction_cache WHERE fingerprint != ?", (fingerprint,))
+        self.conn.commit()
+    
+    @staticmethod
+    def hash_text(normalized_text: str) -> str:
+        return hashlib.sha256(normalized_text.encode('utf-8')).hexdigest()
+    
+    def get(self, text_hash: str, min_confidence: float):
+        """Retourne la liste de Skill en cache, ou None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT skills_json FROM extraction_cache "
+                "WHERE text_hash = ? AND fingerprint = ? AND min_confidence = ?",
+                (text_hash, self.fingerprint, min_confidence)
+            ).fetchone()
+            
+            if row is None:
+                # Entrée peut-être encore en attente d'écriture
+                row = next(
+                    ((skills_json,) for h, _, conf, skills_json in self._pending
+                     if h == text_hash and conf == min_confidence),
+                    None
+                )
+            
+            if row is None:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+        
+        return [Skill(*values) for values in json.loads(row[0])]
+    
+    def put(self, text_hash: str, min_confidence: float, skills: List[Skill]):
+        skills_json = json.dumps(
+            [[s.name, s.category, s.type, s.confidence] for s in skills],
+            ensure_ascii=False
+        )
+        
+        with self._lock:
+            self._pending.append((text_hash, self.fingerprint, min_confidence, skills_json))
+            should_flush = len(self._pending) >= self.flush_every
+        
+        if should_flush:
+            self.flush()
+    
+    def flush(self):
+        """Écrit les entrées en attente (une transaction)"""
+        with self._lock:
+            if not self._pending:
+                return
+            
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO extraction_cache "
+                "(text_hash, fingerprint, min_confidence, skills_json) VALUES (?, ?, ?, ?)",
+                self._pending
+            )
+            self.conn.commit()
+            self._pending = []
+    
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+    
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
 class SkillsExtractor:
 
     
-    def __init__(self, skills_dict_path: str = None):
+    def __init__(self, skills_dict_path: str = None, matcher: str = 'single_pass',
+                 cache_path: str = None):
         """
         Args:
             skills_dict_path: Chemin vers skills_dict.json
+            matcher: 'single_pass' (un seul balayage du texte pour toutes les
+                compétences) ou 'per_pattern' (un finditer par pattern)
+            cache_path: Base SQLite du cache d'extraction (None = sans cache,
+                voir DEFAULT_CACHE_PATH)
         """
+        if matcher not in ('single_pass', 'per_pattern'):
+            raise ValueError(f"Matcher inconnu: {matcher}")
+        self.matcher = matcher
+        
         if skills_dict_path is None:
             skills_dict_path = Path(__file__).parent / "skills_dict.json"
         
@@ -31,6 +155,33 @@ class SkillsExtractor:
         
         # Construire les patterns de recherche
         self._build_search_patterns()
+        self._build_single_pass_matcher()
+        
+        self.cache = ExtractionCache(cache_path, self.fingerprint()) if cache_path else None
+    
+    def fingerprint(self) -> str:
+        """
+        Empreinte du dictionnaire, des variantes générées et des règles.
+        """
+        rules = {
+            'version': EXTRACTION_RULES_VERSION,
+            'skills_data': self.skills_data,
+            'patterns': [
+                [literal, data['category'], data['type'], data.get('canonical')]
+                for literal, data in self.patterns.items()
+            ]
+        }
+        payload = json.dumps(rules, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def cache_stats(self) -> Dict:
+        """Compteurs hits / misses du cache (vide si pas de cache)"""
+        return self.cache.stats() if self.cache else {}
+    
+    def flush_cache(self):
+        """Écrit sur disque les entrées de cache en attente"""
+        if self.cache:
+            self.cache.flush()
     
     def _build_search_patterns(self):
         """
@@ -80,6 +231,107 @@ class SkillsExtractor:
                 'type': 'competences'
             }
     
+    def _build_single_pass_matcher(self):
+        """
+        Construit le moteur de recherche en un seul passage.
+        
+        Tous les libellés de self.patterns sont fusionnés dans un trie compilé
+        en une seule regex (lookahead) qui repère, en un balayage du texte,
+        chaque position où au moins une compétence commence. Les patterns
+        d'origine ne sont ensuite rejoués qu'à ces positions, ce qui garantit
+        des résultats identiques au mode 'per_pattern'.
+        """
+        self._pattern_items = list(self.patterns.items())
+        
+        # Libellé normalisé -> indices des patterns correspondants
+        self._patterns_by_literal = defaultdict(list)
+        trie = {}
+        
+        for idx, (literal, _) in enumerate(self._pattern_items):
+            folded = literal.lower()
+            self._patterns_by_literal[folded].append(idx)
+            
+            node = trie
+            for char in folded:
+                node = node.setdefault(char, {})
+            node[''] = True
+        
+        self._literal_lengths = sorted({len(lit) for lit in self._patterns_by_literal})
+        self._max_literal_length = self._literal_lengths[-1] if self._literal_lengths else 0
+        
+        # Les \b ne dépendent que du texte : celui d'ouverture est factorisé
+        # devant le trie, ceux de fermeture sont placés sur les feuilles
+        self._candidates_pattern = re.compile(
+            rf'(?=\b{self._trie_to_regex(trie)})', re.IGNORECASE
+        ) if trie else None
+    
+    @classmethod
+    def _trie_to_regex(cls, node: dict) -> str:
+        """Convertit un noeud du trie en regex (alternatives factorisées)"""
+        branches = [
+            re.escape(char) + cls._trie_to_regex(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if '' in node:
+            branches.append(r'\b')
+        
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+    
+    def _candidate_indices(self, text: str, pos: int):
+        """
+        Indices des patterns susceptibles de matcher à la position pos.
+        """
+        window = text[pos:pos + self._max_literal_length]
+        
+        # Caractères dont la casse ne se replie pas sur un seul caractère
+        # (ex: 'ſ', 'İ') : on rejoue tous les patterns pour rester exact
+        if not window.isascii() and not all(_is_simple_case(c) for c in window):
+            return range(len(self._pattern_items))
+        
+        window = window.lower()
+        indices = []
+        for length in self._literal_lengths:
+            if length > len(window):
+                break
+            indices.extend(self._patterns_by_literal.get(window[:length], ()))
+        return indices
+    
+    def _find_matches(self, text: str) -> Dict[int, list]:
+        """
+        Retourne {indice de pattern: [matches]} en un balayage du texte.
+        
+        Les matches d'un même pattern ne se chevauchent pas, comme avec
+        finditer.
+        """
+        matches_by_pattern = defaultdict(list)
+        
+        if self.matcher == 'per_pattern':
+            for idx, (_, pattern_data) in enumerate(self._pattern_items):
+                matches = list(pattern_data['pattern'].finditer(text))
+                if matches:
+                    matches_by_pattern[idx] = matches
+            return matches_by_pattern
+        
+        if self._candidates_pattern is None:
+            return matches_by_pattern
+        
+        last_end = {}
+        for candidate in self._candidates_pattern.finditer(text):
+            pos = candidate.start()
+            
+            for idx in self._candidate_indices(text, pos):
+                if pos < last_end.get(idx, 0):
+                    continue
+                
+                match = self._pattern_items[idx][1]['pattern'].match(text, pos)
+                if match:
+                    matches_by_pattern[idx].append(match)
+                    last_end[idx] = match.end()
+        
+        return matches_by_pattern
+    
     def _generate_variations(self, skill: str) -> List[str]:
         """
         Génère des variations courantes d'une compétence.
@@ -135,12 +387,30 @@ class SkillsExtractor:
         
         text = self._normalize_text(text)
         
+        if self.cache is not None:
+            text_hash = self.cache.hash_text(text)
+            cached = self.cache.get(text_hash, min_confidence)
+            if cached is not None:
+                return cached
+        
+        skills = self._extract_normalized(text, min_confidence)
+        
+        if self.cache is not None:
+            self.cache.put(text_hash, min_confidence, skills)
+        
+        return skills
+    
+    def _extract_normalized(self, text: str, min_confidence: float) -> List[Skill]:
+        """Extraction sur un texte déjà normalisé"""
         found_skills = {}
+        matches_by_pattern = self._find_matches(text)
         
-        for skill_name, pattern_data in self.patterns.items():
-            matches = pattern_data['pattern'].finditer(text)
+        # Parcours dans l'ordre des patterns : mêmes catégories et même
+        # ordre en cas d'égalité de confiance que le balayage par pattern
+        for idx in sorted(matches_by_pattern):
+            skill_name, pattern_data = self._pattern_items[idx]
             
-            for match in matches:
+            for match in matches_by_pattern[idx]:
                 confidence = self._calculate_confidence(match, text)
                 
                 if confidence < min_confidence:
@@ -227,7 +497,143 @@ class SkillsExtractor:
 
 
 
-def extract_skills_from_dataframe(df, text_column: str = 'description'):
+def _is_simple_case(char: str) -> bool:
+    """Vrai si la casse du caractère se replie sur un unique caractère stable"""
+    lower = char.lower()
+    return len(lower) == 1 and char.upper().lower() == lower
+
+
+def skills_to_record(skills: List[Skill]) -> Dict:
+    """
+    Convertit le résultat de extract() en colonnes d'enrichissement.
+    
+    Équivalent à extract() + extract_by_type() sans relancer l'extraction.
+    """
+    by_type = {'competences': [], 'savoir_etre': []}
+    for skill in skills:
+        by_type[skill.type].append(skill.name)
+    
+    return {
+        'competences': by_type['competences'],
+        'savoir_etre': by_type['savoir_etre'],
+        'skills_count': len(skills),
+        'skills_json': json.dumps([{
+            'name': s.name,
+            'category': s.category,
+            'type': s.type,
+            'confidence': s.confidence
+        } for s in skills], ensure_ascii=False)
+    }
+
+
+# Extracteur propre à chaque process du pool (construit une seule fois)
+_worker_extractor = None
+_worker_config = None
+
+
+def _init_worker(skills_dict_path: str = None, cache_path: str = None):
+    global _worker_extractor, _worker_config
+    _worker_extractor = SkillsExtractor(skills_dict_path, cache_path=cache_path)
+    _worker_config = (skills_dict_path, cache_path)
+
+
+def _extract_chunk(texts: List[str]) -> Tuple[List[Dict], Dict]:
+    before = _worker_extractor.cache_stats()
+    records = [skills_to_record(_worker_extractor.extract(text)) for text in texts]
+    
+    # Les process du pool peuvent s'arrêter sans atexit : écrire à chaque paquet
+    _worker_extractor.flush_cache()
+    after = _worker_extractor.cache_stats()
+    
+    counters = {key: after[key] - before[key] for key in ('hits', 'misses')} if after else {}
+    return records, counters
+
+
+def create_extraction_pool(workers: int, skills_dict_path: str = None, cache_path: str = None):
+    """
+    Crée un pool de process prêt pour extract_skills_batch(executor=...).
+    
+    Permet de réutiliser les mêmes workers (et leurs extracteurs) sur
+    plusieurs appels, par exemple en mode streaming.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    return ProcessPoolExecutor(max_workers=workers,
+                               initializer=_init_worker,
+                               initargs=(skills_dict_path, cache_path))
+
+
+def extract_skills_batch(texts: List[str],
+                         workers: int = 1,
+                         chunk_size: int = 500,
+                         skills_dict_path: str = None,
+                         verbose: bool = True,
+                         executor=None,
+                         cache_path: str = None,
+                         cache_counters: Counter = None) -> List[Dict]:
+    """
+    Extrait les compétences d'une liste de textes, par paquets.
+    
+    Chaque texte n'est analysé qu'une fois. Avec workers > 1, les paquets
+    sont répartis sur un pool de process, chacun construisant son
+    SkillsExtractor une seule fois.
+    
+    Args:
+        texts: Textes à analyser (None / NaN acceptés)
+        workers: Nombre de process (1 = dans le process courant)
+        chunk_size: Nombre de textes par paquet
+        skills_dict_path: Chemin vers skills_dict.json
+        verbose: Afficher la progression
+        executor: Pool existant (voir create_extraction_pool), prioritaire
+            sur workers
+        cache_path: Cache d'extraction persistant (ignoré si executor est
+            fourni : le pool porte sa propre configuration)
+        cache_counters: Counter mis à jour avec les hits / misses du cache
+    
+    Returns:
+        Liste de dicts (competences, savoir_etre, skills_count, skills_json),
+        dans l'ordre des textes
+    """
+    texts = [text if isinstance(text, str) else "" for text in texts]
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    
+    results = []
+    
+    def _progress():
+        if verbose:
+            print(f"   Traité {len(results)}/{len(texts)}")
+    
+    def _collect(chunk_results, counters):
+        results.extend(chunk_results)
+        if cache_counters is not None:
+            cache_counters.update(counters)
+        _progress()
+    
+    if executor is None and workers <= 1:
+        if _worker_extractor is None or _worker_config != (skills_dict_path, cache_path):
+            _init_worker(skills_dict_path, cache_path)
+        for chunk in chunks:
+            _collect(*_extract_chunk(chunk))
+        return results
+    
+    own_executor = executor is None
+    if own_executor:
+        executor = create_extraction_pool(workers, skills_dict_path, cache_path)
+    
+    try:
+        # map conserve l'ordre des paquets
+        for chunk_results, counters in executor.map(_extract_chunk, chunks):
+            _collect(chunk_results, counters)
+    finally:
+        if own_executor:
+            executor.shutdown()
+    
+    return results
+
+
+def extract_skills_from_dataframe(df, text_column: str = 'description',
+                                  workers: int = 1, chunk_size: int = 500,
+                                  cache_path: str = None):
     """
     Applique l'extraction sur un DataFrame pandas.
     
@@ -238,68 +644,99 @@ def extract_skills_from_dataframe(df, text_column: str = 'description'):
     """
     import pandas as pd
     
-    extractor = SkillsExtractor()
-    
     print(f"Extraction des compétences sur {len(df)} offres...")
     
-    results = []
-    for idx, row in df.iterrows():
-        text = row[text_column] if pd.notna(row[text_column]) else ""
-        
-        skills = extractor.extract(text)
-        by_type = extractor.extract_by_type(text)
-        
-        results.append({
-            'competences': by_type['competences'],
-            'savoir_etre': by_type['savoir_etre'],
-            'skills_count': len(skills),
-            'skills_json': json.dumps([{
-                'name': s.name,
-                'category': s.category,
-                'type': s.type,
-                'confidence': s.confidence
-            } for s in skills], ensure_ascii=False)
-        })
-        
-        if (idx + 1) % 100 == 0:
-            print(f"   Traité {idx + 1}/{len(df)}")
-    
-    results_df = pd.DataFrame(results)
+    cache_counters = Counter()
+    results = extract_skills_batch(
+        df[text_column].tolist(),
+        workers=workers,
+        chunk_size=chunk_size,
+        cache_path=cache_path,
+        cache_counters=cache_counters
+    )
+    
+    results_df = pd.DataFrame(
+        results,
+        index=df.index,
+        columns=['competences', 'savoir_etre', 'skills_count', 'skills_json']
+    )
     df_enriched = pd.concat([df, results_df], axis=1)
     
     print(f"Extraction terminée!")
     print(f"Moyenne: {df_enriched['skills_count'].mean():.1f} compétences/offre")
+    if cache_path:
+        print(f"Cache: {cache_counters['hits']} hits / {cache_counters['misses']} misses")
     
     return df_enriched
 
 
-def get_global_skills_stats(df_enriched):
-    """
-    Calcule les statistiques globales sur les compétences.
+class SkillsStatsAccumulator:
     """
-    from collections import Counter
+    Statistiques globales sur les compétences, construites paquet par paquet.
     
-    all_competences = []
-    all_savoir_etre = []
+    La mémoire ne dépend que du nombre de compétences distinctes, pas du
+    nombre d'offres (la médiane est calculée sur l'histogramme des
+    skills_count).
+    """
     
-    for comp_list in df_enriched['competences']:
-        all_competences.extend(comp_list)
+    def __init__(self):
+        self.comp_counts = Counter()
+        self.se_counts = Counter()
+        self.skills_count_hist = Counter()
+        self.n_offers = 0
     
-    for se_list in df_enriched['savoir_etre']:
-        all_savoir_etre.extend(se_list)
+    def update(self, df_enriched):
+        """Ajoute un paquet d'offres enrichies (colonnes de extract_skills_*)"""
+        for comp_list in df_enriched['competences']:
+            self.comp_counts.update(comp_list)
+        
+        for se_list in df_enriched['savoir_etre']:
+            self.se_counts.update(se_list)
+        
+        self.skills_count_hist.update(df_enriched['skills_count'].tolist())
+        self.n_offers += len(df_enriched)
     
-    comp_counts = Counter(all_competences)
-    se_counts = Counter(all_savoir_etre)
+    def _median_skills_count(self) -> float:
+        if self.n_offers == 0:
+            return float('nan')
+        
+        # Rangs (0-based) des valeurs centrales
+        lower_rank = (self.n_offers - 1) // 2
+        upper_rank = self.n_offers // 2
+        
+        lower = upper = None
+        seen = 0
+        for value in sorted(self.skills_count_hist):
+            seen += self.skills_count_hist[value]
+            if lower is None and seen > lower_rank:
+                lower = value
+            if seen > upper_rank:
+                upper = value
+                break
+        
+        return (lower + upper) / 2
     
-    return {
-        'total_competences': len(comp_counts),
-        'total_savoir_etre': len(se_counts),
-        'total_mentions': sum(comp_counts.values()) + sum(se_counts.values()),
-        'top_competences': comp_counts.most_common(20),
-        'top_savoir_etre': se_counts.most_common(15),
-        'avg_skills_per_offer': df_enriched['skills_count'].mean(),
-        'median_skills_per_offer': df_enriched['skills_count'].median()
-    }
+    def get_stats(self) -> Dict:
+        total_skills = sum(value * count for value, count in self.skills_count_hist.items())
+        
+        return {
+            'total_competences': len(self.comp_counts),
+            'total_savoir_etre': len(self.se_counts),
+            'total_mentions': sum(self.comp_counts.values()) + sum(self.se_counts.values()),
+            'top_competences': self.comp_counts.most_common(20),
+            'top_savoir_etre': self.se_counts.most_common(15),
+            'avg_skills_per_offer': total_skills / self.n_offers if self.n_offers else float('nan'),
+            'median_skills_per_offer': self._median_skills_count()
+        }
+
+
+def get_global_skills_stats(df_enriched):
+    """
+    Calcule les statistiques globales sur les compétences.
+    """
+    accumulator = SkillsStatsAccumulator()
+    accumulator.update(df_enriched)
+    return accumulator.get_stats()
 
 
 if __name__ == "__main__":